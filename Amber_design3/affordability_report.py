@@ -0,0 +1,110 @@
+# affordability_report.py
+# Batch report: share of affordable ZIPs per metro x year x income level.
+#
+#     python affordability_report.py --out affordability_report.parquet
+#     python affordability_report.py --income-min 20000 --income-max 200000 --income-step 500
+#
+# Every PERSONA_DEFAULTS income is always included on top of the income grid.
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataprep import load_data, enable_copy_on_write, AFFORDABILITY_THRESHOLD
+from price_index import zip_year_prices
+from ui_components import PERSONA_DEFAULTS
+
+DEFAULT_OUTPUT = "affordability_report.parquet"
+
+
+def income_levels(income_min: int, income_max: int, income_step: int) -> pd.DataFrame:
+    """Income grid plus the persona defaults, labelled by where each level came from."""
+    grid = np.arange(income_min, income_max + 1, income_step, dtype=np.float64)
+    levels = pd.DataFrame({"income": grid, "income_source": "grid"})
+    personas = pd.DataFrame({
+        "income": np.array(list(PERSONA_DEFAULTS.values()), dtype=np.float64),
+        "income_source": [f"persona:{name}" for name in PERSONA_DEFAULTS],
+    })
+    return pd.concat([levels, personas], ignore_index=True)
+
+
+def _metro_matrix(code: str, years: np.ndarray, prices: np.ndarray, incomes: np.ndarray) -> dict:
+    """
+    Worker: affordable ZIP counts for one metro, every year x every income.
+    `years`/`prices` hold one row per ZIP-year (median sale price).
+    """
+    max_prices = AFFORDABILITY_THRESHOLD * incomes
+    order = np.lexsort((prices, years))
+    years, prices = years[order], prices[order]
+
+    uniq_years, starts, counts = np.unique(years, return_index=True, return_counts=True)
+    # Same rule as the map: a ZIP is affordable when price < max affordable price.
+    affordable = np.empty((len(uniq_years), len(incomes)), dtype=np.int64)
+    for i, (start, count) in enumerate(zip(starts, counts)):
+        affordable[i] = np.searchsorted(prices[start:start + count], max_prices, side="left")
+
+    return {
+        "city": np.full(affordable.size, code, dtype=object),
+        "year": np.repeat(uniq_years, len(incomes)),
+        "income_idx": np.tile(np.arange(len(incomes)), len(uniq_years)),
+        "zip_count": np.repeat(counts, len(incomes)),
+        "affordable_zip_count": affordable.ravel(),
+    }
+
+
+def build_report(df: pd.DataFrame, levels: pd.DataFrame, workers: int = None) -> pd.DataFrame:
+    """Computes the full metro x year x income matrix, one process task per metro."""
+    prices = zip_year_prices(df)
+    incomes = levels["income"].to_numpy()
+
+    tasks = [
+        (code, grp["year"].to_numpy(), grp["median_sale_price"].to_numpy(np.float64), incomes)
+        for code, grp in prices.groupby("city_geojson_code")
+    ]
+    if not tasks:
+        return pd.DataFrame()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_metro_matrix, *zip(*tasks)))
+
+    report = pd.concat([pd.DataFrame(p) for p in parts], ignore_index=True)
+    report["income"] = incomes[report["income_idx"]]
+    report["income_source"] = levels["income_source"].to_numpy()[report["income_idx"]]
+    report["max_affordable_price"] = AFFORDABILITY_THRESHOLD * report["income"]
+    report["affordable_share"] = report["affordable_zip_count"] / report["zip_count"]
+
+    city_full = df.drop_duplicates("city_geojson_code").set_index("city_geojson_code")["city_full"]
+    report["city_full"] = report["city"].map(city_full)
+
+    return report[[
+        "city", "city_full", "year", "income", "income_source", "max_affordable_price",
+        "zip_count", "affordable_zip_count", "affordable_share",
+    ]].sort_values(["city", "year", "income"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk ZIP affordability report")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT, help="Output .parquet path")
+    parser.add_argument("--income-min", type=int, default=20000)
+    parser.add_argument("--income-max", type=int, default=200000)
+    parser.add_argument("--income-step", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    enable_copy_on_write()
+
+    t0 = time.perf_counter()
+    df = load_data()
+    if df.empty:
+        raise SystemExit("Base data is empty; cannot build the report.")
+
+    levels = income_levels(args.income_min, args.income_max, args.income_step)
+    report = build_report(df, levels, workers=args.workers)
+    report.to_parquet(args.out, index=False)
+    print(
+        f"Wrote {len(report):,} rows ({report['city'].nunique()} metros x "
+        f"{report['year'].nunique()} years x {len(levels)} incomes) to {args.out} "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
@@ -0,0 +1,446 @@
+# api_server.py
+# Headless JSON API for metro rankings and ZIP affordability.
+#
+# Run next to app.py:
+#     python api_server.py --host 0.0.0.0 --port 8502
+#
+# Endpoints (all GET, all JSON):
+#     /health
+#     /metros
+#     /rankings?year=2023
+#     /metros/<CODE>/zips?year=2023&income=43000
+#     /affordability?year=2023&income=43000
+#     /search?year=2023&income=43000&n=20&sort=pti
+#     /trends?level=zip&year=2023&horizon=3&direction=worsening&n=20
+#
+# Streaming exports (chunked transfer; fmt = csv | parquet):
+#     /export/rankings.<fmt>?year=2023
+#     /export/metros/<CODE>/zips.<fmt>?year=2023&income=43000
+#     /export/rows.<fmt>?year=2023&cities=SEA,PDX
+
+import argparse
+import itertools
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from dataprep import (
+    load_data,
+    enable_copy_on_write,
+    make_city_view_all_years,
+    RATIO_COL,
+    AFFORDABILITY_THRESHOLD,
+)
+from zip_module import ZipYearTable
+from national_search import NationalZipIndex, SORT_OPTIONS
+from price_index import zip_year_prices
+from change_analytics import ChangeRankings, zip_change_table, metro_change_table
+from export import EXPORT_FORMATS, row_index, iter_frame_chunks
+from ui_components import PERSONA_DEFAULTS
+
+DEFAULT_PORT = 8502
+RESPONSE_CACHE_SIZE = 2048
+
+logger = logging.getLogger("house_browse.api")
+
+
+class ApiError(Exception):
+    """Raised by a route handler to return a JSON error with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# --- Response cache (shared by all handler threads) ---
+class ResponseCache:
+    """Small thread-safe LRU cache of encoded JSON response bodies."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+def _records(frame: pd.DataFrame) -> list:
+    """DataFrame -> list of JSON-safe dicts (NaN becomes null)."""
+    return json.loads(frame.to_json(orient="records"))
+
+
+# --- Dataset held in memory for the life of the process ---
+class HousingDataset:
+    """Loads the dataset once and answers the API queries from memory."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.years = sorted(int(y) for y in df["year"].unique())
+        self.metros = (
+            df[["city_geojson_code", "city_full"]]
+            .drop_duplicates("city_geojson_code")
+            .sort_values("city_full")
+        )
+        zip_prices = zip_year_prices(df)
+        self.zip_table = ZipYearTable.build(zip_prices)
+        self.national_index = NationalZipIndex.from_zip_prices(zip_prices)
+        self.city_views = make_city_view_all_years(df)
+        self.change_rankings = {
+            "metro": ChangeRankings(metro_change_table(self.city_views)),
+            "zip": ChangeRankings(zip_change_table(zip_prices)),
+        }
+
+    def resolve_year(self, year):
+        if year is None:
+            return self.years[-1]
+        if year not in self.years:
+            raise ApiError(404, f"No data for year {year}.")
+        return year
+
+    def resolve_metro(self, code: str) -> str:
+        code = code.upper()
+        if code not in set(self.metros["city_geojson_code"]):
+            raise ApiError(404, f"Unknown metro code '{code}'.")
+        return code
+
+    def city_view(self, year: int) -> pd.DataFrame:
+        """Per-metro medians and PTI for one year (metro PTI does not depend on income)."""
+        rows = self.city_views[self.city_views["year"] == year]
+        return rows.drop(columns="year").reset_index(drop=True)
+
+    def zip_year_table(self, code: str, year: int) -> pd.DataFrame:
+        """One row per ZIP for a metro/year (median of the monthly rows), cheapest first."""
+        table = self.zip_table.rows(code, year)
+        return (
+            table[["zip_code_str", "median_sale_price", "per_capita_income", RATIO_COL, "affordability_rating"]]
+            .sort_values("median_sale_price")
+            .reset_index(drop=True)
+        )
+
+
+# --- Route handlers: (dataset, params) -> JSON-serializable payload ---
+def _int_param(params: dict, name: str, default=None):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise ApiError(400, f"Query parameter '{name}' must be a number.")
+    if not math.isfinite(number) or not number.is_integer():
+        raise ApiError(400, f"Query parameter '{name}' must be a whole number.")
+    return int(number)
+
+
+def _income_param(params: dict) -> float:
+    persona = params.get("persona")
+    if persona is not None:
+        if persona not in PERSONA_DEFAULTS:
+            raise ApiError(400, f"Unknown persona '{persona}'.")
+        return float(PERSONA_DEFAULTS[persona])
+    return float(_int_param(params, "income", PERSONA_DEFAULTS["Young professional"]))
+
+
+def route_health(data: HousingDataset, params: dict):
+    return {"status": "ok", "years": data.years, "metros": len(data.metros)}
+
+
+def route_metros(data: HousingDataset, params: dict):
+    return {
+        "metros": [
+            {"city": code, "city_full": full}
+            for code, full in data.metros.itertuples(index=False)
+        ]
+    }
+
+
+def route_rankings(data: HousingDataset, params: dict):
+    year = data.resolve_year(_int_param(params, "year"))
+    city_data = data.city_view(year).sort_values(RATIO_COL)
+    return {
+        "year": year,
+        "affordability_threshold": AFFORDABILITY_THRESHOLD,
+        "rankings": _records(city_data),
+    }
+
+
+def route_metro_zips(data: HousingDataset, params: dict, code: str):
+    code = data.resolve_metro(code)
+    year = data.resolve_year(_int_param(params, "year"))
+    income = _income_param(params)
+    max_affordable_price = AFFORDABILITY_THRESHOLD * income
+
+    table = data.zip_year_table(code, year)
+    if table.empty:
+        raise ApiError(404, f"No ZIP-level data for {code} in {year}.")
+    table = table.assign(affordable=table["median_sale_price"] < max_affordable_price)
+    return {
+        "city": code,
+        "year": year,
+        "income": income,
+        "max_affordable_price": max_affordable_price,
+        "zips": _records(table),
+    }
+
+
+def route_affordability(data: HousingDataset, params: dict):
+    year = data.resolve_year(_int_param(params, "year"))
+    income = _income_param(params)
+    max_affordable_price = AFFORDABILITY_THRESHOLD * income
+
+    rows = []
+    for code, full in data.metros.itertuples(index=False):
+        table = data.zip_year_table(code, year)
+        total = len(table)
+        n_affordable = int((table["median_sale_price"] < max_affordable_price).sum()) if total else 0
+        rows.append({
+            "city": code,
+            "city_full": full,
+            "zip_count": total,
+            "affordable_zip_count": n_affordable,
+            "affordable_share": (n_affordable / total) if total else None,
+        })
+    rows.sort(key=lambda r: -(r["affordable_share"] or 0.0))
+    return {
+        "year": year,
+        "income": income,
+        "max_affordable_price": max_affordable_price,
+        "metros": rows,
+    }
+
+
+def route_search(data: HousingDataset, params: dict):
+    year = data.resolve_year(_int_param(params, "year"))
+    income = _income_param(params)
+    n = min(max(_int_param(params, "n", 20), 1), 1000)
+    sort_by = params.get("sort", "price")
+    if sort_by not in SORT_OPTIONS:
+        raise ApiError(400, f"Query parameter 'sort' must be one of {list(SORT_OPTIONS)}.")
+    max_affordable_price = AFFORDABILITY_THRESHOLD * income
+
+    results = data.national_index.search(year, max_affordable_price, n=n, sort_by=sort_by)
+    return {
+        "year": year,
+        "income": income,
+        "max_affordable_price": max_affordable_price,
+        "affordable_zip_count": data.national_index.count_affordable(year, max_affordable_price),
+        "sort": sort_by,
+        "zips": _records(results),
+    }
+
+
+def route_trends(data: HousingDataset, params: dict):
+    level = params.get("level", "metro")
+    if level not in data.change_rankings:
+        raise ApiError(400, f"Query parameter 'level' must be one of {list(data.change_rankings)}.")
+    direction = params.get("direction", "worsening")
+    if direction not in ("worsening", "improving"):
+        raise ApiError(400, "Query parameter 'direction' must be 'worsening' or 'improving'.")
+    year = data.resolve_year(_int_param(params, "year"))
+    horizon = _int_param(params, "horizon", 1)
+    rankings = data.change_rankings[level]
+    if horizon not in rankings.horizons(year):
+        raise ApiError(404, f"No {horizon}-year changes ending in {year}.")
+    n = min(max(_int_param(params, "n", 20), 1), 1000)
+    return {
+        "level": level,
+        "year": year,
+        "horizon": horizon,
+        "direction": direction,
+        "changes": _records(rankings.rank(year, horizon, n=n, worsening=direction == "worsening")),
+    }
+
+
+# Query parameters a route ignores, left out of its response cache key.
+CACHE_IGNORED_PARAMS = {
+    "/rankings": {"income", "persona"},
+}
+
+ROUTES = {
+    "/health": route_health,
+    "/metros": route_metros,
+    "/rankings": route_rankings,
+    "/affordability": route_affordability,
+    "/search": route_search,
+    "/trends": route_trends,
+}
+
+
+def dispatch(data: HousingDataset, path: str, params: dict):
+    """Resolves a request path to a route handler and runs it."""
+    handler = ROUTES.get(path)
+    if handler is not None:
+        return handler(data, params)
+
+    parts = [p for p in path.split("/") if p]
+    if len(parts) == 3 and parts[0] == "metros" and parts[2] == "zips":
+        return route_metro_zips(data, params, parts[1])
+
+    raise ApiError(404, f"Unknown endpoint '{path}'.")
+
+
+# --- Streaming exports: (dataset, params, ...) -> iterator of DataFrame chunks ---
+def export_rankings(data: HousingDataset, params: dict):
+    payload = route_rankings(data, params)
+    return iter_frame_chunks(pd.DataFrame(payload["rankings"]))
+
+
+def export_metro_zips(data: HousingDataset, params: dict, code: str):
+    payload = route_metro_zips(data, params, code)
+    return iter_frame_chunks(pd.DataFrame(payload["zips"]))
+
+
+def export_rows(data: HousingDataset, params: dict):
+    year = data.resolve_year(_int_param(params, "year")) if "year" in params else None
+    cities = [data.resolve_metro(c) for c in params.get("cities", "").split(",") if c]
+    return iter_frame_chunks(data.df, row_index(data.df, year=year, city_codes=cities))
+
+
+def dispatch_export(data: HousingDataset, path: str, params: dict):
+    """Resolves /export/<name>.<fmt>; returns (byte stream, content type, file name)."""
+    name, _, fmt = path[len("/export/"):].rpartition(".")
+    if fmt not in EXPORT_FORMATS:
+        raise ApiError(400, f"Export format must be one of {list(EXPORT_FORMATS)}.")
+    encode, content_type = EXPORT_FORMATS[fmt]
+
+    parts = name.split("/")
+    if name == "rankings":
+        chunks = export_rankings(data, params)
+    elif name == "rows":
+        chunks = export_rows(data, params)
+    elif len(parts) == 3 and parts[0] == "metros" and parts[2] == "zips":
+        chunks = export_metro_zips(data, params, parts[1])
+    else:
+        raise ApiError(404, f"Unknown export '{name}'.")
+    return encode(chunks), content_type, f"{name.replace('/', '_')}.{fmt}"
+
+
+# --- HTTP layer ---
+def make_handler(data: HousingDataset, cache: ResponseCache):
+    class ApiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            t0 = time.perf_counter()
+            url = urlparse(self.path)
+            path = url.path.rstrip("/") or "/"
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if path.startswith("/export/"):
+                return self._send_export(path, params)
+            ignored = CACHE_IGNORED_PARAMS.get(path, ())
+            cache_key = (path, tuple(sorted((k, v) for k, v in params.items() if k not in ignored)))
+
+            status = 200
+            body = cache.get(cache_key)
+            cache_state = "hit"
+            if body is None:
+                cache_state = "miss"
+                try:
+                    payload = dispatch(data, path, params)
+                    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+                    cache.put(cache_key, body)
+                except ApiError as e:
+                    status = e.status
+                    body = json.dumps({"error": e.message}).encode("utf-8")
+                except Exception:
+                    logger.exception("GET %s failed", self.path)
+                    status = 500
+                    body = json.dumps({"error": "Internal server error."}).encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-Cache", cache_state)
+            self.send_header("X-Elapsed-Ms", f"{(time.perf_counter() - t0) * 1000:.2f}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_export(self, path: str, params: dict):
+            # Exports bypass the response cache and are sent with chunked
+            # transfer encoding, one HTTP chunk per encoded DataFrame chunk.
+            try:
+                stream, content_type, file_name = dispatch_export(data, path, params)
+                first = next(stream)
+            except Exception as e:
+                if isinstance(e, ApiError):
+                    status, message = e.status, e.message
+                else:
+                    logger.exception("GET %s failed", self.path)
+                    status, message = 500, "Internal server error."
+                body = json.dumps({"error": message}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Disposition", f'attachment; filename="{file_name}"')
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for piece in itertools.chain([first], stream):
+                    if piece:
+                        self.wfile.write(f"{len(piece):X}\r\n".encode("ascii") + piece + b"\r\n")
+            except Exception:
+                # The 200 is already sent; drop the connection without the final
+                # chunk so the client sees a truncated transfer, not a short file.
+                logger.exception("GET %s failed mid-stream", self.path)
+                self.close_connection = True
+                return
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            # Keep stdout quiet under load; errors still go through log_error.
+            pass
+
+    return ApiHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+    enable_copy_on_write()
+    df = load_data()
+    if df.empty:
+        raise SystemExit("Base data is empty; cannot start the API server.")
+
+    data = HousingDataset(df)
+    cache = ResponseCache()
+    server = ThreadingHTTPServer((host, port), make_handler(data, cache))
+    server.daemon_threads = True
+    print(f"Serving House-Browse API on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="House-Browse JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
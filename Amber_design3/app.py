@@ -1,32 +1,70 @@
 # app_v4.py
 
+import time 
+_SCRIPT_T0 = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import json
 import os
-import time 
 
-# --- RESTORED IMPORTS ---
-from zip_module import load_city_zip_data, get_zip_coordinates
-from dataprep import (
-    load_data,
-    make_city_view_data,
-    RATIO_COL,
-    AFFORDABILITY_THRESHOLD,
-    apply_income_filter,
-    AFFORDABILITY_CATEGORIES,
-    AFFORDABILITY_COLORS,
-    classify_affordability,
-    make_zip_view_data,
+from coldstart import PROCESS_T0, lazy_module, record_timing, timed
+from profiling import start_rerun_profile, finish_rerun_profile
+
+from figures import (
+    use_fast_json_engine,
+    compact_geojson,
+    ZIP_MAP_COLORSCALE,
+    affordability_color_values,
+    metro_ranking_figure,
+    zip_map_figure,
+    map_zoom,
 )
-from ui_components import income_control_panel, persona_income_slider, render_affordability_summary_card
+
+# plotly.express is only needed once a chart is drawn; figures serialize with orjson when available
+px = lazy_module("plotly.express", on_load=use_fast_json_engine)
+
+# --- RESTORED IMPORTS ---
+with timed("import:app_modules"):
+    from zip_module import ZipYearTable
+    from dataprep import (
+        RATIO_COL,
+        AFFORDABILITY_THRESHOLD,
+        AFFORDABILITY_CATEGORIES,
+        AFFORDABILITY_COLORS,
+        classify_affordability,
+        make_zip_view_data,
+        enable_copy_on_write,
+    )
+    from ui_components import (
+        income_control_panel,
+        persona_income_slider,
+        render_affordability_summary_card,
+        mortgage_scenario_controls,
+    )
+    from mortgage import MortgageScenario, affordability_grid, payment_to_income
+    from price_distribution import PriceDistributions
+    from change_analytics import ChangeRankings, zip_change_table, metro_change_table
+    from similar_zips import SimilarZipIndex
+    from components.zip_map import zip_affordability_map, geometry_file
+    from price_index import PriceIndex
+    from national_search import NationalZipIndex
+    from zip_timeseries import ZipTimeSeriesStore
+    from hex_overview import HexOverview, HEX_RESOLUTIONS, zip_centroids
+    from artifacts import load_city_view_artifact, load_metro_artifact, geojson_path
+    from data_backend import get_backend
+    from result_cache import persistent_cache
+    from export import EXPORT_FORMATS, UI_EXPORT_MAX_BYTES, ExportTooLarge, iter_frame_chunks, encode_to_bytes
 
 # ---------- Global config ----------
+enable_copy_on_write()
 st.set_page_config(page_title="Design 3 – Price Affordability Finder", layout="wide")
 st.title("Design 3 – Price Affordability Finder")
 
+# Operator-only profiling of the next N reruns (HOUSE_PROFILE_RERUNS / ?profile=N, see profiling.py)
+start_rerun_profile(st.session_state, st.query_params)
+
 # --- HTML INTRO BLOCK ---
 st.markdown(
     """
@@ -55,11 +93,12 @@ st.markdown(
 )
 
 MAX_ZIP_RATIO_CLIP = 15.0
+# Where users are sent for exports too large for an in-app download (api_server.py).
+API_BASE_URL = os.environ.get("HOUSE_API_URL", "http://127.0.0.1:8502")
 
 
 # ---------- Function Definitions ----------
-def year_selector(df: pd.DataFrame, key: str):
-    years = sorted(df["year"].unique())
+def year_selector(years: list, key: str):
     if not years:
         return None
         
@@ -79,17 +118,279 @@ def year_selector(df: pd.DataFrame, key: str):
     )
 
 
+@st.cache_resource(ttl=3600*24)
+def get_data_backend():
+    # HOUSE_DATA_BACKEND=pandas|databricks|sqlite (see data_backend.py)
+    return get_backend()
+
+
+@st.cache_data(ttl=3600*24)
+def get_years(_backend):
+    return _backend.years()
+
+
 @st.cache_data(ttl=3600*24)
-def get_data_cached():
-    return load_data()
+@persistent_cache("metros")
+def get_metros(_backend):
+    return _backend.metros()
+
+
+@st.cache_data(ttl=3600*24)
+@persistent_cache("city_view")
+def get_city_view(_backend, yr):
+    return _backend.city_view(yr)
+
+
+# Artifacts are looked up by the backend's data version, so they are only
+# used when they were built from the data the backend serves.
+@st.cache_resource(ttl=3600*24)
+def get_city_view_artifact(data_version):
+    return load_city_view_artifact(version=data_version)
+
+
+@st.cache_resource(ttl=3600*24)
+def get_metro_artifact(city_geojson_code, data_version):
+    return load_metro_artifact(city_geojson_code, version=data_version)
+
+
+def city_view_for_year(backend, yr):
+    """City-level view for one year: prebuilt artifact if available, else from the backend."""
+    city_view_all = get_city_view_artifact(backend.version())
+    if city_view_all is not None:
+        return city_view_all[city_view_all["year"] == yr].drop(columns="year").reset_index(drop=True)
+    return get_city_view(backend, yr)
+
+
+@st.cache_data(ttl=3600*24)
+@persistent_cache("city_views")
+def get_city_views(_backend):
+    """City views for every year (one vectorized pass), for the year playback."""
+    city_view_all = get_city_view_artifact(_backend.version())
+    if city_view_all is not None:
+        return city_view_all
+    return _backend.city_views()
+
+
+@st.cache_data(ttl=3600*24)
+@persistent_cache("city_history")
+def get_city_history(_backend, city_geojson_code):
+    metro_artifact = get_metro_artifact(city_geojson_code, _backend.version())
+    if metro_artifact is not None:
+        return metro_artifact["history"]
+    return _backend.city_history(city_geojson_code)
+
+
+@st.cache_resource(ttl=3600*24)
+def get_metro_geojson(city_geojson_code, data_version):
+    """Compact map geometry (see figures.py), built once and reused by every rerun."""
+    metro_artifact = get_metro_artifact(city_geojson_code, data_version)
+    if metro_artifact is not None and metro_artifact["geojson"] is not None:
+        return compact_geojson(metro_artifact["geojson"])
+    path = geojson_path(city_geojson_code)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return compact_geojson(json.load(f))
+
+
+@st.cache_resource(ttl=3600*24)
+def get_merged_geojson(city_geojson_codes: tuple, data_version):
+    """One FeatureCollection for a set of metros (features are shared with the per-metro cache)."""
+    if len(city_geojson_codes) == 1:
+        return get_metro_geojson(city_geojson_codes[0], data_version)
+    features = []
+    for code in city_geojson_codes:
+        metro_geojson = get_metro_geojson(code, data_version)
+        if metro_geojson is not None:
+            features.extend(metro_geojson["features"])
+    return {"type": "FeatureCollection", "features": features} if features else None
+
+
+def map_rows_for_metros(backend, city_geojson_codes, yr=None):
+    """
+    ZIP map rows for several metros (one year, or all years when yr is None):
+    one row per ZIP-year from the ZIP x year table, limited to ZIPs with a
+    polygon, gathered in a single concat; 'map_metro' tags each row's metro.
+    """
+    zip_table = get_zip_year_table(backend)
+    frames, codes = [], []
+    for code in city_geojson_codes:
+        frame = zip_table.rows(code, yr)
+        frame = frame[frame["lat"].notna()]
+        if not frame.empty:
+            frames.append(frame)
+            codes.append(code)
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True)
+    merged["map_metro"] = np.repeat(codes, [len(f) for f in frames])
+    return merged
+
+
+def get_zip_price_trends(backend, df_zip_map, city_geojson_codes, yr):
+    """12-month price change of every map row, from each metro's time-series store."""
+    map_metro = df_zip_map["map_metro"].to_numpy()
+    zip_strs = df_zip_map["zip_code_str"].to_numpy()
+    price_trend = np.full(len(df_zip_map), np.nan)
+    for code in city_geojson_codes:
+        pos = np.flatnonzero(map_metro == code)
+        if len(pos):
+            price_trend[pos] = get_zip_timeseries(backend, code).price_change(zip_strs[pos], yr)
+    return price_trend
+
+
+@st.cache_resource(ttl=3600*24)
+def get_geometry_url(city_geojson_codes: tuple, data_version):
+    """Static geometry file for the client-side map; written once per metro set."""
+    return geometry_file(get_merged_geojson(city_geojson_codes, data_version))
+
+
+def ranking_animation_figure(city_views: pd.DataFrame):
+    """Metro PTI bar chart with one frame per year; playback runs in the browser."""
+    anim_data = city_views.sort_values(["year", "city_full"])
+    return px.bar(
+        anim_data,
+        x="city",
+        y=RATIO_COL,
+        color="affordability_rating",
+        animation_frame="year",
+        category_orders={
+            "city": sorted(anim_data["city"].unique()),
+            "affordability_rating": list(AFFORDABILITY_CATEGORIES.keys()),
+        },
+        color_discrete_map=AFFORDABILITY_COLORS,
+        range_y=[0, anim_data[RATIO_COL].max() * 1.05],
+        labels={
+            "city": "City",
+            RATIO_COL: "Price-to-income ratio",
+            "affordability_rating": "Affordability Rating",
+        },
+        hover_data={"city_full": True, RATIO_COL: ":.2f"},
+        height=520,
+    )
+
+
+def zip_map_animation_figure(zip_rows: pd.DataFrame, zip_geojson: dict, max_affordable_price: float):
+    """ZIP choropleth with one frame per year; geometry is sent once, not per frame."""
+    zip_year = (
+        zip_rows.groupby(["year", "zip_code_str"], as_index=False)
+        .agg(median_sale_price=("median_sale_price", "median"), lat=("lat", "first"), lon=("lon", "first"))
+        .sort_values(["year", "zip_code_str"])
+    )
+    zip_year["color_value"] = affordability_color_values(
+        zip_year["median_sale_price"],
+        max_affordable_price,
+        zip_year["median_sale_price"].min(),
+        zip_year["median_sale_price"].max(),
+    )
+    fig = px.choropleth_mapbox(
+        zip_year,
+        geojson=zip_geojson,
+        locations="zip_code_str",
+        featureidkey="properties.ZCTA5CE10",
+        color="color_value",
+        animation_frame="year",
+        color_continuous_scale=ZIP_MAP_COLORSCALE,
+        range_color=[0, 1],
+        hover_data={"median_sale_price": ":,.0f", "color_value": False},
+        labels={"zip_code_str": "ZIP"},
+        mapbox_style="carto-positron",
+        center={"lat": zip_year["lat"].mean(), "lon": zip_year["lon"].mean()},
+        zoom=map_zoom(zip_year["lat"], zip_year["lon"], single_metro_zoom=9),
+        height=454,
+    )
+    # Frames only carry the color arrays; the base trace keeps the geometry.
+    for frame in fig.frames:
+        for trace in frame.data:
+            trace.geojson = None
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),
+        coloraxis_colorbar=dict(title="Affordability", tickvals=[0, 0.5, 1],
+                                ticktext=["Cheapest", f"${max_affordable_price:,.0f}", "Most expensive"]),
+    )
+    return fig
+
+
+@st.cache_data(ttl=3600*24)
+@persistent_cache("zip_year_prices")
+def get_zip_year_prices(_backend):
+    return _backend.zip_year_prices()
+
+
+@st.cache_resource(ttl=3600*24)
+def get_zip_year_table(_backend):
+    """ZIP x year aggregate (price, income, PTI, rating, centroid), built once per process."""
+    return ZipYearTable.build(get_zip_year_prices(_backend), get_hex_overview().centroids)
+
+
+@st.cache_resource(ttl=3600*24)
+def get_price_index(_backend):
+    return PriceIndex.from_zip_prices(get_zip_year_prices(_backend))
+
+
+@st.cache_resource(ttl=3600*24)
+def get_zip_timeseries(_backend, city_geojson_code):
+    """CSR time-series store of every ZIP in a metro (sparklines + hover trends)."""
+    return ZipTimeSeriesStore.from_rows(_backend.zip_rows(city_geojson_code))
+
+
+@st.cache_resource(ttl=3600*24)
+def get_hex_overview():
+    return HexOverview(zip_centroids())
+
+
+@st.cache_resource(ttl=3600*24)
+def get_national_index(_backend):
+    return NationalZipIndex.from_zip_prices(get_zip_year_prices(_backend))
+
+
+@st.cache_data(ttl=3600*24)
+@persistent_cache("zip_changes")
+def get_zip_changes(_backend):
+    return zip_change_table(get_zip_year_prices(_backend))
+
+
+@st.cache_data(ttl=3600*24)
+@persistent_cache("metro_changes")
+def get_metro_changes(_backend):
+    return metro_change_table(get_city_views(_backend))
+
+
+@st.cache_resource(ttl=3600*24)
+def get_change_rankings(_backend):
+    """Fastest worsening / improving lookups for both levels."""
+    return {
+        "Metro areas": ChangeRankings(get_metro_changes(_backend)),
+        "ZIP codes": ChangeRankings(get_zip_changes(_backend)),
+    }
+
+
+@st.cache_resource(ttl=3600*24)
+def get_similar_zip_index(_backend):
+    return SimilarZipIndex.build(
+        get_zip_year_table(_backend).frame, get_zip_changes(_backend), get_hex_overview().centroids
+    )
+
+
+@st.cache_resource(ttl=3600*24)
+def get_price_distributions(_backend):
+    return PriceDistributions.from_zip_prices(get_zip_year_prices(_backend))
+
+
+@st.cache_data(ttl=3600*24)
+def get_scenario_grid(_backend, city_geojson_code, yr, budget_pct, down_payment_pct, term_years):
+    """Affordable ZIPs over the whole rate x income grid; the chosen rate only moves the marker."""
+    scenario = MortgageScenario(budget_pct, 0.0, down_payment_pct, term_years)
+    prices = get_price_index(_backend).sorted_prices(city_geojson_code, yr)
+    return affordability_grid(prices, scenario)
 
 
 @st.cache_data
-def calculate_median_ratio_history(dataframe):
-    years = sorted(dataframe["year"].unique())
+@persistent_cache("median_ratio_history")
+def calculate_median_ratio_history(_backend, years):
     history_data = []
     for yr in years:
-        city_data_yr = make_city_view_data(dataframe, annual_income=0, year=yr, budget_pct=30)
+        city_data_yr = city_view_for_year(_backend, yr)
         if not city_data_yr.empty and RATIO_COL in city_data_yr.columns:
             median_ratio = city_data_yr[RATIO_COL].median()
             history_data.append({"year": yr, "median_ratio": median_ratio})
@@ -97,8 +398,8 @@ def calculate_median_ratio_history(dataframe):
 
 
 @st.cache_data
-def calculate_category_proportions_history(dataframe):
-    years = sorted(dataframe["year"].unique())
+@persistent_cache("category_proportions_history")
+def calculate_category_proportions_history(_backend, years):
     history_data = []
     
     def classify_strict(ratio):
@@ -117,7 +418,7 @@ def calculate_category_proportions_history(dataframe):
     ]
 
     for yr in years:
-        city_data_yr = make_city_view_data(dataframe, annual_income=0, year=yr, budget_pct=30)
+        city_data_yr = city_view_for_year(_backend, yr)
         if not city_data_yr.empty and RATIO_COL in city_data_yr.columns:
             city_data_yr["cat"] = city_data_yr[RATIO_COL].apply(classify_strict)
             counts = city_data_yr["cat"].value_counts(normalize=True) * 100
@@ -132,8 +433,9 @@ def calculate_category_proportions_history(dataframe):
 
 
 # ---------- Load data ----------
-df = get_data_cached()
-if df.empty:
+backend = get_data_backend()
+years = get_years(backend)
+if not years:
     st.error("Application cannot run. Base data (df) is empty.")
     st.stop()
 
@@ -148,14 +450,15 @@ if 'last_drawn_income' not in st.session_state:
 #   1. CALCULATION PRE-REQUISITES
 # =====================================================================
 
+# An income released on the client-side map (components/zip_map) is applied
+# here, before the income widgets are created.
+if "pending_map_income" in st.session_state:
+    pending_income = st.session_state.pop("pending_map_income")
+    st.session_state.income_manual_key = pending_income
+    st.session_state.income_slider_key = pending_income
+
 # Here, the income control panel logic is processed (session_state)
 final_income, persona = income_control_panel()
-max_affordable_price = AFFORDABILITY_THRESHOLD * final_income
-df_filtered_by_income = apply_income_filter(df, final_income)
-
-# Calculate historical data (but it's not displayed yet)
-df_history = calculate_median_ratio_history(df)
-df_prop_history = calculate_category_proportions_history(df)
 
 
 # --- Divider ---
@@ -173,10 +476,22 @@ st.markdown("### User Profile & Budget")
 with st.container():
     # Render Persona and Income Controls
     persona_income_slider(final_income, persona)
+    mortgage_scenario = mortgage_scenario_controls()
+    # Max price per dollar of income: the PTI threshold, or the mortgage scenario's equivalent.
+    if mortgage_scenario is None:
+        affordability_multiple = AFFORDABILITY_THRESHOLD
+        affordability_basis = "PTI thresholds"
+    else:
+        affordability_multiple = mortgage_scenario.price_multiple()
+        affordability_basis = (
+            f"{mortgage_scenario.budget_pct:.0f}% of income at {mortgage_scenario.rate_pct:g}%, "
+            f"{mortgage_scenario.down_payment_pct:.0f}% down, {mortgage_scenario.term_years}y"
+        )
+    max_affordable_price = affordability_multiple * final_income
     current_income = st.session_state.get("income_manual_key", final_income)
     current_persona = st.session_state.get("profile_radio_key", persona)
-    current_max_affordable = AFFORDABILITY_THRESHOLD * current_income
-    render_affordability_summary_card(current_income, current_persona, current_max_affordable)
+    current_max_affordable = affordability_multiple * current_income
+    render_affordability_summary_card(current_income, current_persona, current_max_affordable, affordability_basis)
 
 # Second Section: Year Selector and Explanation Below User Profile
 st.markdown("""
@@ -191,11 +506,84 @@ with st.container():
     """)
     
     # Render Year Selector below the explanation
-    selected_year = year_selector(df, key="year_main_selector")
+    selected_year = year_selector(years, key="year_main_selector")
+    year_playback = st.toggle(
+        f"Play through {min(years)}-{max(years)}",
+        key="year_playback_toggle",
+        help="Sends every year to the browser once; use the play button / slider under each chart.",
+    )
 
 # Default: Use the maximum year if none is selected
 if selected_year is None:
-    selected_year = df["year"].max()
+    selected_year = max(years)
+
+
+# =====================================================================
+#   2B. National Overview (hex bins; click a cell to open its metro below)
+# =====================================================================
+
+with st.expander("National overview: ZIP affordability across all metro areas"):
+    # st.expander still runs its body when collapsed, so nothing is aggregated,
+    # built or sent to the browser until the overview is switched on.
+    show_hex_overview = st.toggle("Show the national overview", key="hex_overview_toggle")
+    if show_hex_overview:
+        hex_col1, hex_col2 = st.columns(2)
+        with hex_col1:
+            hex_resolution = st.radio(
+                "Cell size", list(HEX_RESOLUTIONS.keys()), index=1, horizontal=True, key="hex_resolution"
+            )
+        with hex_col2:
+            hex_color_by = st.radio(
+                "Color by", ["Share of affordable ZIPs", "Median ZIP PTI"], horizontal=True, key="hex_color_by"
+            )
+
+        hex_overview = get_hex_overview()
+        zip_prices_all = get_zip_year_prices(backend)
+        hex_cells = hex_overview.aggregate(
+            zip_prices_all[zip_prices_all["year"] == selected_year], hex_resolution, max_affordable_price
+        )
+        hex_color_col = "affordable_share" if hex_color_by == "Share of affordable ZIPs" else "median_pti"
+
+        fig_hex = px.choropleth_mapbox(
+            hex_cells,
+            geojson=hex_overview.layers[hex_resolution]["geojson"],
+            locations="cell_id",
+            color=hex_color_col,
+            color_continuous_scale="RdYlGn" if hex_color_col == "affordable_share" else "RdYlGn_r",
+            range_color=[0, 1] if hex_color_col == "affordable_share" else None,
+            hover_name="top_metro",
+            hover_data={
+                "cell_id": False,
+                "zip_count": True,
+                "affordable_share": ":.0%",
+                "median_pti": ":.2f",
+            },
+            labels={
+                "zip_count": "ZIPs", "affordable_share": "Affordable ZIPs",
+                "median_pti": "Median ZIP PTI", "top_metro": "Metro",
+            },
+            mapbox_style="carto-positron",
+            center={"lat": 38.0, "lon": -96.0},
+            zoom=2.8,
+            opacity=0.75,
+            height=420,
+        )
+        fig_hex.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+        hex_event = st.plotly_chart(
+            fig_hex, use_container_width=True, on_select="rerun", selection_mode="points", key="hex_overview_chart"
+        )
+        st.caption(f"{len(hex_cells)} cells summarizing {int(hex_cells['zip_count'].sum()):,} ZIP codes. "
+                   "Click a cell to open its main metro area in the ZIP-level map.")
+
+        hex_points = hex_event.selection.points if hex_event else []
+        if hex_points:
+            hex_cell_id = hex_points[0].get("location")
+            if hex_cell_id != st.session_state.get("hex_drilled_cell"):
+                st.session_state.hex_drilled_cell = hex_cell_id
+                hex_metro = hex_cells.loc[hex_cells["cell_id"] == hex_cell_id, "top_metro"]
+                metro_names = get_metros(backend).set_index("city_geojson_code")["city_full"]
+                if not hex_metro.empty and hex_metro.iloc[0] in metro_names.index:
+                    st.session_state.map_metro_select = [metro_names[hex_metro.iloc[0]]]
 
 
 # =====================================================================
@@ -217,12 +605,7 @@ with main_col_left:
     with st.container(border=True):
         st.markdown("#### Metro Area Affordability Ranking")
 
-        city_data = make_city_view_data(
-            df, 
-            annual_income=final_income,
-            year=selected_year, 
-            budget_pct=30,
-        )
+        city_data = city_view_for_year(backend, selected_year)
 
         if city_data.empty:
             st.warning(f"No data available for {selected_year}.")
@@ -254,7 +637,7 @@ with main_col_left:
                 key="sort_bar_chart",
             )
             
-            plot_data = city_data[city_data["city"].isin(selected_clean_metros)].copy()
+            plot_data = city_data[city_data["city"].isin(selected_clean_metros)]
             
             if plot_data.empty:
                 st.warning("No cities match your current filter selection.")
@@ -269,65 +652,17 @@ with main_col_left:
                 else: 
                     sorted_data = plot_data.sort_values("city_full") 
 
-                # Color logic
-                sorted_data["afford_label"] = sorted_data["affordability_rating"].astype('category')
-                ordered_categories = list(AFFORDABILITY_CATEGORIES.keys())
-                if 'N/A' in sorted_data["afford_label"].unique():
-                    ordered_categories.append('N/A')
-                sorted_data["afford_label"] = pd.Categorical(
-                    sorted_data["afford_label"],
-                    categories=ordered_categories,
-                    ordered=True
-                )
-
                 if not sorted_data.empty:
-                    fig_city = px.bar(
-                        sorted_data,
-                        x="city",
-                        y=RATIO_COL,
-                        color="afford_label",
-                        color_discrete_map=AFFORDABILITY_COLORS,
-                        labels={
-                            "city": "City",
-                            RATIO_COL: "Price-to-income ratio",
-                            "afford_label": "Affordability Rating",
-                        },
-                        hover_data={
-                            "city_full": True,
-                            "Median Sale Price": ":,.0f",
-                            "Per Capita Income": ":,.0f",
-                            RATIO_COL: ":.2f",
-                            "afford_label": True,
-                        },
-                        height=520, 
-                    )
-                    
-                    # Threshold lines - add lines for all categories with upper bounds
-                    for i, (category, (lower, upper)) in enumerate(AFFORDABILITY_CATEGORIES.items()):
-                        if upper is not None:
-                            fig_city.add_hline(
-                                y=upper,
-                                line_dash="dot",
-                                line_color="gray",
-                                opacity=0.5
-                            )
+                    fig_city = metro_ranking_figure(sorted_data)
 
-                    fig_city.update_layout(
-                        yaxis_title="Price-to-income ratio",
-                        xaxis_tickangle=-45,
-                        margin=dict(l=20, r=20, t=80, b=80),
-                        bargap=0.05,
-                        bargroupgap=0.0,
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="right",
-                            x=1
-                        ),
-                    )
-
-                    st.plotly_chart(fig_city, use_container_width=True)
+                    if year_playback:
+                        city_views = get_city_views(backend)
+                        fig_city_anim = ranking_animation_figure(
+                            city_views[city_views["city"].isin(selected_clean_metros)]
+                        )
+                        st.plotly_chart(fig_city_anim, use_container_width=True)
+                    else:
+                        st.plotly_chart(fig_city, use_container_width=True)
 
 
 # ---------- 4B. Map + Snapshot ----------
@@ -347,33 +682,81 @@ with main_col_right:
             map_city_options_full = sorted(metro_display_map.keys())
             format_metro_func = lambda option: metro_display_map.get(option, option)
         else:
-            map_city_options_full = sorted(df["city_full"].unique())
+            map_city_options_full = sorted(get_metros(backend)["city_full"].unique())
             format_metro_func = lambda x: x
 
-        selected_map_metro_full = st.selectbox(
-            "Choose Metro Area for Map:",
+        # Drop selections that are not options this year (e.g. after a hex drill-down).
+        if "map_metro_select" in st.session_state:
+            st.session_state.map_metro_select = [
+                m for m in st.session_state.map_metro_select if m in map_city_options_full
+            ]
+        selected_map_metros_full = st.multiselect(
+            "Choose Metro Areas for Map (select several to compare):",
             options=map_city_options_full,
+            default=None if "map_metro_select" in st.session_state else map_city_options_full[:1],
             format_func=format_metro_func,
-            index=0,
+            max_selections=5,
             key="map_metro_select"
         )
+        selected_map_metro_full = ", ".join(selected_map_metros_full)
+        map_client_recolor = st.toggle(
+            "Recolor in the browser while dragging income",
+            value=True,
+            key="map_client_recolor",
+            help="The map gets its own income slider; colors update instantly and the rest of the page "
+                 "follows when you release it.",
+        )
 
-        city_clicked_df = df[df['city_full'] == selected_map_metro_full]
+        metros = get_metros(backend)
+        city_clicked_df = (
+            metros.set_index("city_full")
+            .reindex(selected_map_metros_full)
+            .dropna(subset=["city_geojson_code"])
+        )
         
         if city_clicked_df.empty:
-            st.warning("Selected metro area does not exist in the filtered data.")
+            if selected_map_metros_full:
+                st.warning("Selected metro area does not exist in the filtered data.")
+            city_codes = []
             city_clicked = None
         else:
-            geojson_code = city_clicked_df["city_geojson_code"].iloc[0]
-            city_clicked = geojson_code
+            # Map shows every selected metro; the per-metro stats below use the first one.
+            city_codes = city_clicked_df["city_geojson_code"].tolist()
+            city_clicked = city_codes[0]
 
    
         if city_clicked is None:
             st.info("Select a Metro Area from the dropdown above to view the ZIP-code map.")
+        elif year_playback:
+            st.markdown(f"**Map for {selected_map_metro_full} ({min(years)}-{max(years)})**")
+            st.markdown("""Red: unaffordable given user input; Green: affordable given user input.  """)
+            zip_rows_all = map_rows_for_metros(backend, city_codes)
+            zip_geojson = get_merged_geojson(tuple(sorted(city_codes)), backend.version())
+            if zip_rows_all.empty or zip_geojson is None:
+                st.error("No ZIP-level data or geometry available for this city.")
+            else:
+                st.plotly_chart(
+                    zip_map_animation_figure(zip_rows_all, zip_geojson, max_affordable_price),
+                    use_container_width=True,
+                )
+
+            city_history = get_city_history(backend, city_clicked)
+            if not city_history.empty:
+                fig_history = px.line(
+                    city_history,
+                    x="year",
+                    y="price_to_income_ratio_by_year",
+                    markers=True,
+                    labels={"year": "Year", "price_to_income_ratio_by_year": "Median ZIP PTI"},
+                    height=220,
+                )
+                fig_history.update_layout(margin=dict(l=0, r=0, t=10, b=0))
+                st.plotly_chart(fig_history, use_container_width=True)
         else:
             map_selection_changed = (selected_map_metro_full != st.session_state.last_drawn_city)
             income_changed = (final_income != st.session_state.last_drawn_income)
-            should_trigger_spinner = map_selection_changed or income_changed
+            # The client-side map has no server redraw to wait for.
+            should_trigger_spinner = (map_selection_changed or income_changed) and not map_client_recolor
 
             st.markdown(f"**Map for {selected_map_metro_full} ({selected_year})**")
             st.markdown("""Red: unaffordable given user input; Green: affordable given user input.  """)
@@ -389,17 +772,14 @@ with main_col_right:
                 )
                 time.sleep(0.5) 
 
-            # Load Map Data
-            df_zip = load_city_zip_data(city_clicked, df_full=df, max_pci=final_income)
-            
-            if "year" in df_zip.columns:
-                df_zip = df_zip[df_zip["year"] == selected_year].copy() 
+            # Load Map Data: one row per ZIP (and polygon) from the ZIP x year table.
+            # The concat is the only copy: the merged frame is annotated in place below.
+            df_zip_map = map_rows_for_metros(backend, city_codes, selected_year)
 
-            if df_zip.empty:
+            if df_zip_map.empty:
                 if should_trigger_spinner: loading_message_placeholder.empty()
                 st.error("No ZIP-level data available for this city/year.")
             else:
-                df_zip_map = get_zip_coordinates(df_zip) 
                 price_col = "median_sale_price"
                 income_col = "per_capita_income"
 
@@ -407,130 +787,63 @@ with main_col_right:
                     if should_trigger_spinner: loading_message_placeholder.empty()
                     st.error("Map data processing failed.")
                 else:
-                    if RATIO_COL not in df_zip_map.columns:
-                        denom_zip = df_zip_map[income_col].replace(0, np.nan)
-                        df_zip_map[RATIO_COL] = df_zip_map[price_col] / denom_zip
-                    
-                    df_zip_map["affordability_rating"] = df_zip_map[RATIO_COL].apply(classify_affordability)
-                    
-                    # Map Prices to Color
-                    min_price = df_zip_map[price_col].min()
-                    max_price = df_zip_map[price_col].max()
-                    
-                    affordable_mask = df_zip_map[price_col] < max_affordable_price
-                    unaffordable_mask = df_zip_map[price_col] >= max_affordable_price
-                    
-                    df_zip_map["color_value"] = np.nan
-                    
-                    if affordable_mask.any():
-                        affordable_prices = df_zip_map.loc[affordable_mask, price_col]
-                        if affordable_prices.min() < max_affordable_price:
-                            affordable_range = max_affordable_price - min_price
-                            if affordable_range > 0:
-                                df_zip_map.loc[affordable_mask, "color_value"] = (
-                                    0.5 * (affordable_prices - min_price) / affordable_range
-                                )
-                            else:
-                                df_zip_map.loc[affordable_mask, "color_value"] = 0.25
-                    
-                    if unaffordable_mask.any():
-                        unaffordable_prices = df_zip_map.loc[unaffordable_mask, price_col]
-                        if unaffordable_prices.max() >= max_affordable_price:
-                            unaffordable_range = max_price - max_affordable_price
-                            if unaffordable_range > 0:
-                                df_zip_map.loc[unaffordable_mask, "color_value"] = (
-                                    0.5 + 0.5 * (unaffordable_prices - max_affordable_price) / unaffordable_range
-                                )
-                            else:
-                                df_zip_map.loc[unaffordable_mask, "color_value"] = 0.75
-                    
-                    df_zip_map["color_value"] = df_zip_map["color_value"].clip(0, 1)
-
-                    geojson_path = os.path.join(
-                        os.path.dirname(__file__),
-                        "city_geojson",
-                        f"{city_clicked}.geojson", 
-                    )
+                    # PTI and rating come precomputed with the ZIP x year table.
+                    zip_geojson = get_merged_geojson(tuple(sorted(city_codes)), backend.version())
 
-                    if not os.path.exists(geojson_path):
+                    if zip_geojson is None:
+                        if should_trigger_spinner: loading_message_placeholder.empty()
+                        st.error(f"GeoJSON file not found for {', '.join(city_codes)}. "
+                                 f"Expected path: {geojson_path(city_clicked)}")
+                    elif map_client_recolor:
                         if should_trigger_spinner: loading_message_placeholder.empty()
-                        st.error(f"GeoJSON file not found for {city_clicked}. Expected path: {geojson_path}")
+                        map_event = zip_affordability_map(
+                            df_zip_map["zip_code_str"],
+                            df_zip_map[price_col],
+                            income=final_income,
+                            affordability_multiple=affordability_multiple,
+                            geometry_url=get_geometry_url(tuple(sorted(city_codes)), backend.version()),
+                            colorscale=ZIP_MAP_COLORSCALE,
+                            center={"lat": df_zip_map["lat"].mean(), "lon": df_zip_map["lon"].mean()},
+                            zoom=map_zoom(df_zip_map["lat"], df_zip_map["lon"]),
+                            price_trend=get_zip_price_trends(backend, df_zip_map, city_codes, selected_year),
+                            annual_payment=(
+                                payment_to_income(
+                                    df_zip_map[price_col], 1.0, mortgage_scenario.rate_pct,
+                                    mortgage_scenario.down_payment_pct, mortgage_scenario.term_years,
+                                )
+                                if mortgage_scenario is not None else None
+                            ),
+                            metro_labels=df_zip_map["map_metro"] if len(city_codes) > 1 else None,
+                            key="zip_client_map",
+                        )
+                        st.session_state.last_drawn_city = selected_map_metro_full
+                        st.session_state.last_drawn_income = final_income
+                        # Released slider -> apply the income app-wide on the next run.
+                        if map_event and map_event.get("seq") != st.session_state.get("map_income_seq"):
+                            st.session_state.map_income_seq = map_event["seq"]
+                            if int(map_event["income"]) != int(final_income):
+                                st.session_state.pending_map_income = int(map_event["income"])
+                                st.rerun()
                     else:
-                        with open(geojson_path, "r") as f:
-                            zip_geojson = json.load(f)
-
-                        df_zip_map["zip_str_padded"] = df_zip_map["zip_code_int"].astype(str).str.zfill(5)
-
-                        custom_colorscale = [
-                            [0.0, "rgb(0, 100, 0)"],      # Dark green (very affordable)
-                            [0.3, "rgb(34, 139, 34)"],   # Medium green
-                            [0.5, "rgb(144, 238, 144)"],  # Light green (at threshold)
-                            [0.5, "rgb(255, 182, 193)"],  # Light red (at threshold)
-                            [0.7, "rgb(220, 20, 60)"],   # Medium red
-                            [1.0, "rgb(139, 0, 0)"]       # Dark red (very unaffordable)
-                        ]
-                        
-                        fig_map = px.choropleth_mapbox(
+                        df_zip_map["price_trend_12m"] = get_zip_price_trends(backend, df_zip_map, city_codes, selected_year)
+                        if mortgage_scenario is not None:
+                            df_zip_map["payment_share"] = payment_to_income(
+                                df_zip_map[price_col], final_income, mortgage_scenario.rate_pct,
+                                mortgage_scenario.down_payment_pct, mortgage_scenario.term_years,
+                            )
+
+                        fig_map = zip_map_figure(
                             df_zip_map,
-                            geojson=zip_geojson,
-                            locations="zip_str_padded", 
-                            featureidkey="properties.ZCTA5CE10",
-                            color="color_value", 
-                            color_continuous_scale=custom_colorscale,
-                            range_color=[0, 1],
-                            hover_name="zip_code_str",
+                            zip_geojson,
+                            max_affordable_price,
+                            price_col=price_col,
                             hover_data={
-                                price_col: ":,.0f",
                                 # income_col: ":,.0f",
-                                "zip_str_padded":False,
-                                "color_value": False,
+                                "price_trend_12m": ":+.1%",
+                                "map_metro": len(city_codes) > 1,
+                                **({"payment_share": ":.0%"} if "payment_share" in df_zip_map.columns else {}),
                             },
-                            mapbox_style="carto-positron",
-                            center={
-                                "lat": df_zip_map["lat"].mean(),
-                                "lon": df_zip_map["lon"].mean(),
-                            },
-                            zoom=10,
-                            height=454,
-                        )
-    
-
-
-                        # Update colorbar with meaningful labels
-                        tick_vals = [0.0, 0.25, 0.5, 0.75, 1.0]
-                        tick_labels = []
-                        for tv in tick_vals:
-                            if tv <= 0.5:
-                                if affordable_mask.any() and min_price < max_affordable_price:
-                                    price_val = min_price + (tv / 0.5) * (max_affordable_price - min_price)
-                                else:
-                                    price_val = min_price
-                            else:
-                                if unaffordable_mask.any() and max_price > max_affordable_price:
-                                    price_val = max_affordable_price + ((tv - 0.5) / 0.5) * (max_price - max_affordable_price)
-                                else:
-                                    price_val = max_affordable_price
-                            tick_labels.append(f"${price_val:,.0f}")
-                        
-                        fig_map.update_layout(
-                            margin=dict(l=0, r=0, t=0, b=0),
-                            coloraxis_colorbar=dict(
-                                title="Median Sale Price",
-                                tickvals=tick_vals,
-                                ticktext=tick_labels,
-                            ),
-                        )
-
-                        # Add threshold annotation
-                        fig_map.add_annotation(
-                            text=f"Threshold: ${max_affordable_price:,.0f}",
-                            xref="paper", yref="paper",
-                            x=0.02, y=0.98,
-                            showarrow=False,
-                            bgcolor="rgba(255, 255, 255, 0.8)",
-                            bordercolor="black",
-                            borderwidth=1,
-                            font=dict(size=10)
+                            zoom=map_zoom(df_zip_map["lat"], df_zip_map["lon"]),
                         )
 
                         if should_trigger_spinner: loading_message_placeholder.empty() 
@@ -538,11 +851,131 @@ with main_col_right:
                         st.session_state.last_drawn_city = selected_map_metro_full 
                         st.session_state.last_drawn_income = final_income
 
+                    # ZIP history sparkline (O(1) slice from the time-series store)
+                    history_zip = st.selectbox(
+                        "ZIP price history",
+                        options=sorted(df_zip_map["zip_code_str"].unique()),
+                        key="zip_history_select",
+                    )
+                    history_metro = df_zip_map.loc[df_zip_map["zip_code_str"] == history_zip, "map_metro"].iloc[0]
+                    zip_history = get_zip_timeseries(backend, history_metro).frame(history_zip)
+                    if not zip_history.empty:
+                        fig_spark = px.line(
+                            zip_history,
+                            x="date",
+                            y="median_sale_price",
+                            labels={"date": "", "median_sale_price": "Median Sale Price"},
+                            height=160,
+                        )
+                        fig_spark.add_hline(y=max_affordable_price, line_dash="dot", line_color="gray")
+                        fig_spark.update_layout(margin=dict(l=0, r=0, t=10, b=0))
+                        st.plotly_chart(fig_spark, use_container_width=True)
+
+                    with st.expander(f"ZIP codes similar to {history_zip} that fit your budget"):
+                        similar_same_metro = st.checkbox("Same metro area only", key="similar_same_metro")
+                        similar = get_similar_zip_index(backend).similar(
+                            history_metro, history_zip, selected_year, max_price=max_affordable_price, k=10,
+                            same_metro=similar_same_metro,
+                        )
+                        if similar.empty:
+                            st.info("No similar ZIP codes under your budget for this year.")
+                        else:
+                            st.dataframe(
+                                similar[[
+                                    "zip_code_str", "city_geojson_code", "median_sale_price",
+                                    "per_capita_income", "pti", "pti_trend", "distance",
+                                ]].rename(columns={
+                                    "zip_code_str": "ZIP code", "city_geojson_code": "Metro",
+                                    "median_sale_price": "Median Sale Price", "per_capita_income": "Per Capita Income",
+                                    "pti": "PTI", "pti_trend": "PTI trend", "distance": "Distance",
+                                }),
+                                hide_index=True,
+                                use_container_width=True,
+                                column_config={
+                                    "Median Sale Price": st.column_config.NumberColumn(format="$%d"),
+                                    "Per Capita Income": st.column_config.NumberColumn(format="$%d"),
+                                    "PTI": st.column_config.NumberColumn(format="%.2f"),
+                                    "PTI trend": st.column_config.NumberColumn(format="%+.2f"),
+                                    "Distance": st.column_config.NumberColumn(format="%.2f"),
+                                },
+                            )
+                            st.caption("Matched on price level, income, PTI trend and ZIP land area "
+                                       "across every metro area; smaller distance = more similar.")
+
+        # ---------- ZIP affordability from the sorted price index ----------
+        if city_clicked is not None:
+            price_index = get_price_index(backend)
+            n_zips = price_index.zip_count(city_clicked, selected_year)
+            if n_zips and len(city_codes) > 1:
+                st.caption(f"ZIP statistics below are for {selected_map_metros_full[0]}.")
+            if n_zips:
+                n_affordable = price_index.count_affordable(city_clicked, selected_year, max_affordable_price)
+                income_for_median = price_index.income_for_median_zip(
+                    city_clicked, selected_year, multiple=affordability_multiple
+                )
+
+                stat_col1, stat_col2, stat_col3 = st.columns(3)
+                stat_col1.metric("Affordable ZIPs", f"{n_affordable} / {n_zips}")
+                stat_col2.metric("Share affordable", f"{n_affordable / n_zips:.0%}")
+                stat_col3.metric("Income to afford median ZIP", f"${income_for_median:,.0f}")
+
+                curve = price_index.affordability_curve(
+                    city_clicked, selected_year, np.arange(20000, 200001, 1000), multiple=affordability_multiple
+                )
+                fig_curve = px.line(
+                    curve,
+                    x="income",
+                    y="affordable_zips",
+                    labels={"income": "Annual income ($)", "affordable_zips": "Affordable ZIPs"},
+                    height=220,
+                )
+                fig_curve.add_vline(x=final_income, line_dash="dot", line_color="gray")
+                fig_curve.update_layout(margin=dict(l=0, r=0, t=10, b=0))
+                st.plotly_chart(fig_curve, use_container_width=True)
+
+                if mortgage_scenario is not None:
+                    with st.expander("Interest rate sensitivity"):
+                        scenario_grid = get_scenario_grid(
+                            backend, city_clicked, selected_year, mortgage_scenario.budget_pct,
+                            mortgage_scenario.down_payment_pct, mortgage_scenario.term_years,
+                        )
+                        share_matrix = scenario_grid.pivot(index="rate_pct", columns="income", values="affordable_share")
+                        fig_rates = px.imshow(
+                            share_matrix,
+                            origin="lower",
+                            aspect="auto",
+                            color_continuous_scale="RdYlGn",
+                            zmin=0,
+                            zmax=1,
+                            labels={"x": "Annual income ($)", "y": "Interest rate (%)", "color": "Affordable ZIPs"},
+                            height=300,
+                        )
+                        fig_rates.add_scatter(
+                            x=[final_income], y=[mortgage_scenario.rate_pct], mode="markers",
+                            marker=dict(color="black", size=10, symbol="x"), showlegend=False,
+                            hovertemplate="You: $%{x:,.0f} at %{y}%<extra></extra>",
+                        )
+                        fig_rates.update_layout(margin=dict(l=0, r=0, t=10, b=0))
+                        st.plotly_chart(fig_rates, use_container_width=True)
+                        st.caption("Share of this metro's ZIP codes whose mortgage payment fits your budget, "
+                                   "for every interest rate and income.")
+
+                with st.expander("Cheapest ZIP codes in this metro"):
+                    cheapest = price_index.cheapest(city_clicked, selected_year, n=10)
+                    cheapest["affordable"] = cheapest["median_sale_price"] < max_affordable_price
+                    st.dataframe(
+                        cheapest.rename(columns={
+                            "zip_code_str": "ZIP code", "median_sale_price": "Median Sale Price",
+                            "affordable": "Affordable",
+                        }),
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+
         if city_clicked is not None:
             if not city_data.empty:
-                city_row = city_data[city_data["city"] == city_clicked] 
-                if not city_row.empty:
-                    row = city_row.iloc[0]
+                city_rows = city_data.set_index("city").reindex(city_codes).dropna(subset=["city_full"])
+                for _, row in city_rows.iterrows():
                     st.markdown(f"#### Metro Area Snapshot: {row['city_full']} ({selected_year})")
                     st.markdown(
                         f"""
@@ -552,6 +985,264 @@ with main_col_right:
                     )
 
 
+# =====================================================================
+#   4C. Nationwide ZIP Search
+# =====================================================================
+
+st.markdown("---")
+st.markdown(f"### Nationwide ZIP Search ({selected_year})")
+st.markdown(f"ZIP codes in every metro area with a median sale price under your budget of **${max_affordable_price:,.0f}**.")
+
+search_col1, search_col2 = st.columns([1, 2])
+with search_col1:
+    search_n = st.number_input("Number of ZIP codes", min_value=5, max_value=200, value=20, step=5, key="national_search_n")
+with search_col2:
+    search_sort = st.radio(
+        "Rank by",
+        ["Cheapest", "Best PTI"],
+        horizontal=True,
+        key="national_search_sort",
+    )
+
+national_index = get_national_index(backend)
+n_affordable_national = national_index.count_affordable(selected_year, max_affordable_price)
+national_results = national_index.search(
+    selected_year,
+    max_affordable_price,
+    n=int(search_n),
+    sort_by="price" if search_sort == "Cheapest" else "pti",
+)
+
+if national_results.empty:
+    st.info("No ZIP codes nationwide fall under your budget for this year.")
+else:
+    st.caption(f"{n_affordable_national:,} ZIP codes nationwide are under your budget.")
+    metro_names = get_metros(backend).set_index("city_geojson_code")["city_full"]
+    national_results["city_full"] = national_results["city"].map(metro_names)
+    st.dataframe(
+        national_results[["zip_code_str", "city_full", "median_sale_price", "per_capita_income", "pti"]].rename(columns={
+            "zip_code_str": "ZIP code", "city_full": "Metro Area", "median_sale_price": "Median Sale Price",
+            "per_capita_income": "Per Capita Income", "pti": "PTI",
+        }),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Median Sale Price": st.column_config.NumberColumn(format="$%d"),
+            "Per Capita Income": st.column_config.NumberColumn(format="$%d"),
+            "PTI": st.column_config.NumberColumn(format="%.2f"),
+        },
+    )
+
+
+# =====================================================================
+#   4D. Export (streamed in chunks; nothing is encoded until requested)
+# =====================================================================
+
+with st.expander("Download the data behind this view"):
+    export_col1, export_col2 = st.columns([2, 1])
+    with export_col1:
+        export_kind = st.radio(
+            "Data",
+            ["Metro ranking", "ZIP table (map metros)", "Raw rows (filtered metros)"],
+            horizontal=True,
+            key="export_kind",
+        )
+    with export_col2:
+        export_fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+
+    export_request = (export_kind, export_fmt, selected_year, tuple(city_codes), final_income)
+    if st.button("Prepare download", key="export_prepare"):
+        if export_kind == "Metro ranking":
+            ranking = sorted_data if 'sorted_data' in locals() else city_data
+            export_chunks = iter_frame_chunks(ranking.drop(columns=["afford_label", "gap_for_plot"], errors="ignore"))
+            export_name = f"metro_ranking_{selected_year}"
+            export_api_paths = [f"/export/rankings.{export_fmt}?year={selected_year}"]
+        elif export_kind == "ZIP table (map metros)":
+            zip_table = map_rows_for_metros(backend, city_codes, selected_year)
+            export_chunks = iter_frame_chunks(zip_table)
+            export_name = f"zips_{'_'.join(city_codes)}_{selected_year}"
+            export_api_paths = [
+                f"/export/metros/{code}/zips.{export_fmt}?year={selected_year}&income={int(final_income)}"
+                for code in city_codes
+            ]
+        else:
+            export_metros = selected_clean_metros if 'selected_clean_metros' in locals() else None
+            export_chunks = backend.iter_rows(year=selected_year, city_codes=export_metros)
+            export_name = f"rows_{selected_year}"
+            export_api_paths = [
+                f"/export/rows.{export_fmt}?year={selected_year}"
+                + (f"&cities={','.join(export_metros)}" if export_metros else "")
+            ]
+
+        encode, _ = EXPORT_FORMATS[export_fmt]
+        try:
+            # Encoded chunk by chunk; download_button needs the finished bytes, so the size is capped.
+            st.session_state.export_file = encode_to_bytes(encode(export_chunks), max_bytes=UI_EXPORT_MAX_BYTES)
+            st.session_state.export_file_name = f"{export_name}.{export_fmt}"
+            st.session_state.export_request = export_request
+        except ExportTooLarge as e:
+            for key in ("export_file", "export_file_name", "export_request"):
+                st.session_state.pop(key, None)
+            st.warning(f"{e} Download it from the API server instead, which streams it in chunks:")
+            st.code("\n".join(f'curl -OJ "{API_BASE_URL}{path}"' for path in export_api_paths), language="bash")
+        except Exception as e:
+            for key in ("export_file", "export_file_name", "export_request"):
+                st.session_state.pop(key, None)
+            st.error(f"Could not prepare the download: {e}")
+
+    if st.session_state.get("export_request") == export_request:
+        try:
+            st.download_button(
+                f"Download {st.session_state.export_file_name}",
+                data=st.session_state.export_file,
+                file_name=st.session_state.export_file_name,
+                mime=EXPORT_FORMATS[export_fmt][1],
+                key="export_download",
+            )
+        except Exception as e:
+            # Don't keep a payload that will fail again on every rerun.
+            for key in ("export_file", "export_file_name", "export_request"):
+                st.session_state.pop(key, None)
+            st.error(f"Download failed: {e}")
+    st.caption(f"Downloads here are limited to {UI_EXPORT_MAX_BYTES >> 20} MB; larger exports stream "
+               f"from the API server's `/export/*` routes ({API_BASE_URL}).")
+
+
+# =====================================================================
+#   4E. ZIP Price Spread (precomputed histograms / quantiles)
+# =====================================================================
+
+with st.expander("ZIP price spread within each metro area"):
+    price_distributions = get_price_distributions(backend)
+    spread_view = st.radio(
+        "View", ["Quantile bands (all metros)", "Histogram (map metros)"], horizontal=True, key="price_spread_view"
+    )
+
+    if spread_view == "Quantile bands (all metros)":
+        bands = price_distributions.quantile_bands(selected_year, max_affordable_price).sort_values("q50")
+        if bands.empty:
+            st.info(f"No ZIP prices for {selected_year}.")
+        else:
+            # Dot = median ZIP; thick bar = middle 50% of ZIPs; thin bar = middle 80%.
+            bands["iqr_upper"] = bands["q75"] - bands["q50"]
+            bands["iqr_lower"] = bands["q50"] - bands["q25"]
+            fig_bands = px.scatter(
+                bands,
+                x="q50",
+                y="city",
+                error_x="iqr_upper",
+                error_x_minus="iqr_lower",
+                color="affordable_share",
+                color_continuous_scale="RdYlGn",
+                range_color=[0, 1],
+                log_x=True,
+                hover_data={
+                    "q10": ":,.0f", "q90": ":,.0f", "zip_count": True, "affordable_share": ":.0%",
+                    "iqr_upper": False, "iqr_lower": False,
+                },
+                labels={"q50": "Median ZIP sale price", "city": "", "affordable_share": "ZIPs under budget"},
+                height=max(320, 22 * len(bands)),
+            )
+            fig_bands.update_traces(error_x=dict(thickness=6, width=0))
+            fig_bands.add_scatter(
+                x=np.column_stack([bands["q10"], bands["q90"], np.full(len(bands), np.nan)]).ravel(),
+                y=np.repeat(bands["city"].to_numpy(), 3),
+                mode="lines", line=dict(color="lightgray", width=1), hoverinfo="skip", showlegend=False,
+            )
+            fig_bands.add_vline(x=max_affordable_price, line_dash="dot", line_color="black",
+                                annotation_text=f"Your budget ${max_affordable_price:,.0f}")
+            fig_bands.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+            st.plotly_chart(fig_bands, use_container_width=True)
+    elif not city_codes:
+        st.info("Select a metro area for the map to see its ZIP price histogram.")
+    else:
+        hist = pd.concat(
+            [price_distributions.histogram(code, selected_year, max_affordable_price).assign(city=code)
+             for code in city_codes],
+            ignore_index=True,
+        )
+        # Bins are log-spaced, so bars are drawn on a log10 price axis with equal widths.
+        hist["log_price"] = np.log10(hist["bin_mid"].astype(float))
+        bin_edges = price_distributions.edges
+        tick_prices = np.array([50e3, 100e3, 200e3, 500e3, 1e6, 2e6, 5e6])
+        fig_hist = px.bar(
+            hist,
+            x="log_price",
+            y="zip_count",
+            color="position" if len(city_codes) == 1 else "city",
+            color_discrete_map={"Under budget": "#4CAF50", "Straddles budget": "#FFC107", "Over budget": "#E57373"},
+            barmode="overlay",
+            opacity=0.8,
+            hover_data={"bin_lo": ":,.0f", "bin_hi": ":,.0f", "log_price": False},
+            labels={"log_price": "ZIP median sale price", "zip_count": "ZIPs", "position": "", "city": "Metro"},
+            height=320,
+        )
+        fig_hist.update_traces(width=np.log10(bin_edges[1] / bin_edges[0]))
+        fig_hist.add_vline(x=np.log10(max(max_affordable_price, 1.0)), line_dash="dot", line_color="black",
+                           annotation_text=f"Your budget ${max_affordable_price:,.0f}")
+        fig_hist.update_layout(
+            margin=dict(l=0, r=0, t=30, b=0),
+            xaxis=dict(tickvals=np.log10(tick_prices), ticktext=[f"${p / 1e6:g}M" if p >= 1e6 else f"${p / 1e3:g}k" for p in tick_prices]),
+        )
+        st.plotly_chart(fig_hist, use_container_width=True)
+
+
+# =====================================================================
+#   4F. Affordability Trends (precomputed YoY / multi-year changes)
+# =====================================================================
+
+with st.expander(f"Where is affordability changing fastest? (periods ending {selected_year})"):
+    change_rankings = get_change_rankings(backend)
+    trend_col1, trend_col2, trend_col3 = st.columns([2, 2, 1])
+    with trend_col1:
+        trend_level = st.radio("Compare", list(change_rankings), horizontal=True, key="trend_level")
+    rankings = change_rankings[trend_level]
+    trend_horizons = rankings.horizons(selected_year)
+    if not trend_horizons:
+        st.info(f"No earlier years to compare {selected_year} with.")
+    else:
+        with trend_col2:
+            trend_horizon = st.radio(
+                "Over", trend_horizons, format_func=lambda h: f"{h} year" + ("s" if h > 1 else ""),
+                horizontal=True, key="trend_horizon",
+            )
+        with trend_col3:
+            trend_n = st.number_input("Show", min_value=5, max_value=50, value=10, step=5, key="trend_n")
+
+        if trend_level == "Metro areas":
+            label_cols = {"city_full": "Metro Area"}
+        else:
+            label_cols = {"zip_code_str": "ZIP code", "city_geojson_code": "Metro"}
+        trend_columns = {
+            **label_cols,
+            "pti": "PTI", "pti_delta": "PTI change",
+            "price_growth": "Price growth", "income_growth": "Income growth",
+        }
+        trend_format = {
+            "PTI": st.column_config.NumberColumn(format="%.2f"),
+            "PTI change": st.column_config.NumberColumn(format="%+.2f"),
+            "Price growth": st.column_config.NumberColumn(format="%+.1f%%"),
+            "Income growth": st.column_config.NumberColumn(format="%+.1f%%"),
+        }
+        worse_col, better_col = st.columns(2)
+        for col, worsening, title in (
+            (worse_col, True, "Fastest worsening"),
+            (better_col, False, "Fastest improving"),
+        ):
+            with col:
+                st.markdown(f"**{title}**")
+                ranked = rankings.rank(selected_year, trend_horizon, n=int(trend_n), worsening=worsening)
+                ranked = ranked.assign(
+                    price_growth=ranked["price_growth"] * 100, income_growth=ranked["income_growth"] * 100
+                )
+                st.dataframe(
+                    ranked[list(trend_columns)].rename(columns=trend_columns),
+                    hide_index=True,
+                    use_container_width=True,
+                    column_config=trend_format,
+                )
+
+
 # =====================================================================
 #   5. Advanced Metro Area Comparisons by Affordability Category
 # =====================================================================
@@ -569,44 +1260,54 @@ with st.expander("Show breakdown by Affordability Rating"):
             "Severely Unaffordable",
             "Impossibly Unaffordable"
         ]
-
-        for cat in categories_to_plot:
-            cat_data = sorted_data[sorted_data["affordability_rating"] == cat].copy()
-            
-            st.markdown(f"**{cat}**")
-            
-            if cat_data.empty:
-                st.info(f"No cities in the current selection fall into the '{cat}' category.")
-            else:
-                cat_data = cat_data.sort_values(RATIO_COL, ascending=True)
-                
-                fig_cat = px.bar(
-                    cat_data,
-                    x="city",
-                    y=RATIO_COL,
-                    color="affordability_rating",
-                    color_discrete_map=AFFORDABILITY_COLORS,
-                    labels={"city": "City", RATIO_COL: "Price-to-income ratio"},
-                    hover_data={
-                        "city_full": True, 
-                        "Median Sale Price": ":,.0f", 
-                        RATIO_COL: ":.2f",
-                        "affordability_rating": False
-                    },
-                    height=300,
-                )
-                
-                fig_cat.update_layout(
-                    xaxis_tickangle=-45, 
-                    bargap=0.2,
-                    showlegend=False,
-                    margin=dict(l=0, r=0, t=0, b=0)
-                )
-                st.plotly_chart(fig_cat, use_container_width=True)
-            
-            st.markdown(
-                "<hr style='margin: 10px 0; border: none; border-top: 1px dashed #eee;'>",
-                unsafe_allow_html=True
+        present = [cat for cat in categories_to_plot if (sorted_data["affordability_rating"] == cat).any()]
+        missing = [cat for cat in categories_to_plot if cat not in present]
+
+        # One faceted figure (one row per category) instead of a chart per category.
+        cat_data = sorted_data[sorted_data["affordability_rating"].isin(present)].sort_values(RATIO_COL)
+        if present:
+            fig_cat = px.bar(
+                cat_data,
+                x="city",
+                y=RATIO_COL,
+                color="affordability_rating",
+                facet_row="affordability_rating",
+                category_orders={"affordability_rating": present},
+                color_discrete_map=AFFORDABILITY_COLORS,
+                labels={"city": "City", RATIO_COL: "PTI"},
+                hover_data={
+                    "city_full": True, 
+                    "Median Sale Price": ":,.0f", 
+                    RATIO_COL: ":.2f",
+                },
+                facet_row_spacing=0.08,
+                height=300 * len(present),
             )
+            fig_cat.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+            fig_cat.update_xaxes(matches=None, showticklabels=True, tickangle=-45)
+            fig_cat.update_layout(
+                bargap=0.2,
+                showlegend=False,
+                margin=dict(l=0, r=0, t=30, b=0)
+            )
+            st.plotly_chart(fig_cat, use_container_width=True)
+
+        for cat in missing:
+            st.caption(f"No cities in the current selection fall into the '{cat}' category.")
     else:
         st.info("No data available to show advanced city comparisons based on current filters.")
+
+
+# =====================================================================
+#   6. Deferred work + cold-start timings
+# =====================================================================
+
+# Calculate historical data (but it's not displayed yet). Done after the page
+# has rendered so it never delays the first paint.
+df_history = calculate_median_ratio_history(backend, tuple(years))
+df_prop_history = calculate_category_proportions_history(backend, tuple(years))
+
+record_timing("first_render_since_process_start", time.perf_counter() - PROCESS_T0)
+record_timing("first_script_run", time.perf_counter() - _SCRIPT_T0)
+
+finish_rerun_profile(st.session_state, metro=city_codes, year=selected_year, income=final_income)
@@ -0,0 +1,166 @@
+# artifacts.py
+# Offline build + loader for precomputed per-metro artifacts.
+#
+#     python artifacts.py            # build for every metro (process pool)
+#     python artifacts.py --workers 4
+#
+# Layout (one directory per artifact format version x dataset version):
+#     artifacts/v2-<dataset_version>/
+#         manifest.json
+#         city_view.parquet              make_city_view_all_years()
+#         metros/<CODE>/history.parquet      make_city_history()
+#         metros/<CODE>/geometry.json        city_geojson/<CODE>.geojson, trimmed to ZIPs with prices
+#
+# ZIP rows and centroids are not stored here: the map reads the ZIP x year
+# table (zip_module.ZipYearTable), which is cheap to build from the backend.
+#
+# Artifacts are built from the local CSV, so the directory is keyed on its
+# dataset_version(), which is also the pandas backend's version(). The app
+# passes its backend's version() to the loaders: a backend over other data
+# (e.g. a warehouse table) finds no matching directory and computes
+# everything lazily instead.
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+from dataprep import load_data, make_city_view_all_years, make_city_history, dataset_version, enable_copy_on_write
+
+ARTIFACT_FORMAT_VERSION = 2
+ARTIFACT_ROOT = os.path.join(os.path.dirname(__file__), "artifacts")
+GEOJSON_DIR = os.path.join(os.path.dirname(__file__), "city_geojson")
+
+
+def geojson_path(city_geojson_code: str) -> str:
+    return os.path.join(GEOJSON_DIR, f"{city_geojson_code}.geojson")
+
+
+def artifact_dir(root: str = ARTIFACT_ROOT, version: Optional[str] = None) -> str:
+    """Directory holding the artifacts for the current (or given) dataset version."""
+    version = version or dataset_version()
+    return os.path.join(root, f"v{ARTIFACT_FORMAT_VERSION}-{version}")
+
+
+def _metro_dir(base: str, city_geojson_code: str) -> str:
+    return os.path.join(base, "metros", city_geojson_code)
+
+
+# --- Build ---
+def _build_metro(city_geojson_code: str, df_metro: pd.DataFrame, base: str) -> dict:
+    """Worker: builds and writes every artifact for one metro."""
+    t0 = time.perf_counter()
+    out_dir = _metro_dir(base, city_geojson_code)
+    os.makedirs(out_dir, exist_ok=True)
+
+    history = make_city_history(df_metro, city_geojson_code)
+    history.to_parquet(os.path.join(out_dir, "history.parquet"), index=False)
+
+    n_features = 0
+    src = geojson_path(city_geojson_code)
+    if os.path.exists(src):
+        with open(src, "r") as f:
+            geo = json.load(f)
+        priced = df_metro.loc[df_metro["median_sale_price"].notna(), "zipcode"]
+        data_zips = set(priced.astype(str).str.zfill(5))
+        geo["features"] = [
+            feat for feat in geo["features"]
+            if feat["properties"].get("ZCTA5CE10") in data_zips
+        ]
+        n_features = len(geo["features"])
+        with open(os.path.join(out_dir, "geometry.json"), "w") as f:
+            json.dump(geo, f, separators=(",", ":"))
+
+    return {
+        "city": city_geojson_code,
+        "features": n_features,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def build_artifacts(df: pd.DataFrame, root: str = ARTIFACT_ROOT, workers: Optional[int] = None,
+                    version: Optional[str] = None) -> str:
+    """Builds all artifacts for df (by default the local CSV's version); returns the artifact directory."""
+    version = version or dataset_version()
+    base = artifact_dir(root, version)
+    os.makedirs(base, exist_ok=True)
+
+    codes = sorted(df["city_geojson_code"].dropna().unique())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_build_metro, code, df[df["city_geojson_code"] == code], base)
+            for code in codes
+        ]
+        # City-level views are cheap; build them here while the pool works.
+        city_view = make_city_view_all_years(df)
+        city_view.to_parquet(os.path.join(base, "city_view.parquet"), index=False)
+        metros = [f.result() for f in futures]
+
+    # The manifest is written last: its presence marks a complete build.
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "dataset_version": version,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metros": metros,
+    }
+    with open(os.path.join(base, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return base
+
+
+# --- Load ---
+def artifacts_available(root: str = ARTIFACT_ROOT, version: Optional[str] = None) -> bool:
+    """True when a complete build exists for `version` (default: the local CSV)."""
+    return os.path.exists(os.path.join(artifact_dir(root, version), "manifest.json"))
+
+
+def load_city_view_artifact(root: str = ARTIFACT_ROOT, version: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """make_city_view_all_years() output (city view for every year, with a 'year' column), or None."""
+    if not artifacts_available(root, version):
+        return None
+    return pd.read_parquet(os.path.join(artifact_dir(root, version), "city_view.parquet"))
+
+
+def load_metro_artifact(city_geojson_code: str, root: str = ARTIFACT_ROOT,
+                        version: Optional[str] = None) -> Optional[dict]:
+    """
+    Precomputed artifacts for one metro, or None if none were built for `version`:
+    {"history": DataFrame, "geojson": dict | None}
+    """
+    if not artifacts_available(root, version):
+        return None
+    metro_dir = _metro_dir(artifact_dir(root, version), city_geojson_code)
+    history_path = os.path.join(metro_dir, "history.parquet")
+    if not os.path.exists(history_path):
+        return None
+
+    geometry_path = os.path.join(metro_dir, "geometry.json")
+    geojson = None
+    if os.path.exists(geometry_path):
+        with open(geometry_path, "r") as f:
+            geojson = json.load(f)
+
+    return {
+        "history": pd.read_parquet(history_path),
+        "geojson": geojson,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build precomputed per-metro artifacts")
+    parser.add_argument("--root", default=ARTIFACT_ROOT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    enable_copy_on_write()
+
+    t0 = time.perf_counter()
+    df = load_data()
+    if df.empty:
+        raise SystemExit("Base data is empty; cannot build artifacts.")
+
+    out = build_artifacts(df, root=args.root, workers=args.workers)
+    print(f"Built artifacts in {out} in {time.perf_counter() - t0:.1f}s")
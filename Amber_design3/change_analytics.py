@@ -0,0 +1,110 @@
+# change_analytics.py
+# Year-over-year and multi-year affordability changes per ZIP and per metro.
+#
+# change_table() lays each measure out as a dense (entity, year) array and
+# computes every horizon with one shifted array division, so all ZIPs and
+# years are done in a single vectorized pass over the year-level aggregates.
+# ChangeRankings then sorts the table once by (horizon, year, PTI delta):
+# "fastest worsening / improving" is a slice from either end.
+
+import numpy as np
+import pandas as pd
+
+from dataprep import RATIO_COL
+
+HORIZONS = (1, 3, 5)
+CHANGE_COLS = ["price_growth", "income_growth", "pti_delta"]
+
+
+def change_table(levels: pd.DataFrame, key_cols: list, horizons=HORIZONS) -> pd.DataFrame:
+    """
+    levels: one row per entity/year with key_cols, 'year', 'price', 'income', 'pti'.
+    Returns one row per entity/end-year/horizon with the end-year levels and
+    price_growth, income_growth (fractions) and pti_delta (PTI points).
+    """
+    entity_id, entities = pd.factorize(pd.MultiIndex.from_frame(levels[key_cols]))
+    years = np.arange(levels["year"].min(), levels["year"].max() + 1) if len(levels) else np.array([], dtype=int)
+    year_pos = levels["year"].to_numpy() - (years[0] if len(years) else 0)
+
+    def dense(col):
+        out = np.full((len(entities), len(years)), np.nan)
+        out[entity_id, year_pos] = levels[col].to_numpy(np.float64)
+        return out
+
+    price, income, pti = dense("price"), dense("income"), dense("pti")
+    entity_keys = entities.to_frame(index=False, name=key_cols)
+
+    frames = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for h in horizons:
+            if h >= len(years):
+                continue
+            price_growth = price[:, h:] / price[:, :-h] - 1.0
+            income_growth = income[:, h:] / income[:, :-h] - 1.0
+            pti_delta = pti[:, h:] - pti[:, :-h]
+            rows, cols = np.nonzero(np.isfinite(pti_delta))
+            frame = entity_keys.iloc[rows].reset_index(drop=True)
+            frame["year"] = years[h:][cols]
+            frame["horizon"] = h
+            frame["price"] = price[:, h:][rows, cols]
+            frame["pti"] = pti[:, h:][rows, cols]
+            frame["price_growth"] = price_growth[rows, cols]
+            frame["income_growth"] = income_growth[rows, cols]
+            frame["pti_delta"] = pti_delta[rows, cols]
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=[*key_cols, "year", "horizon", "price", "pti", *CHANGE_COLS])
+    return pd.concat(frames, ignore_index=True)
+
+
+def zip_change_table(zip_prices: pd.DataFrame) -> pd.DataFrame:
+    """change_table() over zip_year_prices() rows (PTI = price / per capita income, as on the map)."""
+    levels = pd.DataFrame({
+        "city_geojson_code": zip_prices["city_geojson_code"].to_numpy(),
+        "zip_code_str": zip_prices["zipcode"].astype(str).str.zfill(5).to_numpy(),
+        "year": zip_prices["year"].astype(int).to_numpy(),
+        "price": zip_prices["median_sale_price"].to_numpy(np.float64),
+        "income": zip_prices["per_capita_income"].to_numpy(np.float64),
+    })
+    levels["pti"] = levels["price"] / levels["income"].replace(0, np.nan)
+    return change_table(levels, ["city_geojson_code", "zip_code_str"])
+
+
+def metro_change_table(city_views: pd.DataFrame) -> pd.DataFrame:
+    """change_table() over the per-year city views (PTI = RATIO_COL, as on the bar chart)."""
+    levels = pd.DataFrame({
+        "city": city_views["city"].to_numpy(),
+        "city_full": city_views["city_full"].to_numpy(),
+        "year": city_views["year"].astype(int).to_numpy(),
+        "price": city_views["Median Sale Price"].to_numpy(np.float64),
+        "income": city_views["Per Capita Income"].to_numpy(np.float64),
+        "pti": city_views[RATIO_COL].to_numpy(np.float64),
+    })
+    return change_table(levels, ["city", "city_full"])
+
+
+class ChangeRankings:
+    """A change table sorted by (horizon, year, pti_delta) with slice lookups."""
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table.sort_values(["horizon", "year", "pti_delta"], ignore_index=True)
+        keys = self.table[["horizon", "year"]]
+        is_start = (keys != keys.shift()).any(axis=1).to_numpy()
+        starts = np.flatnonzero(is_start)
+        ends = np.append(starts[1:], len(self.table))
+        self.slices = {
+            (int(h), int(y)): (int(s), int(e))
+            for h, y, s, e in zip(
+                self.table["horizon"].to_numpy()[starts], self.table["year"].to_numpy()[starts], starts, ends
+            )
+        }
+
+    def horizons(self, year: int) -> list:
+        return sorted(h for h, y in self.slices if y == int(year))
+
+    def rank(self, year: int, horizon: int, n: int = 10, worsening: bool = True) -> pd.DataFrame:
+        """Largest PTI increases (worsening) or decreases (improving) ending in `year`."""
+        start, end = self.slices.get((int(horizon), int(year)), (0, 0))
+        if worsening:
+            return self.table.iloc[max(start, end - n):end][::-1].reset_index(drop=True)
+        return self.table.iloc[start:min(end, start + n)].reset_index(drop=True)
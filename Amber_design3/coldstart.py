@@ -0,0 +1,85 @@
+# coldstart.py
+# Cold-start helpers: lazy imports and startup timings.
+#
+# Heavy modules (plotly.express, plotly.io) are imported on first attribute
+# access instead of at module top. Import and first-render timings are
+# logged once per process under the "house_browse.coldstart" logger and
+# can be dumped to JSON by warmup.py.
+
+import importlib
+import json
+import logging
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+PROCESS_T0 = time.perf_counter()
+
+logger = logging.getLogger("house_browse.coldstart")
+
+_timings = {}
+_lock = threading.Lock()
+
+
+def record_timing(name: str, seconds: float, once: bool = True) -> bool:
+    """Records a timing (first value wins when once=True); returns True if recorded."""
+    with _lock:
+        if once and name in _timings:
+            return False
+        _timings[name] = round(seconds, 4)
+    logger.info("%s: %.1f ms", name, seconds * 1000)
+    return True
+
+
+def timings() -> dict:
+    with _lock:
+        return dict(_timings)
+
+
+@contextmanager
+def timed(name: str, once: bool = True):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - t0, once=once)
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str, on_load=None):
+        super().__init__(name)
+        self._module = None
+        self._on_load = on_load
+
+    def _load(self):
+        if self._module is None:
+            with timed(f"import:{self.__name__}"):
+                self._module = importlib.import_module(self.__name__)
+            if self._on_load is not None:
+                self._on_load(self._module)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_module(name: str, on_load=None):
+    """
+    The module itself if it is already imported, else a LazyModule proxy.
+    on_load(module) runs once the real module is imported (immediately if it already is).
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        return LazyModule(name, on_load)
+    if on_load is not None:
+        on_load(module)
+    return module
+
+
+def write_report(path: str):
+    with open(path, "w") as f:
+        json.dump(timings(), f, indent=2)
@@ -0,0 +1,2 @@
+# components/
+# Custom Streamlit components (static frontends, no build step).
@@ -0,0 +1,125 @@
+# components/zip_map/__init__.py
+# ZIP affordability map that recolors in the browser.
+#
+# The frontend (frontend/index.html) gets the ZIP prices once per metro/year
+# and loads the geometry from a static file next to it (cached by the
+# browser). Dragging its income slider recomputes the green/red ramp, the
+# colorbar and the threshold label client-side; the new income is sent back
+# to Python only when the slider is released, as {"income": ..., "seq": ...}.
+#
+# The component is served from a writable copy of frontend/ under
+# HOUSE_ZIP_MAP_DIR (default: <tmp>/house_browse_zip_map), so geometry files
+# can sit next to index.html without writing into the package:
+#     <HOUSE_ZIP_MAP_DIR>/index.html
+#     <HOUSE_ZIP_MAP_DIR>/geo/<content hash>.json
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import streamlit.components.v1 as components
+
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "frontend")
+SERVE_DIR = os.environ.get(
+    "HOUSE_ZIP_MAP_DIR", os.path.join(tempfile.gettempdir(), "house_browse_zip_map")
+)
+GEOMETRY_DIR = os.path.join(SERVE_DIR, "geo")
+
+
+def _install_frontend() -> str:
+    """Copies frontend/ into SERVE_DIR (atomically per file); returns SERVE_DIR."""
+    os.makedirs(GEOMETRY_DIR, exist_ok=True)
+    for name in os.listdir(FRONTEND_DIR):
+        src = os.path.join(FRONTEND_DIR, name)
+        if os.path.isfile(src):
+            tmp_path = os.path.join(SERVE_DIR, f"{name}.{os.getpid()}.tmp")
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, os.path.join(SERVE_DIR, name))
+    return SERVE_DIR
+
+
+_component = components.declare_component("zip_affordability_map", path=_install_frontend())
+
+
+def _to_json_bytes(obj) -> bytes:
+    try:
+        import orjson
+
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    except ImportError:
+        return json.dumps(obj, separators=(",", ":"), default=lambda a: a.tolist()).encode("utf-8")
+
+
+def geometry_file(geojson: dict) -> str:
+    """
+    Writes the geometry next to the served index.html, named by a hash of its
+    content (so changed shapes get a new URL), and returns that URL.
+    """
+    body = _to_json_bytes(geojson)
+    name = hashlib.sha1(body).hexdigest()[:16] + ".json"
+    path = os.path.join(GEOMETRY_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(GEOMETRY_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    return f"geo/{name}"
+
+
+def _clean(values, digits: int) -> list:
+    """JSON-safe list (NaN -> None)."""
+    arr = np.round(np.asarray(values, dtype=np.float64), digits)
+    return [None if np.isnan(v) else float(v) for v in arr]
+
+
+def zip_affordability_map(
+    zip_codes,
+    prices,
+    income: float,
+    affordability_multiple: float,
+    geometry_url: str,
+    colorscale: list,
+    center: dict,
+    zoom: float,
+    price_trend=None,
+    annual_payment=None,
+    metro_labels=None,
+    income_range=(20000, 200000),
+    income_step: int = 1000,
+    height: int = 454,
+    key=None,
+):
+    """
+    Renders the map; returns the last released {"income", "seq"} or None.
+    annual_payment (optional) is each ZIP's yearly mortgage payment, shown
+    as a share of the live income.
+    """
+    data = {
+        "zips": [str(z) for z in zip_codes],
+        "prices": _clean(prices, 0),
+        "trend": _clean(price_trend, 4) if price_trend is not None else None,
+        "annual_payment": _clean(annual_payment, 0) if annual_payment is not None else None,
+        "metros": [str(m) for m in metro_labels] if metro_labels is not None else None,
+        "multiple": float(affordability_multiple),
+        "geometry_url": geometry_url,
+    }
+    # The frontend redraws only when this digest changes; income alone just recolors.
+    data_key = hashlib.sha1(_to_json_bytes(data)).hexdigest()
+    return _component(
+        **data,
+        data_key=data_key,
+        income=float(income),
+        colorscale=colorscale,
+        center=center,
+        zoom=float(zoom),
+        income_min=int(income_range[0]),
+        income_max=int(income_range[1]),
+        income_step=int(income_step),
+        height=int(height),
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,481 @@
+# data_backend.py
+# Pluggable data backends for the app's views.
+#
+# PandasBackend   - the original path: whole CSV in memory (load_data()).
+# DatabricksBackend - pushes the metro/year filters and medians down to the
+#                     SQL warehouse declared in app.yaml (DATABRICKS_WAREHOUSE_ID).
+# SQLiteBackend   - local stand-in with the same SQL, for testing/offline use.
+# DuckDBBackend   - the same SQL run in-process by DuckDB over a Parquet copy of
+#                   the dataset: lazy scans with projection/predicate pushdown,
+#                   executed on all cores.
+#
+# Selected with HOUSE_DATA_BACKEND=pandas|databricks|sqlite|duckdb (default: pandas).
+
+import hashlib
+import os
+import re
+import sqlite3
+import statistics
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from dataprep import (
+    dataset_version,
+    local_csv_path,
+    load_data,
+    make_city_view_data,
+    make_city_view_all_years,
+    make_city_history,
+    finalize_city_view,
+)
+from zip_module import load_city_zip_data, add_zip_code_columns
+from price_index import zip_year_prices
+from export import CHUNK_ROWS, row_index, iter_frame_chunks
+
+TABLE_NAME = "workspace.data511.house_ts"
+SQLITE_TABLE_NAME = "house_ts"
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), "house_ts.sqlite")
+DEFAULT_PARQUET_PATH = os.path.join(os.path.dirname(__file__), "house_ts.parquet")
+
+# CSV header variants -> the column names every backend queries.
+CSV_RENAMES = {
+    "Median Sale Price": "median_sale_price",
+    "Per Capita Income": "per_capita_income",
+}
+
+
+class DataBackend:
+    """Interface every backend implements. All methods return small, view-sized frames."""
+
+    name = "base"
+
+    def version(self) -> str:
+        """Fingerprint of the underlying data; changes whenever the data does."""
+        raise NotImplementedError
+
+    def years(self) -> list:
+        raise NotImplementedError
+
+    def metros(self) -> pd.DataFrame:
+        """One row per metro: city_geojson_code, city_full."""
+        raise NotImplementedError
+
+    def city_view(self, year: int) -> pd.DataFrame:
+        """Same shape as dataprep.make_city_view_data()."""
+        raise NotImplementedError
+
+    def city_views(self) -> pd.DataFrame:
+        """city_view() for every year at once, with a 'year' column."""
+        raise NotImplementedError
+
+    def city_history(self, city_geojson_code: str) -> pd.DataFrame:
+        """Same shape as dataprep.make_city_history()."""
+        raise NotImplementedError
+
+    def zip_rows(self, city_geojson_code: str, year: Optional[int] = None) -> pd.DataFrame:
+        """Monthly ZIP rows for one metro (and year), like zip_module.load_city_zip_data()."""
+        raise NotImplementedError
+
+    def zip_year_prices(self) -> pd.DataFrame:
+        """Median sale price and income per metro/ZIP/year (feeds price_index / national_search)."""
+        raise NotImplementedError
+
+    def iter_rows(self, year: Optional[int] = None, city_codes=None,
+                  chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """Raw rows matching the view filters, in chunks (feeds export.py)."""
+        raise NotImplementedError
+
+
+# --- In-memory pandas (original behaviour) ---
+class PandasBackend(DataBackend):
+    name = "pandas"
+
+    def __init__(self, df: Optional[pd.DataFrame] = None):
+        self.df = load_data() if df is None else df
+
+    def version(self) -> str:
+        return dataset_version()
+
+    def years(self) -> list:
+        return sorted(int(y) for y in self.df["year"].unique())
+
+    def metros(self) -> pd.DataFrame:
+        return (
+            self.df[["city_geojson_code", "city_full"]]
+            .drop_duplicates("city_geojson_code")
+            .sort_values("city_full", ignore_index=True)
+        )
+
+    def city_view(self, year: int) -> pd.DataFrame:
+        return make_city_view_data(self.df, annual_income=0, year=year, budget_pct=30)
+
+    def city_views(self) -> pd.DataFrame:
+        return make_city_view_all_years(self.df)
+
+    def city_history(self, city_geojson_code: str) -> pd.DataFrame:
+        return make_city_history(self.df, city_geojson_code)
+
+    def zip_rows(self, city_geojson_code: str, year: Optional[int] = None) -> pd.DataFrame:
+        df_zip = load_city_zip_data(city_geojson_code, df_full=self.df, max_pci=0)
+        if year is not None and "year" in df_zip.columns:
+            df_zip = df_zip[df_zip["year"] == year]
+        return df_zip
+
+    def zip_year_prices(self) -> pd.DataFrame:
+        return zip_year_prices(self.df)
+
+    def iter_rows(self, year: Optional[int] = None, city_codes=None,
+                  chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        rows = row_index(self.df, year=year, city_codes=city_codes)
+        return iter_frame_chunks(self.df, rows, chunk_rows)
+
+
+# --- SQL pushdown (shared by Databricks and SQLite) ---
+class SQLBackend(DataBackend):
+    """
+    Builds the filtered/aggregated queries; subclasses only run them.
+    Uses :name parameter markers and median(), which both Databricks SQL
+    and the SQLite stand-in (via a registered aggregate) understand.
+    """
+
+    def __init__(self, table: str):
+        if not re.fullmatch(r"[A-Za-z_][\w.]*", table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.table = table
+
+    def query(self, sql: str, params: Optional[dict] = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def query_chunks(self, sql: str, params: Optional[dict] = None,
+                     chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """query() as a sequence of frames; subclasses stream where the driver allows."""
+        out = self.query(sql, params)
+        return iter_frame_chunks(out, chunk_rows=chunk_rows)
+
+    def years(self) -> list:
+        out = self.query(f"SELECT DISTINCT year FROM {self.table} ORDER BY year")
+        return [int(y) for y in out["year"]]
+
+    def metros(self) -> pd.DataFrame:
+        return self.query(
+            f"SELECT city AS city_geojson_code, min(city_full) AS city_full "
+            f"FROM {self.table} GROUP BY city ORDER BY city_full"
+        )
+
+    def city_view(self, year: int) -> pd.DataFrame:
+        city_agg = self.query(
+            f"SELECT city AS city_geojson_code, "
+            f"median(median_sale_price) AS median_sale_price, "
+            f"median(per_capita_income) AS per_capita_income, "
+            f"min(city_full) AS city_full "
+            f"FROM {self.table} WHERE year = :year GROUP BY city",
+            {"year": int(year)},
+        )
+        return finalize_city_view(city_agg)
+
+    def city_views(self) -> pd.DataFrame:
+        city_agg = self.query(
+            f"SELECT year, city AS city_geojson_code, "
+            f"median(median_sale_price) AS median_sale_price, "
+            f"median(per_capita_income) AS per_capita_income, "
+            f"min(city_full) AS city_full "
+            f"FROM {self.table} GROUP BY year, city"
+        )
+        return finalize_city_view(city_agg)
+
+    def city_history(self, city_geojson_code: str) -> pd.DataFrame:
+        return self.query(
+            f"SELECT year, "
+            f"median(median_sale_price) AS median_sale_price, "
+            f"median(per_capita_income) AS per_capita_income, "
+            f"median(CAST(median_sale_price AS DOUBLE) / NULLIF(per_capita_income, 0)) "
+            f"AS price_to_income_ratio_by_year "
+            f"FROM {self.table} WHERE city = :city GROUP BY year ORDER BY year",
+            {"city": city_geojson_code},
+        )
+
+    def zip_rows(self, city_geojson_code: str, year: Optional[int] = None) -> pd.DataFrame:
+        sql = (
+            f"SELECT city AS city_geojson_code, city_full, zipcode, date, year, "
+            f"median_sale_price, per_capita_income "
+            f"FROM {self.table} WHERE city = :city"
+        )
+        params = {"city": city_geojson_code}
+        if year is not None:
+            sql += " AND year = :year"
+            params["year"] = int(year)
+        df_zip = self.query(sql, params)
+        if df_zip.empty:
+            return pd.DataFrame()
+        return add_zip_code_columns(df_zip)
+
+    def zip_year_prices(self) -> pd.DataFrame:
+        return self.query(
+            f"SELECT city AS city_geojson_code, zipcode, year, "
+            f"median(median_sale_price) AS median_sale_price, "
+            f"median(per_capita_income) AS per_capita_income "
+            f"FROM {self.table} WHERE median_sale_price IS NOT NULL "
+            f"GROUP BY city, zipcode, year"
+        )
+
+    def iter_rows(self, year: Optional[int] = None, city_codes=None,
+                  chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        clauses, params = [], {}
+        if year is not None:
+            clauses.append("year = :year")
+            params["year"] = int(year)
+        if city_codes:
+            markers = []
+            for i, code in enumerate(city_codes):
+                params[f"city{i}"] = code
+                markers.append(f":city{i}")
+            clauses.append(f"city IN ({', '.join(markers)})")
+        sql = f"SELECT * FROM {self.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        # Same column names as the pandas frame (load_data() renames city).
+        for chunk in self.query_chunks(sql, params, chunk_rows):
+            yield chunk.rename(columns={"city": "city_geojson_code"})
+
+
+class DatabricksBackend(SQLBackend):
+    """Runs the pushdown queries on a Databricks SQL warehouse via databricks-sdk."""
+
+    name = "databricks"
+    VERSION_TTL = 300
+
+    def __init__(self, warehouse_id: Optional[str] = None, table: str = TABLE_NAME):
+        super().__init__(table)
+        from databricks.sdk import WorkspaceClient
+
+        self.warehouse_id = warehouse_id or os.environ["DATABRICKS_WAREHOUSE_ID"]
+        self.client = WorkspaceClient()
+        self._version = None
+        self._version_checked = 0.0
+
+    def version(self) -> str:
+        # Latest Delta table version: bumps on every write to the table.
+        # Re-checked at most every VERSION_TTL seconds to keep it off the hot path.
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked > self.VERSION_TTL:
+            history = self.query(f"DESCRIBE HISTORY {self.table} LIMIT 1")
+            source = f"{self.table}:{history['version'].iloc[0] if not history.empty else 'unknown'}"
+            self._version = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+            self._version_checked = now
+        return self._version
+
+    def query(self, sql: str, params: Optional[dict] = None) -> pd.DataFrame:
+        chunks = list(self._result_chunks(sql, params))
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+    def query_chunks(self, sql: str, params: Optional[dict] = None,
+                     chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        # The warehouse already pages large results; hand each page on as it arrives.
+        for chunk in self._result_chunks(sql, params):
+            yield from iter_frame_chunks(chunk, chunk_rows=chunk_rows)
+
+    def _result_chunks(self, sql: str, params: Optional[dict] = None) -> Iterator[pd.DataFrame]:
+        from databricks.sdk.service.sql import StatementParameterListItem, StatementState
+
+        parameters = [
+            StatementParameterListItem(
+                name=k, value=str(v), type="INT" if isinstance(v, (int, np.integer)) else "STRING"
+            )
+            for k, v in (params or {}).items()
+        ]
+        resp = self.client.statement_execution.execute_statement(
+            statement=sql,
+            warehouse_id=self.warehouse_id,
+            parameters=parameters,
+            wait_timeout="50s",
+        )
+        if resp.status.state != StatementState.SUCCEEDED:
+            raise RuntimeError(f"Databricks query failed ({resp.status.state}): {resp.status.error}")
+
+        columns = [c.name for c in resp.manifest.schema.columns]
+        yield self._to_frame(resp.result.data_array if resp.result else None, columns)
+        for chunk_index in range(1, resp.manifest.total_chunk_count or 1):
+            chunk = self.client.statement_execution.get_statement_result_chunk_n(
+                resp.statement_id, chunk_index
+            )
+            yield self._to_frame(chunk.data_array, columns)
+
+    @staticmethod
+    def _to_frame(rows, columns: list) -> pd.DataFrame:
+        # The statement API returns every value as a string.
+        out = pd.DataFrame(list(rows or []), columns=columns)
+        for col in out.columns:
+            if col not in ("city_geojson_code", "city", "city_full", "zipcode", "date"):
+                out[col] = pd.to_numeric(out[col], errors="coerce")
+        return out
+
+
+class _Median:
+    """median() aggregate for SQLite."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return statistics.median(self.values) if self.values else None
+
+
+class SQLiteBackend(SQLBackend):
+    """Local stand-in for the warehouse: same queries, on a SQLite file."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, table: str = SQLITE_TABLE_NAME):
+        super().__init__(table)
+        self.path = path
+
+    def version(self) -> str:
+        stat = os.stat(self.path)
+        source = f"{self.path}:{self.table}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path)
+        con.create_aggregate("median", 1, _Median)
+        return con
+
+    def query(self, sql: str, params: Optional[dict] = None) -> pd.DataFrame:
+        con = self._connect()
+        try:
+            return pd.read_sql_query(sql, con, params=params or {})
+        finally:
+            con.close()
+
+    def query_chunks(self, sql: str, params: Optional[dict] = None,
+                     chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        con = self._connect()
+        try:
+            yield from pd.read_sql_query(sql, con, params=params or {}, chunksize=chunk_rows)
+        finally:
+            con.close()
+
+    @classmethod
+    def from_csv(cls, csv_path: str, path: str = DEFAULT_SQLITE_PATH,
+                 table: str = SQLITE_TABLE_NAME, chunksize: int = 200_000) -> "SQLiteBackend":
+        """Loads the CSV into SQLite chunk by chunk, so memory stays bounded."""
+        backend = cls(path, table)
+        con = backend._connect()
+        try:
+            con.execute(f"DROP TABLE IF EXISTS {table}")
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+                chunk = chunk.rename(columns=CSV_RENAMES)
+                if "city_full" not in chunk.columns:
+                    chunk["city_full"] = chunk["city"] + " Metro Area"
+                chunk.to_sql(table, con, if_exists="append", index=False)
+            con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_city_year ON {table} (city, year)")
+            con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_year ON {table} (year)")
+            con.commit()
+        finally:
+            con.close()
+        return backend
+
+
+class DuckDBBackend(SQLBackend):
+    """
+    The pushdown queries, run in-process by DuckDB over a Parquet file.
+    Scans are lazy: only the referenced columns are read, row groups are
+    skipped on their year/city statistics, and aggregation uses every core.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, path: str = DEFAULT_PARQUET_PATH, table: str = SQLITE_TABLE_NAME,
+                 threads: Optional[int] = None):
+        super().__init__(table)
+        import duckdb
+
+        self.path = path
+        self._con = duckdb.connect()
+        self._con.execute(f"SET threads = {int(threads or os.cpu_count() or 1)}")
+        self._con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet({_sql_string(path)})")
+
+    def version(self) -> str:
+        stat = os.stat(self.path)
+        source = f"{self.path}:{self.table}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _markers(sql: str) -> str:
+        # SQLBackend writes :name markers; DuckDB binds $name.
+        return re.sub(r"(?<!:):(\w+)", r"$\1", sql)
+
+    def query(self, sql: str, params: Optional[dict] = None) -> pd.DataFrame:
+        # One cursor per call: cursors share the database but are safe across threads.
+        cur = self._con.cursor()
+        try:
+            return cur.execute(self._markers(sql), params or {}).df()
+        finally:
+            cur.close()
+
+    def query_chunks(self, sql: str, params: Optional[dict] = None,
+                     chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        cur = self._con.cursor()
+        try:
+            batches = cur.execute(self._markers(sql), params or {}).fetch_record_batch(chunk_rows)
+            for batch in batches:
+                yield batch.to_pandas()
+        finally:
+            cur.close()
+
+    @classmethod
+    def from_csv(cls, csv_path: str, path: str = DEFAULT_PARQUET_PATH,
+                 table: str = SQLITE_TABLE_NAME, threads: Optional[int] = None) -> "DuckDBBackend":
+        """
+        Converts the CSV to Parquet with DuckDB (streamed, never fully in memory),
+        sorted by city and year so each row group covers a narrow range of both.
+        """
+        import duckdb
+
+        con = duckdb.connect()
+        try:
+            source = f"read_csv_auto({_sql_string(csv_path)})"
+            columns = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+            select = [f'"{c}" AS {CSV_RENAMES.get(c, c)}' for c in columns]
+            if "city_full" not in columns:
+                select.append("city || ' Metro Area' AS city_full")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            con.execute(
+                f"COPY (SELECT {', '.join(select)} FROM {source} ORDER BY city, year) "
+                f"TO {_sql_string(tmp_path)} (FORMAT PARQUET, ROW_GROUP_SIZE 100000)"
+            )
+            os.replace(tmp_path, path)
+        finally:
+            con.close()
+        return cls(path, table, threads)
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def get_backend(name: Optional[str] = None) -> DataBackend:
+    """Backend chosen by HOUSE_DATA_BACKEND (pandas | databricks | sqlite | duckdb)."""
+    name = (name or os.environ.get("HOUSE_DATA_BACKEND", "pandas")).lower()
+    if name == "pandas":
+        return PandasBackend()
+    if name == "databricks":
+        return DatabricksBackend(table=os.environ.get("HOUSE_TABLE_NAME", TABLE_NAME))
+    if name == "sqlite":
+        path = os.environ.get("HOUSE_SQLITE_PATH", DEFAULT_SQLITE_PATH)
+        if not os.path.exists(path):
+            return SQLiteBackend.from_csv(local_csv_path(), path=path)
+        return SQLiteBackend(path)
+    if name == "duckdb":
+        path = os.environ.get("HOUSE_PARQUET_PATH", DEFAULT_PARQUET_PATH)
+        threads = int(os.environ["HOUSE_DUCKDB_THREADS"]) if os.environ.get("HOUSE_DUCKDB_THREADS") else None
+        if not os.path.exists(path):
+            return DuckDBBackend.from_csv(local_csv_path(), path=path, threads=threads)
+        return DuckDBBackend(path, threads=threads)
+    raise ValueError(f"Unknown HOUSE_DATA_BACKEND: {name!r}")
@@ -5,9 +5,20 @@
 import pandas as pd
 import numpy as np
 import os
+import hashlib
 import streamlit as st
 from typing import Optional
 
+
+def enable_copy_on_write() -> None:
+    """
+    Copy-on-write: filtered slices and derived frames share the loaded dataset's
+    memory until they are written to, so nothing downstream copies the full table.
+    Called once by each entry point; pandas >= 3 always behaves this way.
+    """
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
 # --- Define Constants at the TOP LEVEL ---
 LOCAL_CSV_PATH = "HouseTS.csv"
 CSV_URL = "https://github.com/yyy1029/House-Browse/releases/download/v1.0/HouseTS.csv"
@@ -42,11 +53,29 @@ def classify_affordability(ratio: float) -> str:
             
     return "Uncategorized"
 
+def local_csv_path() -> str:
+    """Local dataset path; HOUSE_TS_CSV overrides it (e.g. a synthetic dataset for load tests)."""
+    return os.environ.get("HOUSE_TS_CSV") or os.path.join(os.path.dirname(__file__), LOCAL_CSV_PATH)
+
+
+def dataset_version() -> str:
+    """
+    Short fingerprint of the dataset load_data() will read.
+    Based on the local file's size/mtime (cheap), or the URL when there is no local copy.
+    """
+    local_file_path = local_csv_path()
+    if os.path.exists(local_file_path):
+        stat = os.stat(local_file_path)
+        source = f"{local_file_path}:{stat.st_size}:{stat.st_mtime_ns}"
+    else:
+        source = CSV_URL
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+
 @st.cache_data(ttl=3600*24)
 def load_data() -> pd.DataFrame:
     """Loads and standardizes data."""
-    script_dir = os.path.dirname(__file__)
-    local_file_path = os.path.join(script_dir, LOCAL_CSV_PATH)
+    local_file_path = local_csv_path()
     
     df = pd.DataFrame() 
     
@@ -89,13 +118,17 @@ def load_data() -> pd.DataFrame:
 
 def apply_income_filter(df: pd.DataFrame, annual_income: float) -> pd.DataFrame:
     """Returns the base DataFrame (no hard filter) for map context."""
-    return df.copy() # NOTE: Returns copy of full data for map context
+    return df  # NOTE: read-only view of the full data; copy-on-write guards the cached frame
 
 
 @st.cache_data(ttl=3600*24)
 def make_city_view_data(df_full: pd.DataFrame, annual_income: float, year: int, budget_pct: float = 30):
     """Aggregates data for the bar chart."""
-    df_year = df_full[df_full['year'] == year].copy()
+    # Only the aggregated columns of the year's rows are materialized.
+    df_year = df_full.loc[
+        df_full["year"] == year,
+        ["city_geojson_code", "median_sale_price", "per_capita_income", "city_full"],
+    ]
 
     # Aggregate by the GeoJSON code ('city_geojson_code')
     city_agg = df_year.groupby("city_geojson_code").agg(
@@ -104,6 +137,25 @@ def make_city_view_data(df_full: pd.DataFrame, annual_income: float, year: int,
         city_full=("city_full", "first"), 
     ).reset_index()
 
+    return finalize_city_view(city_agg)
+
+
+def make_city_view_all_years(df_full: pd.DataFrame) -> pd.DataFrame:
+    """make_city_view_data() for every year in one groupby pass (adds a 'year' column)."""
+    city_agg = df_full.groupby(["year", "city_geojson_code"]).agg(
+        median_sale_price=("median_sale_price", "median"), 
+        per_capita_income=("per_capita_income", "median"), 
+        city_full=("city_full", "first"), 
+    ).reset_index()
+
+    return finalize_city_view(city_agg)
+
+
+def finalize_city_view(city_agg: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds ratio/rating columns to per-city medians and renames them for display.
+    Shared by make_city_view_data and the SQL backends in data_backend.py.
+    """
     city_agg[RATIO_COL] = city_agg["median_sale_price"] / (city_agg["per_capita_income"] * 2.51)
     city_agg["affordability_rating"] = city_agg[RATIO_COL].apply(classify_affordability)
     city_agg["affordable"] = city_agg[RATIO_COL] <= AFFORDABILITY_THRESHOLD
@@ -126,13 +178,13 @@ def make_city_history(df: pd.DataFrame, city_name: str) -> pd.DataFrame:
     Return year-level history for a selected city:
     """
     # NOTE: This uses the GeoJSON code for filtering
-    tmp = df[df["city_geojson_code"] == city_name].copy() 
+    tmp = df.loc[df["city_geojson_code"] == city_name, ["year", "median_sale_price", "per_capita_income"]]
 
     if tmp.empty:
         return tmp
 
     denom = tmp["per_capita_income"].replace(0, np.nan)
-    tmp["price_to_income_ratio_by_year"] = tmp["median_sale_price"] / denom
+    tmp = tmp.assign(price_to_income_ratio_by_year=tmp["median_sale_price"] / denom)
 
     hist = (
         tmp.groupby("year", as_index=False)
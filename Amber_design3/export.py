@@ -0,0 +1,126 @@
+# export.py
+# Streaming CSV / Parquet export of the data behind the current view.
+#
+# Exports never build the filtered table in memory. They take an iterator of
+# small DataFrame chunks (slices of the row index, or backend query chunks)
+# and encode each chunk as soon as it is produced:
+#
+#     chunks = iter_frame_chunks(df, row_index(df, year=2023, city_codes=["SEA"]))
+#     for piece in csv_stream(chunks):
+#         out.write(piece)
+
+import io
+import os
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+# In-app downloads are built in memory; anything larger goes through the API's /export/* routes.
+UI_EXPORT_MAX_BYTES = int(os.environ.get("HOUSE_UI_EXPORT_MAX_MB", "25")) << 20
+
+
+class ExportTooLarge(Exception):
+    """Raised by encode_to_bytes() once the encoded export passes its size cap."""
+
+
+def row_index(df: pd.DataFrame, year: Optional[int] = None, city_codes=None) -> np.ndarray:
+    """Positions of the rows matching the view filters (no row data is copied)."""
+    mask = np.ones(len(df), dtype=bool)
+    if year is not None:
+        mask &= (df["year"] == year).to_numpy()
+    if city_codes:
+        mask &= df["city_geojson_code"].isin(list(city_codes)).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def iter_frame_chunks(df: pd.DataFrame, rows: Optional[np.ndarray] = None,
+                      chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields df.iloc[rows] in chunks of at most chunk_rows rows."""
+    if rows is None:
+        rows = np.arange(len(df))
+    if len(rows) == 0:
+        yield df.iloc[:0]
+        return
+    for start in range(0, len(rows), chunk_rows):
+        yield df.iloc[rows[start:start + chunk_rows]]
+
+
+def csv_stream(chunks: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only buffer that is emptied after every row group."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._buf += b
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = bytes(self._buf)
+        self._buf.clear()
+        return out
+
+
+def parquet_stream(chunks: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """One Parquet row group per chunk; bytes are yielded as each group is written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _DrainableSink()
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_stream, "text/csv"),
+    "parquet": (parquet_stream, "application/vnd.apache.parquet"),
+}
+
+
+def encode_to_bytes(stream: Iterable[bytes], max_bytes: Optional[int] = None) -> bytes:
+    """
+    Joins an encoded stream into one bytes object for st.download_button,
+    which only accepts str / bytes / in-memory buffers. Stops with
+    ExportTooLarge as soon as more than max_bytes have been encoded, so
+    peak memory stays bounded; large exports belong on the API's chunked
+    /export/* routes.
+    """
+    out = io.BytesIO()
+    try:
+        for piece in stream:
+            out.write(piece)
+            if max_bytes is not None and out.tell() > max_bytes:
+                raise ExportTooLarge(f"Export exceeds {max_bytes / (1 << 20):.0f} MB.")
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+    return out.getvalue()
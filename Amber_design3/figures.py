@@ -0,0 +1,223 @@
+# figures.py
+# Cheaper Plotly figure serialization for st.plotly_chart.
+#
+# Every rerun re-serializes every chart. Three things keep that cheap:
+#   - orjson as plotly's JSON engine when it is installed (C encoder, native
+#     numpy support), set once when plotly is first imported;
+#   - map geometry kept as numpy coordinate arrays, stripped to the one
+#     property the maps join on and rounded to ~1 m. Plotly hands numpy arrays
+#     straight to orjson instead of walking millions of nested Python floats,
+#     and the cached compact geometry is reused by every rerun;
+#   - no duplicate data columns: maps join and label on the same ZIP column.
+#
+# The metro ranking and ZIP map builders live here too, so the app and the
+# static site export (static_site.py) draw the same figures.
+
+import numpy as np
+import pandas as pd
+
+from coldstart import lazy_module
+from dataprep import RATIO_COL, AFFORDABILITY_CATEGORIES, AFFORDABILITY_COLORS
+
+GEOJSON_PRECISION = 5  # decimal degrees, ~1 m
+ZIP_PROPERTY = "ZCTA5CE10"
+
+ZIP_MAP_COLORSCALE = [
+    [0.0, "rgb(0, 100, 0)"],      # Dark green (very affordable)
+    [0.3, "rgb(34, 139, 34)"],   # Medium green
+    [0.5, "rgb(144, 238, 144)"],  # Light green (at threshold)
+    [0.5, "rgb(255, 182, 193)"],  # Light red (at threshold)
+    [0.7, "rgb(220, 20, 60)"],   # Medium red
+    [1.0, "rgb(139, 0, 0)"]       # Dark red (very unaffordable)
+]
+
+
+def use_fast_json_engine(_module=None) -> bool:
+    """Switches plotly.io to the orjson engine if orjson is available."""
+    import plotly.io as pio
+
+    try:
+        # plotly checks for orjson itself and refuses the engine without it.
+        pio.json.config.default_engine = "orjson"
+    except ValueError:
+        return False
+    return True
+
+
+px = lazy_module("plotly.express", on_load=use_fast_json_engine)
+
+
+def _compact_polygon(rings, precision: int) -> list:
+    return [np.round(np.asarray(ring, dtype=np.float64)[:, :2], precision) for ring in rings]
+
+
+def compact_geojson(geojson: dict, keep_properties=(ZIP_PROPERTY,), precision: int = GEOJSON_PRECISION) -> dict:
+    """
+    Copy of a FeatureCollection with only keep_properties and rounded
+    numpy coordinate rings (Polygon / MultiPolygon).
+    """
+    features = []
+    for feat in geojson["features"]:
+        geometry = feat.get("geometry")
+        if not geometry:
+            continue
+        if geometry["type"] == "Polygon":
+            coordinates = _compact_polygon(geometry["coordinates"], precision)
+        elif geometry["type"] == "MultiPolygon":
+            coordinates = [_compact_polygon(poly, precision) for poly in geometry["coordinates"]]
+        else:
+            coordinates = geometry["coordinates"]
+        compact = {
+            "type": "Feature",
+            "properties": {k: v for k, v in feat.get("properties", {}).items() if k in keep_properties},
+            "geometry": {"type": geometry["type"], "coordinates": coordinates},
+        }
+        if "id" in feat:
+            compact["id"] = feat["id"]
+        features.append(compact)
+    return {"type": "FeatureCollection", "features": features}
+
+
+# --- Figures ---
+def map_zoom(lat, lon, single_metro_zoom=10):
+    """Zoom level that fits the given points; single metros keep the original close-up."""
+    span = max(np.ptp(lat), np.ptp(lon) * np.cos(np.radians(np.mean(lat))))
+    if span < 1.0:
+        return single_metro_zoom
+    return float(np.clip(np.log2(360.0 / span) - 0.5, 3, single_metro_zoom))
+
+
+def affordability_color_values(prices, max_affordable_price, min_price, max_price):
+    """
+    Maps prices to [0, 1]: below the threshold -> 0-0.5 (green), at/above -> 0.5-1 (red).
+    """
+    prices = np.asarray(prices, dtype=float)
+    affordable_range = max_affordable_price - min_price
+    unaffordable_range = max_price - max_affordable_price
+    below = (
+        0.5 * (prices - min_price) / affordable_range if affordable_range > 0
+        else np.full_like(prices, 0.25)
+    )
+    above = (
+        0.5 + 0.5 * (prices - max_affordable_price) / unaffordable_range if unaffordable_range > 0
+        else np.full_like(prices, 0.75)
+    )
+    return np.clip(np.where(prices < max_affordable_price, below, above), 0, 1)
+
+
+def affordability_colorbar_ticks(prices, max_affordable_price):
+    """Colorbar tick positions and price labels matching affordability_color_values()."""
+    prices = np.asarray(prices, dtype=float)
+    min_price, max_price = np.nanmin(prices), np.nanmax(prices)
+    any_affordable = (prices < max_affordable_price).any()
+    any_unaffordable = (prices >= max_affordable_price).any()
+
+    tick_vals = [0.0, 0.25, 0.5, 0.75, 1.0]
+    tick_labels = []
+    for tv in tick_vals:
+        if tv <= 0.5:
+            if any_affordable and min_price < max_affordable_price:
+                price_val = min_price + (tv / 0.5) * (max_affordable_price - min_price)
+            else:
+                price_val = min_price
+        else:
+            if any_unaffordable and max_price > max_affordable_price:
+                price_val = max_affordable_price + ((tv - 0.5) / 0.5) * (max_price - max_affordable_price)
+            else:
+                price_val = max_affordable_price
+        tick_labels.append(f"${price_val:,.0f}")
+    return tick_vals, tick_labels
+
+
+def zip_map_figure(df_zip_map: pd.DataFrame, geojson, max_affordable_price: float,
+                   price_col: str = "median_sale_price", hover_data=None, zoom=10, height=454):
+    """
+    ZIP choropleth colored against max_affordable_price. `geojson` is a
+    FeatureCollection or a URL that plotly.js fetches itself.
+    """
+    prices = df_zip_map[price_col]
+    data = df_zip_map.assign(
+        color_value=affordability_color_values(prices, max_affordable_price, prices.min(), prices.max())
+    )
+    fig = px.choropleth_mapbox(
+        data,
+        geojson=geojson,
+        locations="zip_code_str",
+        featureidkey=f"properties.{ZIP_PROPERTY}",
+        color="color_value",
+        color_continuous_scale=ZIP_MAP_COLORSCALE,
+        range_color=[0, 1],
+        labels={"zip_code_str": "ZIP"},
+        hover_data={price_col: ":,.0f", **(hover_data or {}), "color_value": False},
+        mapbox_style="carto-positron",
+        center={"lat": data["lat"].mean(), "lon": data["lon"].mean()},
+        zoom=zoom,
+        height=height,
+    )
+
+    tick_vals, tick_labels = affordability_colorbar_ticks(prices, max_affordable_price)
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),
+        coloraxis_colorbar=dict(
+            title="Median Sale Price",
+            tickvals=tick_vals,
+            ticktext=tick_labels,
+        ),
+    )
+    fig.add_annotation(
+        text=f"Threshold: ${max_affordable_price:,.0f}",
+        xref="paper", yref="paper",
+        x=0.02, y=0.98,
+        showarrow=False,
+        bgcolor="rgba(255, 255, 255, 0.8)",
+        bordercolor="black",
+        borderwidth=1,
+        font=dict(size=10)
+    )
+    return fig
+
+
+def metro_ranking_figure(city_data: pd.DataFrame):
+    """Metro PTI bar chart in the row order of city_data, colored by affordability rating."""
+    ordered_categories = list(AFFORDABILITY_CATEGORIES.keys())
+    if "N/A" in set(city_data["affordability_rating"]):
+        ordered_categories.append("N/A")
+    data = city_data.assign(
+        afford_label=pd.Categorical(city_data["affordability_rating"], categories=ordered_categories, ordered=True)
+    )
+
+    fig = px.bar(
+        data,
+        x="city",
+        y=RATIO_COL,
+        color="afford_label",
+        color_discrete_map=AFFORDABILITY_COLORS,
+        labels={
+            "city": "City",
+            RATIO_COL: "Price-to-income ratio",
+            "afford_label": "Affordability Rating",
+        },
+        hover_data={
+            "city_full": True,
+            "Median Sale Price": ":,.0f",
+            "Per Capita Income": ":,.0f",
+            RATIO_COL: ":.2f",
+            "afford_label": True,
+        },
+        height=520,
+    )
+
+    # Threshold lines - add lines for all categories with upper bounds
+    for category, (lower, upper) in AFFORDABILITY_CATEGORIES.items():
+        if upper is not None:
+            fig.add_hline(y=upper, line_dash="dot", line_color="gray", opacity=0.5)
+
+    fig.update_layout(
+        yaxis_title="Price-to-income ratio",
+        xaxis_tickangle=-45,
+        margin=dict(l=20, r=20, t=80, b=80),
+        bargap=0.05,
+        bargroupgap=0.0,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    return fig
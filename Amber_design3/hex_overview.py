@@ -0,0 +1,148 @@
+# hex_overview.py
+# National overview: ZIP-level PTI/affordability aggregated into hexagonal bins.
+#
+# ZIP centroids come from the polygons in city_geojson/. Each ZIP is assigned
+# to a hex cell once per resolution (vectorized axial binning on an
+# equirectangular projection); per-income aggregation is then a groupby over
+# precomputed cell ids, so thousands of ZIPs draw as a few hundred cells.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+GEOJSON_DIR = os.path.join(os.path.dirname(__file__), "city_geojson")
+
+# Hex "radius" in degrees of latitude for each resolution.
+HEX_RESOLUTIONS = {"Coarse": 1.2, "Medium": 0.6, "Fine": 0.3}
+# Reference latitude for the projection (roughly the middle of the contiguous US).
+REF_LAT = 38.0
+_LON_SCALE = np.cos(np.radians(REF_LAT))
+_SQRT3 = np.sqrt(3.0)
+
+
+def _ring_centroid(geometry: dict):
+    """Vertex mean of the largest outer ring (good enough for ZIP-sized polygons)."""
+    if geometry["type"] == "Polygon":
+        rings = [geometry["coordinates"][0]]
+    else:  # MultiPolygon
+        rings = [poly[0] for poly in geometry["coordinates"]]
+    ring = np.asarray(max(rings, key=len), dtype=np.float64)
+    lon, lat = ring[:, 0].mean(), ring[:, 1].mean()
+    return lat, lon
+
+
+def zip_centroids(geojson_dir: str = GEOJSON_DIR) -> pd.DataFrame:
+    """One row per ZIP polygon: zip_code_str, city_geojson_code, lat, lon, land_area_m2."""
+    rows = []
+    for file_name in sorted(os.listdir(geojson_dir)):
+        if not file_name.endswith(".geojson"):
+            continue
+        code = file_name.rsplit(".", 1)[0]
+        with open(os.path.join(geojson_dir, file_name), "r") as f:
+            features = json.load(f)["features"]
+        for feat in features:
+            if not feat.get("geometry"):
+                continue
+            lat, lon = _ring_centroid(feat["geometry"])
+            props = feat["properties"]
+            rows.append((props["ZCTA5CE10"], code, lat, lon, props.get("ALAND10", np.nan)))
+    return pd.DataFrame(rows, columns=["zip_code_str", "city_geojson_code", "lat", "lon", "land_area_m2"])
+
+
+# --- Hex math (pointy-top axial coordinates) ---
+def hex_bin(lat: np.ndarray, lon: np.ndarray, size: float):
+    """Axial (q, r) of the hex containing each point."""
+    x = np.asarray(lon, dtype=np.float64) * _LON_SCALE
+    y = np.asarray(lat, dtype=np.float64)
+    q = (_SQRT3 / 3.0 * x - y / 3.0) / size
+    r = (2.0 / 3.0 * y) / size
+
+    # Cube rounding: round all three, then fix the one with the largest error.
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_center(q: np.ndarray, r: np.ndarray, size: float):
+    x = size * _SQRT3 * (q + r / 2.0)
+    y = size * 1.5 * r
+    return y, x / _LON_SCALE  # lat, lon
+
+
+def hex_geojson(cells: pd.DataFrame, size: float) -> dict:
+    """FeatureCollection of hexagons with id = cell_id (rings as numpy arrays, see figures.py)."""
+    angles = np.radians(60.0 * np.arange(7) - 30.0)  # closed ring
+    lat_c, lon_c = cells["lat"].to_numpy(), cells["lon"].to_numpy()
+    ring_lat = lat_c[:, None] + size * np.sin(angles)[None, :]
+    ring_lon = lon_c[:, None] + size * np.cos(angles)[None, :] / _LON_SCALE
+    features = [
+        {
+            "type": "Feature",
+            "id": int(cell_id),
+            "properties": {},
+            "geometry": {"type": "Polygon", "coordinates": [np.column_stack([lons, lats]).round(4)]},
+        }
+        for cell_id, lats, lons in zip(cells["cell_id"], ring_lat, ring_lon)
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+class HexOverview:
+    """Precomputed hex layers for every resolution; aggregates per year/income on demand."""
+
+    def __init__(self, centroids: pd.DataFrame, resolutions: dict = HEX_RESOLUTIONS):
+        self.centroids = centroids.drop_duplicates("zip_code_str").reset_index(drop=True)
+        self.layers = {}
+        for name, size in resolutions.items():
+            q, r = hex_bin(self.centroids["lat"].to_numpy(), self.centroids["lon"].to_numpy(), size)
+            cell_keys = pd.DataFrame({"q": q, "r": r})
+            cell_id, uniques = pd.factorize(pd.MultiIndex.from_frame(cell_keys))
+            cells = uniques.to_frame(index=False, name=["q", "r"])
+            cells["cell_id"] = np.arange(len(cells))
+            cells["lat"], cells["lon"] = hex_center(cells["q"].to_numpy(), cells["r"].to_numpy(), size)
+            self.layers[name] = {
+                "size": size,
+                "zip_cell": pd.Series(cell_id, index=self.centroids["zip_code_str"]),
+                "cells": cells,
+                "geojson": hex_geojson(cells, size),
+            }
+
+    def aggregate(self, zip_prices_year: pd.DataFrame, resolution: str, max_price: float) -> pd.DataFrame:
+        """
+        Per-cell ZIP count, median PTI, share of affordable ZIPs and dominant metro
+        for one year of zip_year_prices() rows.
+        """
+        layer = self.layers[resolution]
+        zip_str = zip_prices_year["zipcode"].astype(str).str.zfill(5)
+        cell_id = zip_str.map(layer["zip_cell"])
+        known = cell_id.notna().to_numpy()
+
+        rows = pd.DataFrame({
+            "cell_id": cell_id[known].astype(np.int64).to_numpy(),
+            "city_geojson_code": zip_prices_year["city_geojson_code"].to_numpy()[known],
+            "pti": (
+                zip_prices_year["median_sale_price"]
+                / zip_prices_year["per_capita_income"].replace(0, np.nan)
+            ).to_numpy()[known],
+            "affordable": (zip_prices_year["median_sale_price"] < max_price).to_numpy()[known],
+        })
+        agg = rows.groupby("cell_id").agg(
+            zip_count=("pti", "size"),
+            median_pti=("pti", "median"),
+            affordable_share=("affordable", "mean"),
+        )
+        agg["top_metro"] = (
+            rows.groupby(["cell_id", "city_geojson_code"]).size()
+            .sort_values(ascending=False)
+            .reset_index()
+            .drop_duplicates("cell_id")
+            .set_index("cell_id")["city_geojson_code"]
+        )
+        return layer["cells"].join(agg, on="cell_id", how="inner").reset_index(drop=True)
@@ -0,0 +1,192 @@
+# load_test.py
+# Headless concurrent-session load test for app.py, built on Streamlit's AppTest.
+#
+#     python load_test.py --sessions 1 5 10 20 --steps 20
+#     python load_test.py --sessions 10 --zips-per-metro 150 --json load_report.json
+#     python load_test.py --sessions 10 --backend duckdb   # vs. the default pandas path
+#
+# Each simulated session runs a realistic script against a synthetic dataset
+# (same schema as HouseTS.csv, real ZIPs from city_geojson/): change persona,
+# drag the income slider, switch metro, switch year. Sessions share one
+# process, as they do on a real pod, so st.cache_data / st.cache_resource are
+# shared between them. Reported per session count: p50/p95/p99 rerun latency,
+# throughput (reruns/s) and resident memory.
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOJSON_DIR = os.path.join(APP_DIR, "city_geojson")
+YEARS = range(2012, 2024)
+
+
+# --- Synthetic dataset ---
+def make_synthetic_dataset(path: str, zips_per_metro: int = 50, seed: int = 0) -> pd.DataFrame:
+    """Writes a HouseTS-shaped CSV: monthly rows per ZIP for every metro/year."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for file_name in sorted(os.listdir(GEOJSON_DIR)):
+        code = file_name.rsplit(".", 1)[0]
+        with open(os.path.join(GEOJSON_DIR, file_name), "r") as f:
+            features = json.load(f)["features"]
+        zips = [feat["properties"]["ZCTA5CE10"] for feat in features][:zips_per_metro]
+
+        metro_price = rng.uniform(200_000, 900_000)
+        metro_income = rng.uniform(30_000, 70_000)
+        zip_price = metro_price * rng.lognormal(0, 0.35, len(zips))
+        zip_income = metro_income * rng.lognormal(0, 0.25, len(zips))
+
+        months = pd.date_range(f"{YEARS[0]}-01-01", f"{YEARS[-1]}-12-01", freq="MS")
+        growth = 1.05 ** ((months.year - YEARS[0]) + months.month / 12.0)
+        n_months = len(months)
+        frames.append(pd.DataFrame({
+            "date": np.tile(months.strftime("%Y-%m-%d"), len(zips)),
+            "year": np.tile(months.year, len(zips)),
+            "zipcode": np.repeat([int(z) for z in zips], n_months),
+            "city": code,
+            "city_full": f"{code} Metro Area",
+            "median_sale_price": (
+                np.repeat(zip_price, n_months) * np.tile(growth, len(zips))
+                * rng.normal(1.0, 0.03, n_months * len(zips))
+            ).round(-2),
+            "per_capita_income": (
+                np.repeat(zip_income, n_months) * np.tile(growth ** 0.5, len(zips))
+            ).round(),
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    df.to_csv(path, index=False)
+    return df
+
+
+# --- One simulated user ---
+def session_script(steps: int, metros: list, years: list, rng: random.Random) -> list:
+    """A list of (action, value) UI interactions, mixing the four kinds of change."""
+    actions = []
+    for _ in range(steps):
+        kind = rng.choices(["persona", "income", "metro", "year"], weights=[1, 4, 2, 1])[0]
+        if kind == "persona":
+            actions.append(("persona", rng.choice(["Student", "Young professional", "Family"])))
+        elif kind == "income":
+            actions.append(("income", rng.randrange(20000, 200001, 1000)))
+        elif kind == "metro":
+            actions.append(("metro", rng.choice(metros)))
+        else:
+            actions.append(("year", rng.choice(years)))
+    return actions
+
+
+def run_session(script: list, timeout: float) -> list:
+    """Runs one session's script; returns the latency (s) of every rerun."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=timeout)
+    latencies = []
+
+    t0 = time.perf_counter()
+    at.run()
+    latencies.append(time.perf_counter() - t0)
+
+    for action, value in script:
+        if action == "persona":
+            widget = at.radio(key="profile_radio_key")
+        elif action == "income":
+            widget = at.slider(key="income_slider_key")
+        elif action == "metro":
+            widget = at.multiselect(key="map_metro_select")
+            value = [value]
+        else:
+            widget = at.selectbox(key="year_main_selector")
+        t0 = time.perf_counter()
+        widget.set_value(value).run()
+        latencies.append(time.perf_counter() - t0)
+
+        if at.exception:
+            raise RuntimeError(f"App raised during '{action}={value}': {at.exception[0].message}")
+    return latencies
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def run_level(n_sessions: int, steps: int, metros: list, years: list, timeout: float, seed: int) -> dict:
+    scripts = [session_script(steps, metros, years, random.Random(seed + i)) for i in range(n_sessions)]
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        results = list(pool.map(lambda s: run_session(s, timeout), scripts))
+    wall = time.perf_counter() - t0
+    rss_after = rss_mb()
+
+    latencies = np.array([lat for session in results for lat in session]) * 1000
+    return {
+        "sessions": n_sessions,
+        "reruns": int(latencies.size),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "throughput_rps": latencies.size / wall,
+        "wall_s": wall,
+        "rss_mb": rss_after,
+        "rss_delta_per_session_mb": (rss_after - rss_before) / n_sessions,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--steps", type=int, default=20, help="Interactions per session")
+    parser.add_argument("--zips-per-metro", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun timeout (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Also write the report to this path")
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "sqlite", "duckdb"],
+                        help="HOUSE_DATA_BACKEND to run the app against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="house_browse_load_")
+    csv_path = os.path.join(workdir, "HouseTS_synthetic.csv")
+    df = make_synthetic_dataset(csv_path, zips_per_metro=args.zips_per_metro, seed=args.seed)
+    print(f"Synthetic dataset: {len(df):,} rows, {df['zipcode'].nunique():,} ZIPs -> {csv_path}")
+
+    # Point the app at the synthetic data and keep its on-disk caches out of the way.
+    os.environ["HOUSE_TS_CSV"] = csv_path
+    os.environ["HOUSE_DATA_BACKEND"] = args.backend
+    os.environ["HOUSE_SQLITE_PATH"] = os.path.join(workdir, "house_ts.sqlite")
+    os.environ["HOUSE_PARQUET_PATH"] = os.path.join(workdir, "house_ts.parquet")
+    os.environ["HOUSE_RESULT_CACHE_DIR"] = os.path.join(workdir, "result_cache")
+    sys.path.insert(0, APP_DIR)
+
+    metros = sorted(df["city_full"].unique())
+    years = sorted(int(y) for y in df["year"].unique())
+
+    report = []
+    for n in args.sessions:
+        row = run_level(n, args.steps, metros, years, args.timeout, args.seed)
+        report.append(row)
+        print(
+            f"{row['sessions']:>4} sessions | {row['reruns']:>5} reruns | "
+            f"p50 {row['p50_ms']:8.1f} ms | p95 {row['p95_ms']:8.1f} ms | p99 {row['p99_ms']:8.1f} ms | "
+            f"{row['throughput_rps']:6.2f} reruns/s | RSS {row['rss_mb']:7.1f} MB "
+            f"(+{row['rss_delta_per_session_mb']:.1f} MB/session)"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
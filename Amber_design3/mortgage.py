@@ -0,0 +1,76 @@
+# mortgage.py
+# Payment-to-income affordability scenarios.
+#
+# A scenario is (budget %, interest rate, down payment %, term). A home is
+# affordable when its monthly principal + interest fits in budget % of
+# monthly income:
+#     payment = loan * r / (1 - (1 + r) ** -n),   loan = price * (1 - down)
+# Payment is linear in price, so every scenario reduces to a price-to-income
+# multiple: max price = multiple * income. All functions broadcast, so a grid
+# of rates x incomes x ZIPs is evaluated in one NumPy call.
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Spans the whole interest-rate slider (ui_components reads its bounds from here).
+RATE_GRID = np.arange(0.0, 12.01, 0.25)
+INCOME_GRID = np.arange(20000, 200001, 5000)
+
+
+class MortgageScenario(NamedTuple):
+    budget_pct: float = 30.0        # share of gross income for the mortgage payment
+    rate_pct: float = 6.5           # annual interest rate
+    down_payment_pct: float = 20.0  # share of the price paid up front
+    term_years: int = 30
+
+    def price_multiple(self) -> float:
+        return float(price_multiple(self.budget_pct, self.rate_pct, self.down_payment_pct, self.term_years))
+
+    def max_affordable_price(self, income):
+        return self.price_multiple() * np.asarray(income, dtype=np.float64)
+
+
+def payment_factor(rate_pct, term_years) -> np.ndarray:
+    """Monthly payment per dollar borrowed (handles a 0% rate)."""
+    r = np.asarray(rate_pct, dtype=np.float64) / 100.0 / 12.0
+    n = np.asarray(term_years, dtype=np.float64) * 12.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = r / (1.0 - (1.0 + r) ** -n)
+    return np.where(r > 0, factor, 1.0 / n)
+
+
+def price_multiple(budget_pct, rate_pct, down_payment_pct, term_years) -> np.ndarray:
+    """Max affordable price per dollar of annual income."""
+    monthly_budget_share = np.asarray(budget_pct, dtype=np.float64) / 100.0 / 12.0
+    loan_share = 1.0 - np.asarray(down_payment_pct, dtype=np.float64) / 100.0
+    return monthly_budget_share / (payment_factor(rate_pct, term_years) * loan_share)
+
+
+def payment_to_income(prices, incomes, rate_pct, down_payment_pct, term_years) -> np.ndarray:
+    """Annual principal + interest as a share of annual income."""
+    loan = np.asarray(prices, dtype=np.float64) * (1.0 - np.asarray(down_payment_pct, dtype=np.float64) / 100.0)
+    annual_payment = 12.0 * loan * payment_factor(rate_pct, term_years)
+    return annual_payment / np.asarray(incomes, dtype=np.float64)
+
+
+def affordability_grid(sorted_prices: np.ndarray, scenario: MortgageScenario,
+                       rates_pct=RATE_GRID, incomes=INCOME_GRID) -> pd.DataFrame:
+    """
+    Number and share of affordable ZIPs for every (rate, income) pair.
+    sorted_prices are one metro/year's ZIP prices in ascending order; the
+    rates x incomes grid of max prices is located in them with one searchsorted.
+    """
+    rates_pct = np.asarray(rates_pct, dtype=np.float64)
+    incomes = np.asarray(incomes, dtype=np.float64)
+    multiples = price_multiple(scenario.budget_pct, rates_pct, scenario.down_payment_pct, scenario.term_years)
+    max_prices = multiples[:, None] * incomes[None, :]
+    counts = np.searchsorted(sorted_prices, max_prices, side="left")
+    total = len(sorted_prices)
+    return pd.DataFrame({
+        "rate_pct": np.repeat(rates_pct, len(incomes)),
+        "income": np.tile(incomes, len(rates_pct)),
+        "affordable_zips": counts.ravel(),
+        "affordable_share": counts.ravel() / total if total else np.nan,
+    })
@@ -0,0 +1,83 @@
+# national_search.py
+# Nationwide "top-N ZIPs under my budget" search across every metro.
+#
+# For each year, all ZIPs from all metros are kept in one array sorted by
+# price. The ZIPs a user can afford are therefore always a prefix of that
+# array, found with one binary search; the cheapest N are the first N of the
+# prefix and the best-PTI N come from a partial sort of the prefix only.
+
+import numpy as np
+import pandas as pd
+
+from price_index import zip_year_prices
+
+SORT_OPTIONS = ("price", "pti")
+
+
+class NationalZipIndex:
+    """Global per-year ZIP index sorted by median sale price."""
+
+    def __init__(self, by_year: dict):
+        # year -> dict of aligned arrays, sorted by price
+        self.by_year = by_year
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "NationalZipIndex":
+        return cls.from_zip_prices(zip_year_prices(df))
+
+    @classmethod
+    def from_zip_prices(cls, zip_prices: pd.DataFrame) -> "NationalZipIndex":
+        """Builds from a zip_year_prices()-shaped table (price and income per metro/ZIP/year)."""
+        table = zip_prices.sort_values(["year", "median_sale_price"], ignore_index=True)
+        denom = table["per_capita_income"].replace(0, np.nan)
+        table["pti"] = table["median_sale_price"] / denom
+
+        by_year = {}
+        for year, grp in table.groupby("year", sort=False):
+            by_year[int(year)] = {
+                "price": grp["median_sale_price"].to_numpy(np.float64),
+                "income": grp["per_capita_income"].to_numpy(np.float64),
+                "pti": grp["pti"].to_numpy(np.float64),
+                "zip": grp["zipcode"].astype(str).str.zfill(5).to_numpy(),
+                "city": grp["city_geojson_code"].to_numpy(),
+            }
+        return cls(by_year)
+
+    def years(self) -> list:
+        return sorted(self.by_year)
+
+    def count_affordable(self, year: int, max_price: float) -> int:
+        arrays = self.by_year.get(int(year))
+        if arrays is None:
+            return 0
+        return int(np.searchsorted(arrays["price"], max_price, side="left"))
+
+    def search(self, year: int, max_price: float, n: int = 20, sort_by: str = "price") -> pd.DataFrame:
+        """
+        The n affordable ZIPs (price < max_price) nationwide for a year,
+        cheapest first (sort_by="price") or lowest PTI first (sort_by="pti").
+        """
+        if sort_by not in SORT_OPTIONS:
+            raise ValueError(f"sort_by must be one of {SORT_OPTIONS}, got {sort_by!r}")
+        arrays = self.by_year.get(int(year))
+        if arrays is None or n <= 0:
+            return pd.DataFrame(columns=["city", "zip_code_str", "median_sale_price", "per_capita_income", "pti"])
+
+        k = int(np.searchsorted(arrays["price"], max_price, side="left"))
+        if sort_by == "price":
+            idx = np.arange(min(n, k))
+        else:
+            pti = np.where(np.isnan(arrays["pti"][:k]), np.inf, arrays["pti"][:k])
+            if k > n:
+                idx = np.argpartition(pti, n - 1)[:n]
+            else:
+                idx = np.arange(k)
+            idx = idx[np.argsort(pti[idx], kind="stable")]
+
+        return pd.DataFrame({
+            "city": arrays["city"][idx],
+            "zip_code_str": arrays["zip"][idx],
+            "median_sale_price": arrays["price"][idx],
+            "per_capita_income": arrays["income"][idx],
+            "pti": arrays["pti"][idx],
+        })
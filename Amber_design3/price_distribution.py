@@ -0,0 +1,83 @@
+# price_distribution.py
+# Per-metro, per-year distributions of ZIP median sale prices.
+#
+# Built once from zip_year_prices() rows into two dense arrays:
+#     counts    int64   (metro, year, bin)       fixed log-spaced price bins
+#     quantiles float64 (metro, year, quantile)  QUANTILES of the ZIP prices
+# Histograms and quantile bands are then read from these arrays; raw rows are
+# never touched again. The share of ZIPs under the user's max price is exact,
+# not read off the bins: it is a binary search in price_index.PriceIndex.
+
+import numpy as np
+import pandas as pd
+
+from price_index import PriceIndex
+
+# 60 log-spaced bins from $25k to $5M; prices outside fall into the end bins.
+PRICE_BIN_EDGES = np.geomspace(25_000, 5_000_000, 61)
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+QUANTILE_COLS = [f"q{int(q * 100)}" for q in QUANTILES]
+
+
+class PriceDistributions:
+    """Fixed-bin histograms and quantiles of ZIP prices for every metro/year."""
+
+    def __init__(self, metros: np.ndarray, years: np.ndarray, counts: np.ndarray,
+                 quantiles: np.ndarray, index: PriceIndex, edges: np.ndarray = PRICE_BIN_EDGES):
+        self.metros = metros
+        self.years = years
+        self.counts = counts
+        self.quantiles = quantiles
+        self.index = index        # sorted prices, for exact affordable shares
+        self.edges = edges
+        self._metro_pos = {m: i for i, m in enumerate(metros)}
+        self._year_pos = {int(y): i for i, y in enumerate(years)}
+
+    @classmethod
+    def from_zip_prices(cls, zip_prices: pd.DataFrame, edges: np.ndarray = PRICE_BIN_EDGES) -> "PriceDistributions":
+        prices = zip_prices["median_sale_price"].to_numpy(np.float64)
+        metro_id, metros = pd.factorize(zip_prices["city_geojson_code"], sort=True)
+        year_id, years = pd.factorize(zip_prices["year"], sort=True)
+        n_metros, n_years, n_bins = len(metros), len(years), len(edges) - 1
+
+        bin_id = np.clip(np.searchsorted(edges, prices, side="right") - 1, 0, n_bins - 1)
+        flat = (metro_id * n_years + year_id) * n_bins + bin_id
+        counts = np.bincount(flat, minlength=n_metros * n_years * n_bins).reshape(n_metros, n_years, n_bins)
+
+        quantiles = np.full((n_metros, n_years, len(QUANTILES)), np.nan)
+        if len(prices):
+            q = pd.Series(prices).groupby([metro_id, year_id]).quantile(list(QUANTILES)).unstack()
+            quantiles[q.index.get_level_values(0), q.index.get_level_values(1)] = q.to_numpy()
+        index = PriceIndex.from_zip_prices(zip_prices)
+        return cls(np.asarray(metros), np.asarray(years).astype(int), counts, quantiles, index, edges)
+
+    def _share_below(self, year: int, max_price: float) -> np.ndarray:
+        """Share of each metro's ZIPs priced under max_price (same rule as the map)."""
+        return np.array([self.index.affordable_share(code, year, max_price) for code in self.metros])
+
+    def quantile_bands(self, year: int, max_price: float) -> pd.DataFrame:
+        """One row per metro: ZIP price quantiles, ZIP count and affordable share."""
+        y = self._year_pos.get(int(year))
+        if y is None:
+            return pd.DataFrame(columns=["city", *QUANTILE_COLS, "zip_count", "affordable_share"])
+        bands = pd.DataFrame(self.quantiles[:, y, :], columns=QUANTILE_COLS)
+        bands.insert(0, "city", self.metros)
+        bands["zip_count"] = self.counts[:, y, :].sum(axis=1)
+        bands["affordable_share"] = self._share_below(year, max_price)
+        return bands[bands["zip_count"] > 0].reset_index(drop=True)
+
+    def histogram(self, code: str, year: int, max_price: float) -> pd.DataFrame:
+        """Non-empty price bins of one metro/year, each labelled against max_price."""
+        m, y = self._metro_pos.get(code), self._year_pos.get(int(year))
+        if m is None or y is None:
+            return pd.DataFrame(columns=["bin_lo", "bin_hi", "bin_mid", "zip_count", "position"])
+        lo, hi = self.edges[:-1], self.edges[1:]
+        hist = pd.DataFrame({
+            "bin_lo": lo,
+            "bin_hi": hi,
+            "bin_mid": np.sqrt(lo * hi),
+            "zip_count": self.counts[m, y, :],
+            "position": np.where(hi <= max_price, "Under budget",
+                                 np.where(lo >= max_price, "Over budget", "Straddles budget")),
+        })
+        return hist[hist["zip_count"] > 0].reset_index(drop=True)
@@ -0,0 +1,107 @@
+# price_index.py
+# Sorted ZIP price arrays per metro/year for instant affordability lookups.
+#
+# All ZIP-year median prices live in one contiguous array, sorted by
+# (metro, year, price). Each (metro, year) owns a [start, end) slice of it,
+# so "how many ZIPs are under $X" is a single binary search on that slice.
+
+import numpy as np
+import pandas as pd
+
+from dataprep import AFFORDABILITY_THRESHOLD
+
+
+def zip_year_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """One median sale price (and per capita income) per metro/ZIP/year."""
+    return (
+        df.dropna(subset=["median_sale_price"])
+        .groupby(["city_geojson_code", "zipcode", "year"], as_index=False)
+        .agg(
+            median_sale_price=("median_sale_price", "median"),
+            per_capita_income=("per_capita_income", "median"),
+        )
+    )
+
+
+class PriceIndex:
+    """Per metro/year sorted ZIP prices with binary-search affordability queries."""
+
+    def __init__(self, prices: np.ndarray, zips: np.ndarray, slices: dict):
+        self.prices = prices    # float64, sorted within each slice
+        self.zips = zips        # 5-char ZIP strings aligned with prices
+        self.slices = slices    # (city_geojson_code, year) -> (start, end)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceIndex":
+        return cls.from_zip_prices(zip_year_prices(df))
+
+    @classmethod
+    def from_zip_prices(cls, zip_prices: pd.DataFrame) -> "PriceIndex":
+        """Builds from a zip_year_prices()-shaped table (e.g. a backend's pushdown result)."""
+        table = zip_prices.sort_values(
+            ["city_geojson_code", "year", "median_sale_price"], ignore_index=True
+        )
+        prices = table["median_sale_price"].to_numpy(np.float64)
+        zips = table["zipcode"].astype(str).str.zfill(5).to_numpy()
+
+        keys = table[["city_geojson_code", "year"]]
+        is_start = (keys != keys.shift()).any(axis=1).to_numpy()
+        starts = np.flatnonzero(is_start)
+        ends = np.append(starts[1:], len(table))
+        slices = {
+            (code, int(year)): (int(s), int(e))
+            for code, year, s, e in zip(
+                table["city_geojson_code"].to_numpy()[starts],
+                table["year"].to_numpy()[starts],
+                starts,
+                ends,
+            )
+        }
+        return cls(prices, zips, slices)
+
+    def _slice(self, code: str, year: int):
+        start, end = self.slices.get((code, int(year)), (0, 0))
+        return self.prices[start:end], self.zips[start:end]
+
+    def sorted_prices(self, code: str, year: int) -> np.ndarray:
+        """Ascending ZIP prices of one metro/year (a view, not a copy)."""
+        return self._slice(code, year)[0]
+
+    def zip_count(self, code: str, year: int) -> int:
+        start, end = self.slices.get((code, int(year)), (0, 0))
+        return end - start
+
+    def count_affordable(self, code: str, year: int, max_price: float) -> int:
+        """Number of ZIPs with price < max_price (same rule as the map)."""
+        prices, _ = self._slice(code, year)
+        return int(np.searchsorted(prices, max_price, side="left"))
+
+    def affordable_share(self, code: str, year: int, max_price: float) -> float:
+        total = self.zip_count(code, year)
+        return self.count_affordable(code, year, max_price) / total if total else np.nan
+
+    def cheapest(self, code: str, year: int, n: int = 10) -> pd.DataFrame:
+        """The n cheapest ZIPs, already in price order."""
+        prices, zips = self._slice(code, year)
+        return pd.DataFrame({"zip_code_str": zips[:n], "median_sale_price": prices[:n]})
+
+    def median_price(self, code: str, year: int) -> float:
+        prices, _ = self._slice(code, year)
+        return float(np.median(prices)) if len(prices) else np.nan
+
+    def income_for_median_zip(self, code: str, year: int, multiple: float = AFFORDABILITY_THRESHOLD) -> float:
+        """Annual income at which the metro's median ZIP hits the price-to-income multiple."""
+        return self.median_price(code, year) / multiple
+
+    def affordability_curve(self, code: str, year: int, incomes: np.ndarray,
+                            multiple: float = AFFORDABILITY_THRESHOLD) -> pd.DataFrame:
+        """Income vs. number/share of affordable ZIPs, one searchsorted for all incomes."""
+        prices, _ = self._slice(code, year)
+        incomes = np.asarray(incomes, dtype=np.float64)
+        counts = np.searchsorted(prices, multiple * incomes, side="left")
+        total = len(prices)
+        return pd.DataFrame({
+            "income": incomes,
+            "affordable_zips": counts,
+            "affordable_share": counts / total if total else np.nan,
+        })
@@ -0,0 +1,206 @@
+# profiling.py
+# On-demand profiling of live app.py reruns, for finding hotspots inside
+# pandas / Plotly under production data.
+#
+# Operator switches (both off by default):
+#     HOUSE_PROFILE_RERUNS=N              profile the next N reruns of this process (any session)
+#     ?profile=N&profile_token=<token>    profile the next N reruns of this session; only
+#                                         honoured when HOUSE_PROFILE_TOKEN is set and matches
+#
+# HOUSE_PROFILE_MODE picks the output:
+#     stacks    (default) sampling: the script thread's stack every
+#               HOUSE_PROFILE_INTERVAL_MS (default 5), written as collapsed stacks
+#               for flamegraph.pl / speedscope / inferno
+#     cprofile  deterministic cProfile stats (.prof) for snakeviz / flameprof / pstats
+#
+# Captures go to HOUSE_PROFILE_DIR (default: <tmp>/house_browse_profiles) as
+#     <time>_<session>_<n>_metro-<codes>_year-<year>_income-<income>.collapsed|.prof
+# and each one is also appended to index.jsonl there.
+
+import cProfile
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+PROFILE_DIR = os.environ.get(
+    "HOUSE_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "house_browse_profiles")
+)
+PROFILE_MODE = os.environ.get("HOUSE_PROFILE_MODE", "stacks")
+SAMPLE_INTERVAL = float(os.environ.get("HOUSE_PROFILE_INTERVAL_MS", "5")) / 1000.0
+MAX_SESSION_RERUNS = 50  # cap for ?profile=N
+
+logger = logging.getLogger("house_browse.profiling")
+
+_lock = threading.Lock()
+_process_reruns = int(os.environ.get("HOUSE_PROFILE_RERUNS", "0") or 0)
+
+# Session state keys
+_ACTIVE = "_profile_active"
+_REMAINING = "_profile_remaining"
+_ARMED_BY = "_profile_armed_by"
+_SESSION = "_profile_session"
+_COUNT = "_profile_count"
+
+
+# --- Captures ---
+class StackSampler:
+    """Samples one thread's Python stack from a background thread and counts collapsed stacks."""
+
+    suffix = ".collapsed"
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="house-profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, n in self.counts.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class CProfileCapture:
+    """cProfile of the calling thread."""
+
+    suffix = ".prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path: str):
+        self.profile.dump_stats(path)
+
+
+# --- Switches ---
+def _take_process_rerun() -> bool:
+    global _process_reruns
+    with _lock:
+        if _process_reruns > 0:
+            _process_reruns -= 1
+            return True
+    return False
+
+
+def _arm_from_query(session_state, query_params) -> None:
+    """?profile=N arms this session once per distinct request (reruns keep the same URL)."""
+    token = os.environ.get("HOUSE_PROFILE_TOKEN")
+    request = query_params.get("profile")
+    if not token or request is None or session_state.get(_ARMED_BY) == request:
+        return
+    if not hmac.compare_digest(str(query_params.get("profile_token", "")), token):
+        return
+    session_state[_ARMED_BY] = request
+    try:
+        reruns = int(request)
+    except ValueError:
+        reruns = 1
+    session_state[_REMAINING] = max(0, min(reruns, MAX_SESSION_RERUNS))
+
+
+# --- Rerun hooks ---
+def start_rerun_profile(session_state, query_params) -> bool:
+    """Call near the top of the script; starts a capture if this rerun is to be profiled."""
+    # A capture still open here belongs to a rerun cut short by st.rerun()/st.stop().
+    _finish(session_state, {}, interrupted=True)
+    _arm_from_query(session_state, query_params)
+
+    remaining = session_state.get(_REMAINING, 0)
+    if remaining > 0:
+        session_state[_REMAINING] = remaining - 1
+    elif not _take_process_rerun():
+        return False
+
+    capture = CProfileCapture() if PROFILE_MODE == "cprofile" else StackSampler(threading.get_ident())
+    try:
+        capture.start()
+    except ValueError:  # another profiler already owns this thread
+        return False
+    if _SESSION not in session_state:
+        session_state[_SESSION] = uuid.uuid4().hex[:8]
+    session_state[_COUNT] = session_state.get(_COUNT, 0) + 1
+    session_state[_ACTIVE] = {"capture": capture, "t0": time.perf_counter(), "started": time.time()}
+    return True
+
+
+def finish_rerun_profile(session_state, metro=None, year=None, income=None) -> Optional[str]:
+    """Call at the end of the script; writes the capture tagged with metro/year/income."""
+    if isinstance(metro, (list, tuple)):
+        metro = "+".join(str(m) for m in metro) or None
+    tags = {"metro": metro, "year": int(year) if year is not None else None,
+            "income": int(income) if income is not None else None}
+    return _finish(session_state, tags)
+
+
+def _slug(value) -> str:
+    return re.sub(r"[^A-Za-z0-9.+-]+", "-", str(value)).strip("-") or "none"
+
+
+def _finish(session_state, tags: dict, interrupted: bool = False) -> Optional[str]:
+    active = session_state.get(_ACTIVE)
+    if active is None:
+        return None
+    session_state[_ACTIVE] = None
+    capture = active["capture"]
+    capture.stop()
+    seconds = time.perf_counter() - active["t0"]
+
+    name = "_".join([
+        time.strftime("%Y%m%dT%H%M%S", time.localtime(active["started"])),
+        session_state[_SESSION],
+        str(session_state[_COUNT]),
+        *(f"{k}-{_slug(tags.get(k))}" for k in ("metro", "year", "income")),
+        *(["interrupted"] if interrupted else []),
+    ])
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, name + capture.suffix)
+    capture.write(path)
+
+    entry = {
+        "file": os.path.basename(path),
+        "mode": PROFILE_MODE,
+        "session": session_state[_SESSION],
+        "rerun": session_state[_COUNT],
+        "seconds": round(seconds, 4),
+        "interrupted": interrupted,
+        **tags,
+    }
+    with _lock:
+        with open(os.path.join(PROFILE_DIR, "index.jsonl"), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    logger.info("profile %s (%.1f ms) -> %s", entry["rerun"], seconds * 1000, path)
+    return path
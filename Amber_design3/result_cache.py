@@ -0,0 +1,154 @@
+# result_cache.py
+# Disk-backed result cache shared by every Streamlit worker on a node.
+#
+# DataFrame results are stored as Parquet under
+#     <HOUSE_RESULT_CACHE_DIR>/<dataset version>-r<format>/<namespace>/<params hash>.parquet
+# so one worker's result is reused by the others and survives restarts. The
+# params hash also covers the source file of the cached function, so editing
+# it invalidates its results; changes elsewhere still need a
+# RESULT_FORMAT_VERSION bump.
+# Writes go to a temp file and are renamed into place, so readers never see
+# a partial file; a per-key lock keeps workers from computing the same result
+# at the same time.
+#
+# Use it under st.cache_data, which stays the fast in-process layer:
+#
+#     @st.cache_data(ttl=3600*24)
+#     @persistent_cache("city_view")
+#     def get_city_view(_backend, yr): ...
+
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from dataprep import dataset_version
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; fall back to unlocked compute
+    fcntl = None
+
+CACHE_DIR = os.environ.get(
+    "HOUSE_RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "house_browse_cache")
+)
+ENABLED = os.environ.get("HOUSE_RESULT_CACHE", "1") != "0"
+
+# Bump whenever a cached result changes shape or its helpers in other modules change.
+RESULT_FORMAT_VERSION = 3
+
+
+def cache_version(data_version: str) -> str:
+    return f"{data_version}-r{RESULT_FORMAT_VERSION}"
+
+
+def _version_of(arguments: dict) -> str:
+    """Dataset version from the `_backend` argument if there is one, else the local CSV."""
+    backend = arguments.get("_backend")
+    if backend is not None and hasattr(backend, "version"):
+        return cache_version(backend.version())
+    return cache_version(dataset_version())
+
+
+def _source_hash(func) -> str:
+    """Hash of the file defining func (func's own source as a fallback), so code edits miss the cache."""
+    try:
+        with open(inspect.getsourcefile(func), "rb") as f:
+            source = f.read()
+    except (OSError, TypeError):
+        try:
+            source = inspect.getsource(func).encode("utf-8")
+        except (OSError, TypeError):
+            return "nosource"
+    return hashlib.sha1(source).hexdigest()[:12]
+
+
+def _normalize(value):
+    """numpy scalars -> Python scalars, so np.int64(2020) and 2020 share a key."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return type(value)(_normalize(v) for v in value)
+    return value
+
+
+def _params_key(arguments: dict, source_hash: str = "") -> str:
+    # Like st.cache_data, arguments starting with "_" are not part of the key.
+    items = sorted((k, repr(_normalize(v))) for k, v in arguments.items() if not k.startswith("_"))
+    return hashlib.sha1(repr((source_hash, items)).encode("utf-8")).hexdigest()[:20]
+
+
+def _read(path: str):
+    try:
+        return pd.read_parquet(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: str, frame: pd.DataFrame):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def persistent_cache(namespace: str, cache_dir: str = None):
+    """
+    Decorator: caches a DataFrame-returning function on disk, keyed by dataset
+    version, the source of the function's module and the arguments.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        source_hash = _source_hash(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_dir = os.path.join(cache_dir or CACHE_DIR, _version_of(bound.arguments), namespace)
+            path = os.path.join(key_dir, _params_key(bound.arguments, source_hash) + ".parquet")
+
+            cached = _read(path) if os.path.exists(path) else None
+            if cached is not None:
+                return cached
+
+            os.makedirs(key_dir, exist_ok=True)
+            with open(path + ".lock", "w") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Another worker may have finished while we waited for the lock.
+                cached = _read(path) if os.path.exists(path) else None
+                if cached is not None:
+                    return cached
+
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    _write(path, result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def prune(keep_versions, cache_dir: str = None):
+    """Removes cached results for dataset versions that are no longer served."""
+    root = cache_dir or CACHE_DIR
+    if not os.path.isdir(root):
+        return
+    for entry in os.listdir(root):
+        if entry not in keep_versions:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
@@ -0,0 +1,102 @@
+# similar_zips.py
+# "Similar but affordable" ZIP search with one KD-tree per year.
+#
+# Every ZIP-year row becomes a standardized feature vector:
+#     log price, log per capita income, PTI trend (3-year PTI change, or
+#     1-year where 3 years of history are missing), log land area (ALAND10
+#     from city_geojson; smaller ZCTAs are denser)
+# A query finds the nearest vectors to a ZIP in the same year and keeps the
+# ones under the user's max price, widening k until enough are found.
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+FEATURES = ["log_price", "log_income", "pti_trend", "log_land_area"]
+
+
+def zip_feature_table(zip_prices: pd.DataFrame, zip_changes: pd.DataFrame, centroids: pd.DataFrame) -> pd.DataFrame:
+    """One row per ZIP-year with display columns plus the raw FEATURES."""
+    table = pd.DataFrame({
+        "city_geojson_code": zip_prices["city_geojson_code"].to_numpy(),
+        "zip_code_str": zip_prices["zipcode"].astype(str).str.zfill(5).to_numpy(),
+        "year": zip_prices["year"].astype(int).to_numpy(),
+        "median_sale_price": zip_prices["median_sale_price"].to_numpy(np.float64),
+        "per_capita_income": zip_prices["per_capita_income"].to_numpy(np.float64),
+    })
+    table = table[(table["median_sale_price"] > 0) & (table["per_capita_income"] > 0)].reset_index(drop=True)
+    table["pti"] = table["median_sale_price"] / table["per_capita_income"]
+
+    keys = ["city_geojson_code", "zip_code_str", "year"]
+    trend = (
+        zip_changes[zip_changes["horizon"].isin([1, 3])]
+        .sort_values("horizon")
+        .drop_duplicates(keys, keep="last")  # prefer the 3-year change
+        .set_index(keys)["pti_delta"]
+    )
+    table["pti_trend"] = trend.reindex(pd.MultiIndex.from_frame(table[keys])).to_numpy()
+
+    land_area = centroids.drop_duplicates("zip_code_str").set_index("zip_code_str")["land_area_m2"]
+    table["land_area_m2"] = table["zip_code_str"].map(land_area).to_numpy(np.float64)
+
+    table["log_price"] = np.log(table["median_sale_price"])
+    table["log_income"] = np.log(table["per_capita_income"])
+    table["log_land_area"] = np.log(table["land_area_m2"].where(table["land_area_m2"] > 0))
+    return table
+
+
+class SimilarZipIndex:
+    """Per-year KD-trees over standardized ZIP feature vectors."""
+
+    def __init__(self, table: pd.DataFrame, weights=None):
+        self.table = table
+        raw = table[FEATURES].to_numpy(np.float64)
+        # Missing trend -> no change; missing area -> typical area.
+        fill = np.array([np.nanmedian(raw[:, j]) if j != FEATURES.index("pti_trend") else 0.0
+                         for j in range(len(FEATURES))])
+        raw = np.where(np.isnan(raw), fill, raw)
+        std = raw.std(axis=0)
+        std[std == 0] = 1.0
+        weights = np.ones(len(FEATURES)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.vectors = (raw - raw.mean(axis=0)) / std * weights
+
+        years = table["year"].to_numpy()
+        self.rows = {int(y): np.flatnonzero(years == y) for y in np.unique(years)}
+        self.trees = {y: cKDTree(self.vectors[rows]) for y, rows in self.rows.items()}
+        # A ZIP can be listed under several metros, so rows are keyed by metro too.
+        self._pos = {
+            (m, z, int(y)): i
+            for i, (m, z, y) in enumerate(zip(table["city_geojson_code"].to_numpy(),
+                                              table["zip_code_str"].to_numpy(), years))
+        }
+        self._zips = table["zip_code_str"].to_numpy()
+        self._prices = table["median_sale_price"].to_numpy()
+        self._metros = table["city_geojson_code"].to_numpy()
+
+    @classmethod
+    def build(cls, zip_prices: pd.DataFrame, zip_changes: pd.DataFrame, centroids: pd.DataFrame) -> "SimilarZipIndex":
+        return cls(zip_feature_table(zip_prices, zip_changes, centroids))
+
+    def similar(self, city_geojson_code: str, zip_code: str, year: int, max_price: float = np.inf,
+                k: int = 10, same_metro: bool = False) -> pd.DataFrame:
+        """The k ZIPs closest to zip_code (as listed under city_geojson_code) in `year` that cost less than max_price."""
+        i = self._pos.get((city_geojson_code, zip_code, int(year)))
+        if i is None:
+            return self.table.iloc[:0].assign(distance=[])
+        rows, tree = self.rows[int(year)], self.trees[int(year)]
+
+        n_query = min(4 * k + 1, len(rows))
+        while True:
+            dist, idx = tree.query(self.vectors[i], k=n_query)
+            dist, cand = np.atleast_1d(dist), rows[np.atleast_1d(idx)]
+            # The query ZIP itself is skipped, including its rows under other metros.
+            keep = (self._zips[cand] != zip_code) & (self._prices[cand] < max_price)
+            if same_metro:
+                keep &= self._metros[cand] == self._metros[i]
+            if keep.sum() >= k or n_query == len(rows):
+                break
+            n_query = min(4 * n_query, len(rows))
+
+        result = self.table.iloc[cand[keep][:k]].reset_index(drop=True)
+        result["distance"] = dist[keep][:k]
+        return result
@@ -0,0 +1,232 @@
+# static_site.py
+# Static export of the metro ranking and every metro x year ZIP map,
+# pre-rendered for each PERSONA_DEFAULTS income.
+#
+#     python static_site.py                  # -> static_site/
+#     python static_site.py --out public --workers 4
+#     python -m http.server -d static_site   # any file server works
+#
+# Layout:
+#     static_site/
+#         index.html                         ranking page (year / persona pickers)
+#         metro.html                         map page (?metro=SEA&year=2023&persona=family)
+#         manifest.json                      years, personas, metros; written last
+#         rankings/<year>.json               metro PTI bar chart (Plotly figure JSON)
+#         summaries/<year>.json              per-metro PTI and affordable ZIP counts per persona
+#         geometry/<CODE>.json               compact metro geometry, trimmed to data ZIPs
+#         maps/<CODE>/<year>/<persona>.json  ZIP map (Plotly figure JSON)
+#
+# Figures come from the same builders as the app (figures.py), and the maps
+# read the same ZIP x year table (zip_module.ZipYearTable). Map figures
+# reference their geometry by URL, so plotly.js fetches each metro's shapes
+# once and every year/persona map of that metro reuses them.
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from coldstart import lazy_module
+from dataprep import (
+    load_data, make_city_view_all_years, dataset_version, enable_copy_on_write, RATIO_COL, AFFORDABILITY_THRESHOLD,
+)
+from zip_module import ZipYearTable
+from price_index import zip_year_prices
+from hex_overview import zip_centroids
+from artifacts import load_metro_artifact, geojson_path
+from figures import compact_geojson, metro_ranking_figure, zip_map_figure, map_zoom, ZIP_PROPERTY
+from ui_components import PERSONA_DEFAULTS
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "static_site")
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "site_templates")
+PAGES = ("index.html", "metro.html")
+
+pio = lazy_module("plotly.io")
+
+
+def persona_slug(name: str) -> str:
+    return name.lower().replace(" ", "-")
+
+
+def personas() -> list:
+    """PERSONA_DEFAULTS with URL slugs and the max affordable price under the PTI rule."""
+    return [
+        {
+            "name": name,
+            "slug": persona_slug(name),
+            "income": income,
+            "max_affordable_price": AFFORDABILITY_THRESHOLD * income,
+        }
+        for name, income in PERSONA_DEFAULTS.items()
+    ]
+
+
+def _write_json(path: str, obj) -> None:
+    """Writes plain or numpy-bearing objects (plotly's JSON encoder handles both)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(pio.json.to_json_plotly(obj))
+
+
+# --- Build ---
+def _map_path(out: str, city_geojson_code: str, year: int, slug: str) -> str:
+    map_dir = os.path.join(out, "maps", city_geojson_code, str(year))
+    os.makedirs(map_dir, exist_ok=True)
+    return os.path.join(map_dir, f"{slug}.json")
+
+
+def _build_metro(city_geojson_code: str, rows: pd.DataFrame, out: str, persona_list: list) -> dict:
+    """
+    Worker: writes one metro's geometry and every year x persona map from its
+    ZIP x year rows; returns its summary rows.
+    """
+    t0 = time.perf_counter()
+    metro_artifact = load_metro_artifact(city_geojson_code)
+    geojson = metro_artifact["geojson"] if metro_artifact is not None else None
+    src = geojson_path(city_geojson_code)
+    if geojson is None and os.path.exists(src):
+        with open(src, "r") as f:
+            geojson = json.load(f)
+
+    result = {"city": city_geojson_code, "summary": [], "maps": 0}
+    # Only ZIPs with a polygon can be drawn.
+    rows = rows[rows["lat"].notna()]
+    if rows.empty or geojson is None:
+        result["seconds"] = round(time.perf_counter() - t0, 3)
+        return result
+
+    data_zips = set(rows["zip_code_str"])
+    geojson = compact_geojson(geojson)
+    geojson["features"] = [
+        feat for feat in geojson["features"] if feat["properties"].get(ZIP_PROPERTY) in data_zips
+    ]
+    _write_json(os.path.join(out, "geometry", f"{city_geojson_code}.json"), geojson)
+    # Relative to the pages, which sit at the site root.
+    geometry_url = f"geometry/{city_geojson_code}.json"
+
+    for year, rows_y in rows.groupby("year"):
+        year = int(year)
+        zoom = map_zoom(rows_y["lat"], rows_y["lon"])
+        prices = rows_y["median_sale_price"].to_numpy(np.float64)
+        summary = {"city": city_geojson_code, "year": year, "zip_count": int(len(rows_y))}
+        for persona in persona_list:
+            max_price = persona["max_affordable_price"]
+            fig = zip_map_figure(
+                rows_y, geometry_url, max_price,
+                hover_data={"per_capita_income": ":,.0f"},
+                zoom=zoom,
+            )
+            with open(_map_path(out, city_geojson_code, year, persona["slug"]), "w") as f:
+                f.write(fig.to_json())
+            # Same rule as the map: a ZIP is affordable when price < max affordable price.
+            summary[persona["slug"]] = int((prices < max_price).sum())
+            result["maps"] += 1
+        result["summary"].append(summary)
+
+    result["seconds"] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def _write_year(out: str, year: int, city_view: pd.DataFrame, zip_summary: pd.DataFrame, persona_list: list) -> None:
+    """Ranking figure and per-metro summary for one year."""
+    ranked = city_view.sort_values(RATIO_COL, ascending=True)
+    with open(os.path.join(out, "rankings", f"{year}.json"), "w") as f:
+        f.write(metro_ranking_figure(ranked).to_json())
+
+    summary = ranked.merge(zip_summary, on="city", how="left")
+    metros = []
+    for row in summary.to_dict("records"):
+        zip_count = row.get("zip_count")
+        has_map = zip_count is not None and not pd.isna(zip_count)
+        metros.append({
+            "city": row["city"],
+            "city_full": row["city_full"],
+            "median_sale_price": float(row["Median Sale Price"]),
+            "per_capita_income": float(row["Per Capita Income"]),
+            "pti": float(row[RATIO_COL]),
+            "affordability_rating": row["affordability_rating"],
+            "zip_count": int(zip_count) if has_map else 0,
+            "affordable_zip_count": {
+                p["slug"]: int(row[p["slug"]]) if has_map else 0 for p in persona_list
+            },
+        })
+    _write_json(os.path.join(out, "summaries", f"{year}.json"), {"year": year, "metros": metros})
+
+
+def build_site(df: pd.DataFrame, out: str = DEFAULT_OUTPUT, workers: Optional[int] = None) -> dict:
+    """Writes the whole static site into `out`; returns the manifest."""
+    persona_list = personas()
+    for sub in ("rankings", "summaries", "geometry", "maps"):
+        shutil.rmtree(os.path.join(out, sub), ignore_errors=True)
+        os.makedirs(os.path.join(out, sub))
+
+    codes = sorted(df["city_geojson_code"].dropna().unique())
+    zip_table = ZipYearTable.build(zip_year_prices(df), zip_centroids())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_build_metro, code, zip_table.rows(code), out, persona_list)
+            for code in codes
+        ]
+        city_views = make_city_view_all_years(df)
+        metros = [f.result() for f in futures]
+
+    zip_summary = pd.DataFrame([s for m in metros for s in m["summary"]])
+    if zip_summary.empty:
+        zip_summary = pd.DataFrame(columns=["city", "year", "zip_count", *[p["slug"] for p in persona_list]])
+    years = sorted(int(y) for y in city_views["year"].unique())
+    for year in years:
+        _write_year(
+            out, year,
+            city_views[city_views["year"] == year].drop(columns="year"),
+            zip_summary[zip_summary["year"] == year].drop(columns="year"),
+            persona_list,
+        )
+
+    for page in PAGES:
+        shutil.copyfile(os.path.join(TEMPLATE_DIR, page), os.path.join(out, page))
+
+    # The manifest is written last: the pages read it first, so its presence marks a complete build.
+    city_full = city_views.drop_duplicates("city").set_index("city")["city_full"]
+    manifest = {
+        "dataset_version": dataset_version(),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "affordability_threshold": AFFORDABILITY_THRESHOLD,
+        "years": years,
+        "personas": persona_list,
+        "metros": [
+            {
+                "city": m["city"],
+                "city_full": city_full.get(m["city"], m["city"]),
+                "years": [s["year"] for s in m["summary"]],
+                "maps": m["maps"],
+                "seconds": m["seconds"],
+            }
+            for m in metros
+        ],
+    }
+    _write_json(os.path.join(out, "manifest.json"), manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the ranking and ZIP maps as a static site")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    enable_copy_on_write()
+
+    t0 = time.perf_counter()
+    df = load_data()
+    if df.empty:
+        raise SystemExit("Base data is empty; cannot build the static site.")
+
+    manifest = build_site(df, out=args.out, workers=args.workers)
+    n_maps = sum(m["maps"] for m in manifest["metros"])
+    print(f"Wrote {len(manifest['years'])} rankings and {n_maps} ZIP maps to {args.out} "
+          f"in {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,7 @@
+# conftest.py
+# The app modules are flat scripts in Amber_design3/; make them importable.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,86 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import api_server
+from api_server import ApiError, HousingDataset, ResponseCache, _int_param, dispatch, make_handler
+
+
+def _df():
+    rows = []
+    for code, full, zipcode, price, income in [
+        ("SEA", "Seattle, WA", 98101, 800_000.0, 60_000.0),
+        ("SEA", "Seattle, WA", 98102, 700_000.0, 55_000.0),
+        ("PDX", "Portland, OR", 97201, 500_000.0, 50_000.0),
+    ]:
+        for year in (2022, 2023):
+            rows.append({
+                "city_geojson_code": code, "city_full": full, "zipcode": zipcode, "year": year,
+                "median_sale_price": price * (1.1 if year == 2023 else 1.0), "per_capita_income": income,
+            })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def data():
+    return HousingDataset(_df())
+
+
+@pytest.mark.parametrize("value", ["inf", "-inf", "nan", "1e400", "abc", "43000.5"])
+def test_int_param_rejects_non_finite_and_fractional(value):
+    with pytest.raises(ApiError) as e:
+        _int_param({"income": value}, "income")
+    assert e.value.status == 400
+
+
+def test_rankings_ignore_income(data):
+    payload = dispatch(data, "/rankings", {"year": "2023", "income": "1"})
+    assert payload == dispatch(data, "/rankings", {"year": "2023"})
+    assert [r["city"] for r in payload["rankings"]] == ["PDX", "SEA"]
+
+
+def test_server_returns_400_and_shares_rankings_cache(data):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(data, ResponseCache()))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"{base}/affordability?income=inf")
+        assert e.value.code == 400
+        assert "whole number" in json.loads(e.value.read())["error"]
+
+        with urllib.request.urlopen(f"{base}/rankings?year=2023&income=40000") as r:
+            assert r.headers["X-Cache"] == "miss"
+        with urllib.request.urlopen(f"{base}/rankings?year=2023&income=90000") as r:
+            assert r.headers["X-Cache"] == "hit"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_int_param_accepts_integral_floats():
+    assert _int_param({"income": "43000.0"}, "income") == 43000
+    assert _int_param({"income": "4.3e4"}, "income") == 43000
+
+
+def test_unexpected_errors_return_json_500(data, monkeypatch):
+    def broken(data, params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(api_server.ROUTES, "/metros", broken)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(data, ResponseCache()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metros")
+        assert e.value.code == 500
+        assert json.loads(e.value.read()) == {"error": "Internal server error."}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,40 @@
+import json
+
+import pandas as pd
+
+from artifacts import build_artifacts, geojson_path, load_city_view_artifact, load_metro_artifact
+
+
+def _df(zips):
+    return pd.DataFrame({
+        "city_geojson_code": ["BOS"] * 4,
+        "city_full": ["Boston, MA"] * 4,
+        "zipcode": [int(zips[0]), int(zips[0]), int(zips[1]), int(zips[1])],
+        "year": [2022, 2023, 2022, 2023],
+        "median_sale_price": [600_000.0, 650_000.0, 700_000.0, None],
+        "per_capita_income": [60_000.0, 62_000.0, 70_000.0, 71_000.0],
+    })
+
+
+def test_build_and_load_metro_artifact(tmp_path):
+    with open(geojson_path("BOS")) as f:
+        zips = [feat["properties"]["ZCTA5CE10"] for feat in json.load(f)["features"][:2]]
+    base = build_artifacts(_df(zips), root=str(tmp_path), workers=1)
+
+    with open(f"{base}/manifest.json") as f:
+        manifest = json.load(f)
+    assert manifest["metros"][0]["features"] == 2
+
+    artifact = load_metro_artifact("BOS", root=str(tmp_path))
+    assert set(artifact) == {"history", "geojson"}
+    assert sorted(feat["properties"]["ZCTA5CE10"] for feat in artifact["geojson"]["features"]) == sorted(zips)
+    assert load_metro_artifact("SEA", root=str(tmp_path)) is None
+
+
+def test_artifacts_are_keyed_on_the_backend_version(tmp_path):
+    build_artifacts(_df(["02108", "02109"]), root=str(tmp_path), workers=1, version="csv-v1")
+    assert load_city_view_artifact(root=str(tmp_path), version="csv-v1") is not None
+    assert load_metro_artifact("BOS", root=str(tmp_path), version="csv-v1") is not None
+    # A backend over other data (different version) gets no artifacts.
+    assert load_city_view_artifact(root=str(tmp_path), version="warehouse-v7") is None
+    assert load_metro_artifact("BOS", root=str(tmp_path), version="warehouse-v7") is None
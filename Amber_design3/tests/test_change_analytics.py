@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from change_analytics import ChangeRankings, zip_change_table
+
+
+def _zip_prices():
+    # Two ZIPs over 2019-2021; 02134 gets less affordable, 98101 more.
+    return pd.DataFrame({
+        "city_geojson_code": ["SEA"] * 3 + ["BOS"] * 3,
+        "zipcode": [98101] * 3 + [2134] * 3,
+        "year": [2019, 2020, 2021] * 2,
+        "median_sale_price": [500_000.0, 500_000.0, 450_000.0, 400_000.0, 440_000.0, 600_000.0],
+        "per_capita_income": [50_000.0, 50_000.0, 60_000.0, 40_000.0, 40_000.0, 40_000.0],
+    })
+
+
+def test_change_table_keeps_key_columns_and_growth():
+    table = zip_change_table(_zip_prices())
+    assert list(table.columns[:2]) == ["city_geojson_code", "zip_code_str"]
+
+    row = table[(table["zip_code_str"] == "02134") & (table["year"] == 2020) & (table["horizon"] == 1)].iloc[0]
+    assert row["city_geojson_code"] == "BOS"
+    assert np.isclose(row["price_growth"], 0.10)
+    assert np.isclose(row["income_growth"], 0.0)
+    assert np.isclose(row["pti_delta"], 11.0 - 10.0)
+
+
+def test_rankings_order_by_pti_delta():
+    rankings = ChangeRankings(zip_change_table(_zip_prices()))
+    worsening = rankings.rank(2021, 1, n=2, worsening=True)
+    assert list(worsening["zip_code_str"]) == ["02134", "98101"]
+    improving = rankings.rank(2021, 1, n=1, worsening=False)
+    assert improving["zip_code_str"].iloc[0] == "98101"
+    assert rankings.horizons(2021) == [1]
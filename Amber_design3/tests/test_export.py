@@ -0,0 +1,40 @@
+import io
+
+import pandas as pd
+import pytest
+
+from export import EXPORT_FORMATS, ExportTooLarge, encode_to_bytes, iter_frame_chunks, row_index
+
+
+def _frame():
+    return pd.DataFrame({
+        "city_geojson_code": ["SEA", "PDX", "SEA", "NYC", "SEA"],
+        "year": [2022, 2022, 2023, 2023, 2023],
+        "median_sale_price": [500_000.0, 450_000.0, 520_000.0, 900_000.0, 510_000.0],
+    })
+
+
+def test_encode_to_bytes_round_trips_every_format():
+    df = _frame()
+    rows = row_index(df, year=2023, city_codes=["SEA"])
+    expected = df.iloc[rows].reset_index(drop=True)
+    readers = {"csv": pd.read_csv, "parquet": pd.read_parquet}
+    for fmt, (encode, _) in EXPORT_FORMATS.items():
+        data = encode_to_bytes(encode(iter_frame_chunks(df, rows, chunk_rows=1)))
+        assert isinstance(data, bytes)
+        pd.testing.assert_frame_equal(readers[fmt](io.BytesIO(data)), expected, check_dtype=False)
+
+
+def test_encode_to_bytes_stops_at_the_size_cap():
+    df = pd.DataFrame({"median_sale_price": range(10_000)})
+    produced = []
+
+    def chunks():
+        for chunk in iter_frame_chunks(df, chunk_rows=1_000):
+            produced.append(len(chunk))
+            yield chunk
+
+    with pytest.raises(ExportTooLarge):
+        encode_to_bytes(EXPORT_FORMATS["csv"][0](chunks()), max_bytes=2_000)
+    # Encoding stopped at the first chunk over the cap instead of running to the end.
+    assert len(produced) < 10
@@ -0,0 +1,28 @@
+import plotly.io as pio
+import pytest
+
+import figures
+
+
+@pytest.fixture
+def restore_engine():
+    engine = pio.json.config.default_engine
+    yield
+    pio.json.config._default_engine = engine
+
+
+def _missing_orjson(cls):
+    raise ValueError("The orjson engine requires the orjson package")
+
+
+def test_use_fast_json_engine_falls_back_without_orjson(restore_engine, monkeypatch):
+    pio.json.config._default_engine = "json"
+    monkeypatch.setattr(type(pio.json.config), "validate_orjson", classmethod(_missing_orjson))
+    assert figures.use_fast_json_engine() is False
+    assert pio.json.config.default_engine == "json"
+
+
+def test_use_fast_json_engine_sets_orjson(restore_engine):
+    pytest.importorskip("orjson")
+    assert figures.use_fast_json_engine() is True
+    assert pio.json.config.default_engine == "orjson"
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from hex_overview import HexOverview
+
+
+def _centroids():
+    return pd.DataFrame({
+        "zip_code_str": ["98101", "98102", "97201", "10001"],
+        "city_geojson_code": ["SEA", "SEA", "PDX", "NYC"],
+        "lat": [47.61, 47.63, 45.51, 40.75],
+        "lon": [-122.33, -122.32, -122.69, -73.99],
+        "land_area_m2": [1e6, 2e6, 3e6, 4e6],
+    })
+
+
+def test_overview_builds_named_cells():
+    overview = HexOverview(_centroids(), resolutions={"Coarse": 1.2})
+    cells = overview.layers["Coarse"]["cells"]
+    assert list(cells.columns[:2]) == ["q", "r"]
+    # Seattle's two ZIPs share a cell; Portland and New York get their own.
+    assert len(cells) == 3
+    assert len(overview.layers["Coarse"]["geojson"]["features"]) == 3
+
+
+def test_aggregate_counts_and_affordable_share():
+    overview = HexOverview(_centroids(), resolutions={"Coarse": 1.2})
+    prices = pd.DataFrame({
+        "city_geojson_code": ["SEA", "SEA", "PDX", "NYC"],
+        "zipcode": [98101, 98102, 97201, 10001],
+        "median_sale_price": [400_000.0, 800_000.0, 300_000.0, 900_000.0],
+        "per_capita_income": [50_000.0, 50_000.0, 40_000.0, 60_000.0],
+    })
+    agg = overview.aggregate(prices, "Coarse", max_price=500_000.0)
+    sea = agg[agg["top_metro"] == "SEA"].iloc[0]
+    assert sea["zip_count"] == 2
+    assert sea["affordable_share"] == 0.5
+    assert np.isclose(sea["median_pti"], 12.0)
+    assert agg["zip_count"].sum() == 4
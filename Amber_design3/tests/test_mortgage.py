@@ -0,0 +1,17 @@
+import numpy as np
+
+from mortgage import RATE_GRID, MortgageScenario, affordability_grid, price_multiple
+
+
+def test_rate_grid_covers_the_rate_slider():
+    assert RATE_GRID[0] == 0.0 and RATE_GRID[-1] == 12.0
+    assert MortgageScenario().rate_pct in RATE_GRID
+
+
+def test_grid_rows_match_direct_scenarios_at_the_edges():
+    prices = np.sort(np.linspace(100_000, 1_500_000, 200))
+    scenario = MortgageScenario()
+    grid = affordability_grid(prices, scenario).set_index(["rate_pct", "income"])
+    for rate in (0.0, 12.0):
+        max_price = price_multiple(scenario.budget_pct, rate, scenario.down_payment_pct, scenario.term_years) * 100_000
+        assert grid.loc[(rate, 100_000.0), "affordable_zips"] == np.searchsorted(prices, max_price, side="left")
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from price_distribution import PRICE_BIN_EDGES, PriceDistributions
+
+
+def _zip_prices():
+    rng = np.random.default_rng(7)
+    rows = []
+    for code in ("SEA", "PDX"):
+        for year in (2022, 2023):
+            for i, price in enumerate(rng.lognormal(np.log(500_000), 0.4, size=40)):
+                rows.append((code, 98000 + i, year, price, 50_000.0))
+    return pd.DataFrame(rows, columns=["city_geojson_code", "zipcode", "year", "median_sale_price", "per_capita_income"])
+
+
+def test_affordable_share_is_exact():
+    zip_prices = _zip_prices()
+    dist = PriceDistributions.from_zip_prices(zip_prices)
+    # A budget strictly inside a bin, where interpolating the counts would be off.
+    max_price = float(np.sqrt(PRICE_BIN_EDGES[33] * PRICE_BIN_EDGES[34]))
+    bands = dist.quantile_bands(2023, max_price).set_index("city")
+
+    rows = zip_prices[zip_prices["year"] == 2023]
+    expected = (rows["median_sale_price"] < max_price).groupby(rows["city_geojson_code"]).mean()
+    assert np.allclose(bands["affordable_share"], expected.reindex(bands.index))
+    assert (bands["zip_count"] == 40).all()
+
+
+def test_quantile_bands_unknown_year_is_empty():
+    assert PriceDistributions.from_zip_prices(_zip_prices()).quantile_bands(1999, 1e6).empty
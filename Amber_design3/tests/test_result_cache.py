@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+import result_cache
+from result_cache import _params_key, _source_hash, persistent_cache
+
+
+def test_numpy_scalars_share_a_key_with_python_scalars():
+    assert _params_key({"yr": np.int64(2020)}) == _params_key({"yr": 2020})
+    assert _params_key({"codes": (np.str_("SEA"), "PDX")}) == _params_key({"codes": ("SEA", "PDX")})
+    assert _params_key({"yr": 2020}) != _params_key({"yr": 2021})
+    assert _params_key({"yr": 2020}, "a") != _params_key({"yr": 2020}, "b")
+
+
+def test_source_hash_follows_the_defining_file():
+    assert _source_hash(_params_key) == _source_hash(persistent_cache)
+    assert _source_hash(_params_key) != _source_hash(test_source_hash_follows_the_defining_file)
+
+
+def test_persistent_cache_reuses_results_across_scalar_types(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    calls = []
+
+    @persistent_cache("toy", cache_dir=str(tmp_path))
+    def toy(_backend, yr):
+        calls.append(yr)
+        return pd.DataFrame({"year": [int(yr)]})
+
+    class Backend:
+        def version(self):
+            return "v1"
+
+    first = toy(Backend(), 2020)
+    again = toy(Backend(), np.int64(2020))
+    assert calls == [2020]
+    pd.testing.assert_frame_equal(first, again)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from change_analytics import zip_change_table
+from similar_zips import SimilarZipIndex
+
+
+def _inputs():
+    # 98101 and 97201 are near twins; 10001 is far pricier, 73301 far cheaper with a falling PTI.
+    profiles = {
+        ("SEA", 98101): (500_000.0, 50_000.0, 0.05, 2.0e6),
+        ("PDX", 97201): (490_000.0, 49_000.0, 0.05, 2.1e6),
+        ("NYC", 10001): (1_500_000.0, 90_000.0, 0.15, 0.5e6),
+        ("AUS", 73301): (200_000.0, 40_000.0, -0.05, 9.0e6),
+    }
+    rows, centroids = [], []
+    for (code, zipcode), (price, income, growth, area) in profiles.items():
+        for i, year in enumerate(range(2018, 2022)):
+            rows.append((code, zipcode, year, price * (1 + growth) ** i, income))
+        centroids.append((f"{zipcode:05d}", code, 0.0, 0.0, area))
+    zip_prices = pd.DataFrame(
+        rows, columns=["city_geojson_code", "zipcode", "year", "median_sale_price", "per_capita_income"]
+    )
+    centroids = pd.DataFrame(centroids, columns=["zip_code_str", "city_geojson_code", "lat", "lon", "land_area_m2"])
+    return zip_prices, zip_change_table(zip_prices), centroids
+
+
+def test_build_from_zip_change_table_uses_trend():
+    index = SimilarZipIndex.build(*_inputs())
+    table = index.table.set_index(["zip_code_str", "year"])
+    # 2021 has a 3-year change; 2019 only a 1-year one; 2018 none.
+    assert np.isclose(table.loc[("98101", 2021), "pti_trend"], (500_000 * 1.05 ** 3 - 500_000) / 50_000)
+    assert np.isclose(table.loc[("98101", 2019), "pti_trend"], (500_000 * 0.05) / 50_000)
+    assert np.isnan(table.loc[("98101", 2018), "pti_trend"])
+
+
+def test_nearest_neighbour_is_the_twin():
+    index = SimilarZipIndex.build(*_inputs())
+    similar = index.similar("SEA", "98101", 2021, k=3)
+    assert list(similar["zip_code_str"]) == ["97201", "73301", "10001"]
+    assert (similar["distance"].diff().dropna() >= 0).all()
+
+    # Budget below the twin's price: the twin drops out, the pricier ZIP too.
+    under_budget = index.similar("SEA", "98101", 2021, max_price=400_000, k=3)
+    assert list(under_budget["zip_code_str"]) == ["73301"]
+    assert index.similar("SEA", "98101", 2021, k=3, same_metro=True).empty
+
+
+def test_zip_listed_under_two_metros_is_looked_up_per_metro():
+    zip_prices, _, centroids = _inputs()
+    # 10001 also listed under a second metro, priced like the SEA/PDX twins.
+    extra = zip_prices[zip_prices["zipcode"] == 98101].assign(city_geojson_code="JRS", zipcode=10001)
+    zip_prices = pd.concat([zip_prices, extra], ignore_index=True)
+    index = SimilarZipIndex.build(zip_prices, zip_change_table(zip_prices), centroids)
+
+    nyc = index.similar("NYC", "10001", 2021, k=1)
+    jrs = index.similar("JRS", "10001", 2021, k=1)
+    assert list(jrs["zip_code_str"]) == ["98101"]
+    # The JRS listing is priced like 98101; the NYC listing is far from every other ZIP.
+    assert jrs["distance"].iloc[0] < nyc["distance"].iloc[0]
+    # Neither lookup returns the query ZIP's other listing.
+    assert "10001" not in set(index.similar("NYC", "10001", 2021, k=5)["zip_code_str"])
@@ -0,0 +1,37 @@
+import os
+
+import components.zip_map as zip_map
+
+
+def _geojson(zip_code):
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"ZCTA5CE10": zip_code},
+         "geometry": {"type": "Point", "coordinates": [-122.3, 47.6]}},
+    ]}
+
+
+def test_geometry_file_is_content_hashed_outside_the_package(tmp_path, monkeypatch):
+    monkeypatch.setattr(zip_map, "GEOMETRY_DIR", str(tmp_path / "geo"))
+    url = zip_map.geometry_file(_geojson("98101"))
+    assert url == zip_map.geometry_file(_geojson("98101"))
+    assert url != zip_map.geometry_file(_geojson("98102"))
+    assert os.path.exists(tmp_path / url)
+    assert not os.path.exists(os.path.join(zip_map.FRONTEND_DIR, "geo"))
+    assert os.path.exists(os.path.join(zip_map.SERVE_DIR, "index.html"))
+
+
+def test_data_key_covers_every_price(monkeypatch):
+    calls = []
+    monkeypatch.setattr(zip_map, "_component", lambda **kwargs: calls.append(kwargs))
+
+    def render(prices, income=50_000):
+        zip_map.zip_affordability_map(
+            [f"{i:05d}" for i in range(len(prices))], prices, income=income, affordability_multiple=5.0,
+            geometry_url="geo/x.json", colorscale=[], center={"lat": 0, "lon": 0}, zoom=9,
+        )
+        return calls[-1]["data_key"]
+
+    prices = [100_000.0 + i for i in range(80)]
+    changed = prices[:60] + [1.0] + prices[61:]
+    assert render(prices) == render(prices, income=90_000)
+    assert render(prices) != render(changed)
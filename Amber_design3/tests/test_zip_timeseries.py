@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from zip_timeseries import ZipTimeSeriesStore, to_month_index
+
+
+def _monthly_rows(seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2019-01-01", "2021-12-01", freq="MS")
+    rows = []
+    for zipcode in (98101, 98102, 2134):
+        for date in dates:
+            rows.append((zipcode, date.strftime("%Y-%m-%d"), date.year,
+                         rng.uniform(2e5, 9e5), rng.uniform(3e4, 9e4)))
+    df = pd.DataFrame(rows, columns=["zipcode", "date", "year", "median_sale_price", "per_capita_income"])
+    # Shuffled input: the store must sort by (ZIP, month) itself.
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def test_to_month_index_accepts_series():
+    months = to_month_index(pd.Series(["2000-01-15", "2001-03-01"]))
+    assert list(months) == [0, 14]
+
+
+def test_store_round_trips_every_zip_history():
+    df = _monthly_rows()
+    store = ZipTimeSeriesStore.from_rows(df)
+
+    reference = df.assign(
+        zip=df["zipcode"].astype(str).str.zfill(5),
+        date=pd.to_datetime(df["date"]),
+    ).sort_values(["zip", "date"])
+    assert len(store) == reference["zip"].nunique()
+    for zip_code, group in reference.groupby("zip"):
+        frame = store.frame(zip_code)
+        assert list(frame["date"]) == list(group["date"])
+        np.testing.assert_allclose(frame["median_sale_price"], group["median_sale_price"], rtol=1e-6)
+        np.testing.assert_allclose(frame["per_capita_income"], group["per_capita_income"], rtol=1e-6)
+
+
+def test_price_change_matches_reference():
+    df = _monthly_rows()
+    store = ZipTimeSeriesStore.from_rows(df)
+    prices = df.assign(zip=df["zipcode"].astype(str).str.zfill(5)).set_index(["zip", "date"])["median_sale_price"]
+
+    zips = ["98101", "02134", "99999"]
+    change = store.price_change(zips, end_year=2021)
+    for zip_code, value in zip(zips[:2], change[:2]):
+        expected = prices[(zip_code, "2021-12-01")] / prices[(zip_code, "2020-12-01")] - 1.0
+        assert np.isclose(value, expected, rtol=1e-5)
+    assert np.isnan(change[2])
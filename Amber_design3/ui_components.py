@@ -3,6 +3,8 @@
 
 import streamlit as st
 
+from mortgage import MortgageScenario, RATE_GRID
+
 # New default income values
 PERSONA_DEFAULTS = {
     "Student": 34000,
@@ -48,7 +50,7 @@ def get_income_and_persona_logic():
     return final_income, persona
 
 
-def render_affordability_summary_card(final_income, persona, max_affordable_price):
+def render_affordability_summary_card(final_income, persona, max_affordable_price, basis="PTI thresholds"):
     """
     Renders just the Affordability Summary Card.
     """
@@ -64,7 +66,7 @@ def render_affordability_summary_card(final_income, persona, max_affordable_pric
             ">
             <p style="margin:0.1rem 0;"><strong>Profile:</strong> {persona}</p>
             <p style="margin:0.1rem 0;"><strong>Household income:</strong> ${int(final_income):,}</p> <!-- Change label here -->
-            <p style="margin:0.1rem 0;"><strong>Max Affordable Price (from PTI thresholds):</strong> ≈ ${max_affordable_price:,.0f}</p> 
+            <p style="margin:0.1rem 0;"><strong>Max Affordable Price (from {basis}):</strong> ≈ ${max_affordable_price:,.0f}</p> 
         </div>
         """,
         unsafe_allow_html=True,
@@ -107,6 +109,32 @@ def persona_income_slider(final_income, persona):
     # st.markdown("---") # Separator
 
 
+def mortgage_scenario_controls():
+    """
+    Renders the mortgage-payment scenario inputs.
+    Returns a MortgageScenario, or None while the PTI rule is selected.
+    """
+    defaults = MortgageScenario()
+    with st.expander("Mortgage payment scenario"):
+        use_mortgage = st.toggle(
+            "Judge affordability by monthly mortgage payment",
+            key="mortgage_rule_toggle",
+            help="Instead of a fixed price-to-income multiple, a home is affordable when "
+                 "principal + interest fits within the chosen share of income.",
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            budget_pct = st.slider("Budget (% of income)", 10, 50, int(defaults.budget_pct), step=1, key="mortgage_budget_pct")
+            rate_pct = st.slider("Interest rate (%)", float(RATE_GRID[0]), float(RATE_GRID[-1]), defaults.rate_pct,
+                                 step=0.125, key="mortgage_rate_pct")
+        with col2:
+            down_payment_pct = st.slider("Down payment (%)", 0, 50, int(defaults.down_payment_pct), step=1, key="mortgage_down_pct")
+            term_years = st.selectbox("Term (years)", [30, 20, 15], key="mortgage_term_years")
+    if not use_mortgage:
+        return None
+    return MortgageScenario(float(budget_pct), float(rate_pct), float(down_payment_pct), int(term_years))
+
+
 # def render_manual_input_and_summary(final_income, persona, max_affordable_price):
 #     """
 #     Renders the Manual Input, Tip, and Affordability Summary Card.
@@ -0,0 +1,82 @@
+# warmup.py
+# Container-start warm-up, run before `streamlit run app.py` (see app.yaml).
+#
+#     python warmup.py --build-artifacts --report coldstart_report.json
+#
+# Fills everything that lives outside a single Streamlit process, so a new pod
+# serves its first session at warm speed:
+#   - bytecode + OS page cache for the heavy imports (pandas, plotly)
+#   - the data backend (CSV read / SQLite file / warehouse connection)
+#   - the per-metro artifacts (artifacts.py), if they are missing
+#   - the shared result cache (result_cache.py): stale dataset versions are pruned
+
+import argparse
+import importlib
+import logging
+import time
+
+from coldstart import PROCESS_T0, record_timing, timed, timings, write_report
+
+HEAVY_MODULES = ["numpy", "pandas", "plotly.express", "streamlit"]
+
+
+def warm_imports():
+    for name in HEAVY_MODULES:
+        with timed(f"import:{name}"):
+            importlib.import_module(name)
+
+
+def warm_backend():
+    from data_backend import get_backend
+    from price_index import PriceIndex
+    from result_cache import cache_version, prune
+
+    with timed("backend:init"):
+        backend = get_backend()
+    with timed("result_cache:prune"):
+        prune({cache_version(backend.version())})
+    with timed("backend:years"):
+        years = backend.years()
+    with timed("backend:city_views"):
+        backend.city_views()
+    with timed("backend:price_index"):
+        PriceIndex.from_zip_prices(backend.zip_year_prices())
+    return years, backend.version()
+
+
+def warm_artifacts(backend_version: str):
+    from artifacts import artifacts_available, build_artifacts
+    from dataprep import load_data, dataset_version
+
+    # Artifacts come from the local CSV; the app skips them for a backend serving other data.
+    if backend_version != dataset_version() or artifacts_available():
+        record_timing("artifacts:build", 0.0)
+        return
+    with timed("artifacts:build"):
+        df = load_data()
+        if not df.empty:
+            build_artifacts(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm caches before starting the app")
+    parser.add_argument("--build-artifacts", action="store_true",
+                        help="Build per-metro artifacts if none exist for this dataset")
+    parser.add_argument("--report", default=None, help="Write timings as JSON to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    from dataprep import enable_copy_on_write
+
+    enable_copy_on_write()
+
+    warm_imports()
+    years, backend_version = warm_backend()
+    if args.build_artifacts:
+        warm_artifacts(backend_version)
+    record_timing("warmup:total", time.perf_counter() - PROCESS_T0)
+
+    if args.report:
+        write_report(args.report)
+    print(f"Warm-up done ({len(years)} years of data): {timings()}")
@@ -118,27 +118,7 @@ import pandas as pd
 import numpy as np
 import os
 import json
-import pgeocode
-from dataprep import RATIO_COL, RATIO_COL_ZIP, AFFORDABILITY_CATEGORIES 
-
-
-# Helper function (copied from dataprep.py)
-def classify_affordability_zip(ratio: float) -> str:
-    """Classifies a price-to-income ratio using imported constants."""
-    if pd.isna(ratio): return "N/A"
-    
-    sorted_categories = sorted(AFFORDABILITY_CATEGORIES.items(), 
-                               key=lambda item: item[1][1] if item[1][1] is not None else float('inf'))
-
-    for category, (lower, upper) in sorted_categories:
-        if category == "Affordable":
-            if ratio <= upper: return category
-        elif lower is not None and upper is not None:
-            if lower < ratio <= upper: return category
-        elif lower is not None and upper is not None:
-            if lower < ratio <= upper: return category
-            
-    return "Uncategorized"
+from dataprep import RATIO_COL, RATIO_COL_ZIP, classify_affordability
 
 
 @st.cache_data(ttl=3600)
@@ -152,7 +132,7 @@ def load_city_zip_data(city_geojson_code: str, df_full: pd.DataFrame, max_pci: f
     using the GeoJSON code (e.g., ATL). All ZIP codes are included.
     """
     # 1. Filter by City (GeoJSON Code) only - no income filtering
-    df_city_zip = df_full[df_full["city_geojson_code"] == city_geojson_code].copy()
+    df_city_zip = df_full[df_full["city_geojson_code"] == city_geojson_code]
 
 
     # Ensure the required columns exist for subsequent steps
@@ -161,47 +141,72 @@ def load_city_zip_data(city_geojson_code: str, df_full: pd.DataFrame, max_pci: f
         if col not in df_city_zip.columns:
             return pd.DataFrame() 
 
-    # Ensure zip code columns exist
-    df_city_zip["zip_code_int"] = df_city_zip["zipcode"].astype(str).str.zfill(5)
-    df_city_zip["zip_code_str"] = df_city_zip["zipcode"].astype(str).str.zfill(5)
+    return add_zip_code_columns(df_city_zip)
+
 
-    return df_city_zip
+def add_zip_code_columns(df_city_zip: pd.DataFrame) -> pd.DataFrame:
+    """Adds the 5-digit zip_code_str / zip_code_int columns the map expects."""
+    # Ensure zip code columns exist (on a new frame; the input is left untouched)
+    zip_str = df_city_zip["zipcode"].astype(str).str.zfill(5)
+    return df_city_zip.assign(zip_code_int=zip_str, zip_code_str=zip_str)
 
 
-@st.cache_data(ttl=3600*24)
-def get_zip_coordinates(df_zip_data: pd.DataFrame) -> pd.DataFrame:
+# --- ZIP x year aggregate ---
+def zip_year_table(zip_prices: pd.DataFrame, centroids: pd.DataFrame = None) -> pd.DataFrame:
     """
-    Enriches ZIP-level data with coordinates and unconditionally calculates the ratio AND rating.
+    One row per metro/ZIP/year from zip_year_prices() rows, with PTI, rating and
+    the ZIP polygon centroid (lat/lon are NaN for ZIPs without a polygon, or
+    when no centroids are given). Sorted by metro, year and ZIP.
     """
-    if df_zip_data.empty:
-        return pd.DataFrame()
-
-    out = df_zip_data.copy()
-    
-    # Use pgeocode for coordinates
-    nomi = pgeocode.Nominatim("us")
-    
-    # Extract list of zip codes
-    zip_list = out["zip_code_str"].tolist()
-    
-    # Query pgeocode for all ZIPs
-    geo_df = nomi.query_postal_code(zip_list)
-    
-    # Add lat/lon back to DataFrame
-    out["lat"] = geo_df["latitude"].values
-    out["lon"] = geo_df["longitude"].values
-
-    out = out.dropna(subset=["lat", "lon"]).copy()
-
-    # Calculate ratio using standardized lowercase columns
-    price_col = "median_sale_price"
-    income_col = "per_capita_income"
-    denom = out[income_col].replace(0, np.nan)
-    
-    out[RATIO_COL] = out[price_col] / denom # Generates 'price_to_income_ratio'
-    out["affordability_rating"] = out[RATIO_COL].apply(classify_affordability_zip) # Generates rating
-    
-    # Ensure zip_code_int exists for Plotly location lookup
-    out["zip_code_int"] = out["zip_code_str"].astype(int)
-    
-    return out
+    table = pd.DataFrame({
+        "city_geojson_code": zip_prices["city_geojson_code"].to_numpy(),
+        "zipcode": zip_prices["zipcode"].to_numpy(),
+        "year": zip_prices["year"].astype(int).to_numpy(),
+        "median_sale_price": zip_prices["median_sale_price"].to_numpy(np.float64),
+        "per_capita_income": zip_prices["per_capita_income"].to_numpy(np.float64),
+    })
+    zip_str = table["zipcode"].astype(str).str.zfill(5)
+    ratio = table["median_sale_price"] / table["per_capita_income"].replace(0, np.nan)
+    table = table.assign(**{
+        "zip_code_str": zip_str,
+        "zip_code_int": zip_str.astype(int),
+        RATIO_COL: ratio,
+        "affordability_rating": ratio.apply(classify_affordability),
+    })
+
+    if centroids is not None:
+        centroid = centroids.drop_duplicates("zip_code_str").set_index("zip_code_str")
+        table = table.assign(lat=zip_str.map(centroid["lat"]), lon=zip_str.map(centroid["lon"]))
+    else:
+        table = table.assign(lat=np.nan, lon=np.nan)
+    return table.sort_values(["city_geojson_code", "year", "zip_code_str"], ignore_index=True)
+
+
+class ZipYearTable:
+    """zip_year_table() with O(1) metro and metro/year slices."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        keys = frame[["city_geojson_code", "year"]]
+        starts = np.flatnonzero((keys != keys.shift()).any(axis=1).to_numpy())
+        ends = np.append(starts[1:], len(frame))
+        codes, years = frame["city_geojson_code"].to_numpy(), frame["year"].to_numpy()
+        self.slices = {
+            (codes[s], int(years[s])): (int(s), int(e)) for s, e in zip(starts, ends)
+        }
+        self.metro_slices = {}
+        for (code, _), (s, e) in self.slices.items():
+            lo, hi = self.metro_slices.get(code, (s, e))
+            self.metro_slices[code] = (min(lo, s), max(hi, e))
+
+    @classmethod
+    def build(cls, zip_prices: pd.DataFrame, centroids: pd.DataFrame = None) -> "ZipYearTable":
+        return cls(zip_year_table(zip_prices, centroids))
+
+    def rows(self, city_geojson_code: str, year: int = None) -> pd.DataFrame:
+        """One metro's ZIP-year rows (every year when year is None)."""
+        if year is None:
+            start, end = self.metro_slices.get(city_geojson_code, (0, 0))
+        else:
+            start, end = self.slices.get((city_geojson_code, int(year)), (0, 0))
+        return self.frame.iloc[start:end]
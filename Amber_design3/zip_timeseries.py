@@ -0,0 +1,120 @@
+# zip_timeseries.py
+# Compact per-ZIP time-series store (CSR layout).
+#
+# All observations for a metro live in one contiguous structured array,
+# sorted by (ZIP, month):
+#     month  int16   months since 2000-01
+#     price  float32 median sale price
+#     income float32 per capita income
+# i.e. 10 bytes per observation. offsets[i]:offsets[i + 1] is the slice of
+# the i-th ZIP, so a ZIP's full history is a dict lookup plus a slice view.
+
+import numpy as np
+import pandas as pd
+
+MONTH_EPOCH_YEAR = 2000
+OBS_DTYPE = np.dtype([("month", "<i2"), ("price", "<f4"), ("income", "<f4")])
+
+
+def to_month_index(dates) -> np.ndarray:
+    """Dates -> months since 2000-01 (int)."""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    return np.asarray((dates.year - MONTH_EPOCH_YEAR) * 12 + (dates.month - 1))
+
+
+def month_index_to_timestamp(months: np.ndarray) -> pd.Series:
+    months = np.asarray(months, dtype=np.int64)
+    return pd.to_datetime({
+        "year": MONTH_EPOCH_YEAR + months // 12,
+        "month": months % 12 + 1,
+        "day": 1,
+    })
+
+
+class ZipTimeSeriesStore:
+    """Offset-indexed contiguous time series for every ZIP of a metro."""
+
+    def __init__(self, zips: np.ndarray, offsets: np.ndarray, obs: np.ndarray):
+        self.zips = zips          # sorted 5-char ZIP strings
+        self.offsets = offsets    # int64, len(zips) + 1
+        self.obs = obs            # OBS_DTYPE, sorted by (zip, month)
+        self._pos = {z: i for i, z in enumerate(zips)}
+        # (zip position, month) packed into one monotonic key for vectorized lookups
+        zip_pos = np.repeat(np.arange(len(zips), dtype=np.int64), np.diff(offsets))
+        self._keys = zip_pos * 100_000 + obs["month"].astype(np.int64)
+
+    @classmethod
+    def from_rows(cls, df_zip: pd.DataFrame) -> "ZipTimeSeriesStore":
+        """Builds from monthly ZIP rows (zipcode/zip_code_str, date or year, price, income)."""
+        if "zip_code_str" in df_zip.columns:
+            zip_str = df_zip["zip_code_str"].astype(str)
+        else:
+            zip_str = df_zip["zipcode"].astype(str).str.zfill(5)
+        if "date" in df_zip.columns:
+            months = to_month_index(df_zip["date"])
+        else:
+            # Year-level data only: place each observation mid-year.
+            months = (df_zip["year"].to_numpy() - MONTH_EPOCH_YEAR) * 12 + 6
+
+        table = pd.DataFrame({
+            "zip": zip_str.to_numpy(),
+            "month": months,
+            "price": df_zip["median_sale_price"].to_numpy(),
+            "income": df_zip["per_capita_income"].to_numpy(),
+        }).dropna(subset=["price"])
+        table = table.sort_values(["zip", "month"], kind="stable", ignore_index=True)
+
+        obs = np.empty(len(table), dtype=OBS_DTYPE)
+        obs["month"] = table["month"].to_numpy()
+        obs["price"] = table["price"].to_numpy()
+        obs["income"] = table["income"].to_numpy()
+
+        zip_values = table["zip"].to_numpy()
+        is_start = np.ones(len(zip_values), dtype=bool)
+        is_start[1:] = zip_values[1:] != zip_values[:-1]
+        starts = np.flatnonzero(is_start)
+        offsets = np.append(starts, len(zip_values)).astype(np.int64)
+        return cls(zip_values[starts], offsets, obs)
+
+    def __len__(self) -> int:
+        return len(self.zips)
+
+    @property
+    def nbytes(self) -> int:
+        return self.obs.nbytes + self.offsets.nbytes
+
+    def series(self, zip_code: str) -> np.ndarray:
+        """Structured-array view of one ZIP's history (empty if unknown)."""
+        i = self._pos.get(zip_code)
+        if i is None:
+            return self.obs[:0]
+        return self.obs[self.offsets[i]:self.offsets[i + 1]]
+
+    def frame(self, zip_code: str) -> pd.DataFrame:
+        """One ZIP's history as a small DataFrame, for charts."""
+        s = self.series(zip_code)
+        return pd.DataFrame({
+            "date": month_index_to_timestamp(s["month"]),
+            "median_sale_price": s["price"],
+            "per_capita_income": s["income"],
+        })
+
+    def _value_at(self, positions: np.ndarray, month: int) -> np.ndarray:
+        """Latest price at or before `month` for each ZIP position (NaN if none)."""
+        idx = np.searchsorted(self._keys, positions * 100_000 + month, side="right") - 1
+        valid = (positions >= 0) & (idx >= self.offsets[np.maximum(positions, 0)])
+        out = np.full(len(positions), np.nan)
+        out[valid] = self.obs["price"][idx[valid]]
+        return out
+
+    def price_change(self, zip_codes, end_year: int, months: int = 12) -> np.ndarray:
+        """
+        Fractional price change over the `months` months ending December of
+        end_year, for each ZIP in zip_codes (vectorized; NaN where unknown).
+        """
+        positions = np.array([self._pos.get(z, -1) for z in zip_codes], dtype=np.int64)
+        end_month = (end_year - MONTH_EPOCH_YEAR) * 12 + 11
+        end = self._value_at(positions, end_month)
+        start = self._value_at(positions, end_month - months)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return end / start - 1.0